@@ -258,6 +258,8 @@ function insertTrafficEventDocument(eventId, eventType, eventLevel, eventLatitud
         'event_level': eventLevel,
         'point': {'longitude': eventLongitude, 'latitude': eventLatitude},
         'datetime': eventDatetime
+    }, $currentDate: {
+        'modified_datetime': true
     }};
     trafficEventsCollection.updateOne(key, data, {upsert:true},  function (err, result) {
         if (err) {
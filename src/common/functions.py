@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,6 +146,8 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
+from bisect import bisect_right
+
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
 __credits__ = [
@@ -146,29 +156,35 @@ __credits__ = [
 ]
 
 
-def quicksort(list_to_be_sorted, comparison_list, low, high):
-    if low < high:
-        p = partition(list_to_be_sorted=list_to_be_sorted, comparison_list=comparison_list, low=low, high=high)
-        quicksort(list_to_be_sorted=list_to_be_sorted, comparison_list=comparison_list, low=low, high=p-1)
-        quicksort(list_to_be_sorted=list_to_be_sorted, comparison_list=comparison_list, low=p+1, high=high)
-
-
-def partition(list_to_be_sorted, comparison_list, low, high):
-    pivot = comparison_list[high]
-    i = low
-
-    for j in range(low, high):
-        if comparison_list[j] <= pivot:
-            swap(l=list_to_be_sorted, first=i, second=j)
-            swap(l=comparison_list, first=i, second=j)
-            i += 1
-
-    swap(l=list_to_be_sorted, first=i, second=high)
-    swap(l=comparison_list, first=i, second=high)
-    return i
-
-
-def swap(l, first, second):
-    temp = l[first]
-    l[first] = l[second]
-    l[second] = temp
+class SortedKeysView(object):
+    """
+    A read-only view of the keys of the items of a sorted list, which allows the bisect functions
+    to search the list by key, evaluating the key of O(log n) items, without copying the list.
+    """
+    def __init__(self, sorted_list, key):
+        """
+        :param sorted_list: list (sorted by key)
+        :param key: function
+        :return: None
+        """
+        self.sorted_list = sorted_list
+        self.key = key
+
+    def __getitem__(self, index):
+        return self.key(self.sorted_list[index])
+
+    def __len__(self):
+        return len(self.sorted_list)
+
+
+def insert_sorted(sorted_list, item, key):
+    """
+    Insert an item into a list which is sorted by key, after the items with equal keys.
+
+    :param sorted_list: list (sorted by key)
+    :param item: object
+    :param key: function
+    :return: None (Updates sorted_list)
+    """
+    insertion_index = bisect_right(SortedKeysView(sorted_list=sorted_list, key=key), key(item))
+    sorted_list.insert(insertion_index, item)
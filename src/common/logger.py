@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -161,5 +169,7 @@ def log(module_name, log_type, log_message):
         logger.info(log_message)
     elif log_type == 'DEBUG':
         logger.debug(log_message)
+    elif log_type == 'WARNING':
+        logger.warning(log_message)
     else:
         pass
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,6 +146,7 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
+import os
 from datetime import datetime, timedelta
 
 __author__ = 'Eleftherios Anagnostopoulos'
@@ -161,6 +170,8 @@ bus_road_types = (
 mongodb_host = '127.0.0.1'
 # The port where MongoDB is listening to.
 mongodb_port = 27017
+# The number of documents which are retrieved in each batch, while iterating over the documents of a collection.
+mongodb_cursor_batch_size = 1000
 
 # ---------------------------------------- ROUTE GENERATOR PARAMETERS -------------------------------------------------
 # The name of the host where the Route Generator is running.
@@ -170,6 +181,8 @@ route_generator_port = '2000'
 # A parameter representing the time interval (in seconds) during which
 # a client is waiting for a response from the Route Generator.
 route_generator_request_timeout = 60
+# The format of the departure datetimes, which are sent to the Route Generator for time-dependent routing.
+route_generator_datetime_format = '%Y-%m-%d %H:%M:%S'
 
 # ---------------------------------------- TRAFFIC DATA SIMULATOR PARAMETERS ------------------------------------------
 # A parameter representing the time interval (in seconds) during which the Traffic Data Simulator
@@ -177,6 +190,13 @@ route_generator_request_timeout = 60
 traffic_data_simulator_timeout = 100
 # A parameter representing the time interval (in seconds) during which the Traffic Data Simulator process is running.
 traffic_data_simulator_max_operation_timeout = 600
+# The seed of the random number generator of the Traffic Data Simulator (None for non-reproducible values).
+traffic_data_simulator_seed = None
+# A parameter representing the radius (in meters) of the congestion areas, which are generated around random
+# edges, so as the traffic density values of nearby edges to be correlated (0 for independent values).
+traffic_data_simulator_congestion_radius = 0
+# The number of congestion areas, which are generated by the Traffic Data Simulator.
+traffic_data_simulator_number_of_congestion_areas = 5
 
 # ---------------------------------------- TRAFFIC DATA PARSER PARAMETERS ---------------------------------------------
 # A parameter representing the time interval (in seconds) during which the Traffic Data Parser
@@ -185,6 +205,30 @@ traffic_data_simulator_max_operation_timeout = 600
 traffic_data_parser_timeout = 100
 # A parameter representing the time interval (in seconds) during which the Traffic Data Parser process running.
 traffic_data_parser_max_operation_timeout = 600
+# A parameter representing the size (in meters) of the cells of the grid, which is used by the Traffic Data Parser
+# in order to identify the edge_document which is closest to each traffic_event.
+traffic_data_parser_edge_index_cell_size = 100
+# A parameter representing the time interval (in seconds) after which the contribution of a traffic_event
+# to the traffic_density of its edge is reduced to half.
+traffic_data_parser_traffic_density_half_life = 600
+# The fraction of the contribution of a traffic_event, which is added to the edges that share a node with its edge.
+traffic_data_parser_traffic_density_neighbour_spread = 0.5
+# The traffic_density of an edge is stored, only if it differs more than this threshold from the stored one.
+traffic_data_parser_traffic_density_persistence_threshold = 0.01
+# A parameter representing the maximum time interval (in seconds) during which the Traffic Data Parser
+# is waiting for new traffic_events, while operating in event-driven mode.
+traffic_data_parser_event_timeout = 1
+# A parameter representing the duration (in seconds) of the time-of-day buckets of the traffic_density profiles,
+# which are aggregated by the Traffic Data Parser and used by the Route Generator for time-dependent routing.
+traffic_data_parser_traffic_profiles_bucket_duration = 900
+# The number of days of observations, which are taken into consideration in the traffic_density profiles.
+traffic_data_parser_traffic_profiles_history = 7
+# The file where the traffic_density profiles are stored by the Traffic Data Parser and loaded by the Route Generator.
+# The path is anchored to the root directory of the project, so as both processes to use the same file,
+# regardless of their working directories.
+traffic_data_parser_traffic_profiles_filename = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'traffic_profiles.npz'
+)
 
 # ---------------------------------------- TRAVEL REQUESTS SIMULATOR PARAMETERS ---------------------------------------
 # A parameter representing the time interval (in seconds) during which the Travel Requests Simulator
@@ -196,6 +240,10 @@ travel_requests_simulator_max_operation_timeout = 600
 travel_requests_simulator_min_number_of_documents = 10
 # The maximum number of travel_requests generated (each time) by the Travel Requests Simulator process.
 travel_requests_simulator_max_number_of_documents = 100
+# The seed of the random number generator of the Travel Requests Simulator (None for non-reproducible values).
+travel_requests_simulator_seed = None
+# The number of generated travel_requests, which are stored in each batch by the Travel Requests Simulator.
+travel_requests_simulator_batch_size = 10000
 
 # A list containing 24 integer values, corresponding to a 24-hour period, used by the Travel Requests Simulator
 # as comparison values (weights) for the distribution of generated travel_requests. Greater comparison values
@@ -239,6 +287,34 @@ look_ahead_timetables_updater_timeout = 100
 # A parameter representing the time interval (in seconds) during which the timetable update
 # algorithm is applied by the Look Ahead process.
 look_ahead_timetables_updater_max_operation_timeout = 600
+# A parameter representing the maximum time interval (in seconds) during which the Look Ahead
+# timetables updater is waiting for edges with updated traffic_density, while operating in event-driven mode.
+look_ahead_timetables_updater_event_timeout = 1
+# The routes of a segment of a bus_line (between two consecutive bus_stops) are recalculated by the timetable update
+# algorithm, only if the traffic_density of at least one of its edges has changed more than this threshold.
+look_ahead_traffic_density_change_threshold = 0.1
+# A parameter representing the time interval (in seconds) between the departure datetimes, for which the routes of
+# a bus_line are identified by the timetable generation algorithm, based on the expected traffic_density
+# at the corresponding time of day (0 for a single route, based on the current traffic_density).
+look_ahead_time_dependent_routing_interval = 3600
+# The engine which is used by the timetable generation algorithm, in order to cluster the travel_requests of a bus_line.
+# 'iterative': The initial timetables are repeatedly regenerated, while the average waiting time is reduced.
+# 'optimal': The travel_requests are clustered directly, based on their ideal departure datetimes, using dynamic
+#            programming, so as the total waiting time to be minimized, while respecting the maximum_bus_capacity
+#            and the minimum_number_of_passengers_in_timetable.
+look_ahead_timetables_generation_engine = 'iterative'
+# The number of worker processes, which generate or update the timetables of different bus_lines in parallel,
+# each one with its own connection to the System Database (1 for sequential processing, None for one per CPU core).
+look_ahead_number_of_workers = 1
+# A parameter representing the cost (in seconds of waiting time) of each timetable, which is generated by the 'optimal'
+# timetable generation engine. An additional timetable is generated only if it reduces the total waiting time of
+# the passengers more than this cost. Higher values lead to less generated timetables, while 0 leads to as many
+# timetables as minimum_number_of_passengers_in_timetable allows.
+# On the synthetic bus_line of benchmark_timetables_generation_engines (20 bus_stops, 10000 travel_requests),
+# the 'iterative' engine generates 681 timetables with 18.9 sec average waiting time. The 'optimal' engine generates
+# 955 timetables with 13.9 sec for cost 0, 711 with 18.2 sec for cost 120, 362 with 36.1 sec for cost 600,
+# and 158 with 85.3 sec for cost 3600. The cost of 120 keeps the waiting times comparable to the 'iterative' engine.
+look_ahead_timetable_cost = 120
 
 # ---------------------------------------- TESTING PARAMETERS ---------------------------------------------------------
 testing_osm_filename = '../resources/osm_files/uppsala.osm'
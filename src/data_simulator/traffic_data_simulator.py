@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,10 +146,12 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
-import random
+import math
+import numpy as np
 from src.mongodb_database.mongodb_database_connection import MongodbDatabaseConnection
 from src.common.logger import log
-from src.common.parameters import mongodb_host, mongodb_port
+from src.common.parameters import mongodb_host, mongodb_port, traffic_data_simulator_seed, \
+    traffic_data_simulator_congestion_radius, traffic_data_simulator_number_of_congestion_areas
 
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
@@ -152,10 +162,14 @@ __credits__ = [
 
 
 class TrafficDataSimulator(object):
-    def __init__(self):
+    def __init__(self, seed=traffic_data_simulator_seed, congestion_radius=traffic_data_simulator_congestion_radius,
+                 number_of_congestion_areas=traffic_data_simulator_number_of_congestion_areas):
         self.mongodb_database_connection = MongodbDatabaseConnection(host=mongodb_host, port=mongodb_port)
         self.lowest_traffic_density_value = 0
         self.highest_traffic_density_value = 1
+        self.random_state = np.random.RandomState(seed)
+        self.congestion_radius = congestion_radius
+        self.number_of_congestion_areas = number_of_congestion_areas
         log(module_name='traffic_data_simulator', log_type='DEBUG',
             log_message='mongodb_database_connection: established')
 
@@ -195,30 +209,28 @@ class TrafficDataSimulator(object):
         :param bus_stop_names: [string]
         :return: None
         """
-        if bus_stops is not None:
-            number_of_bus_stops = len(bus_stops)
-
-            for i in range(0, number_of_bus_stops - 1):
-                starting_bus_stop = bus_stops[i]
-                ending_bus_stop = bus_stops[i + 1]
-                self.generate_traffic_data_between_two_bus_stops(
-                    starting_bus_stop=starting_bus_stop,
-                    ending_bus_stop=ending_bus_stop
-                )
-
-        elif bus_stop_names is not None:
-            number_of_bus_stop_names = len(bus_stop_names)
-
-            for i in range(0, number_of_bus_stop_names - 1):
-                starting_bus_stop_name = bus_stop_names[i]
-                ending_bus_stop_name = bus_stop_names[i + 1]
-                self.generate_traffic_data_between_two_bus_stops(
-                    starting_bus_stop_name=starting_bus_stop_name,
-                    ending_bus_stop_name=ending_bus_stop_name
-                )
+        edge_object_ids_included_in_bus_stops = \
+            self.mongodb_database_connection.get_edge_object_ids_included_in_bus_stops(
+                bus_stops=bus_stops,
+                bus_stop_names=bus_stop_names
+            )
+        self.generate_traffic_data_for_edge_object_ids(
+            edge_object_ids=edge_object_ids_included_in_bus_stops
+        )
+
+    def generate_traffic_data_for_all_edges(self):
+        """
+        Generate random traffic density values for all the stored edge_documents.
 
+        :return: None
+        """
+        if self.congestion_radius > 0:
+            projection = {'starting_node.point': 1, 'ending_node.point': 1}
         else:
-            pass
+            projection = {'_id': 1}
+
+        edge_documents = list(self.mongodb_database_connection.iter_edge_documents(projection=projection))
+        self.generate_traffic_data_for_edge_documents(edge_documents=edge_documents)
 
     def generate_traffic_data_for_bus_line(self, bus_line=None, bus_line_id=None):
         """
@@ -242,14 +254,50 @@ class TrafficDataSimulator(object):
         """
         Generate random traffic density values for the edge_documents which are included in a bus_line_documents.
 
-        :param bus_lines: [bus_line_document]
+        :param bus_lines: [bus_line_document] or generator(bus_line_document)
         :return: None
         """
         if bus_lines is None:
-            bus_lines = self.mongodb_database_connection.find_bus_line_documents()
+            bus_lines = self.mongodb_database_connection.iter_bus_line_documents()
+
+        # The edges of all the bus_lines are collected, so as their traffic density values
+        # to be generated and stored at once.
+        edge_object_ids = set()
 
         for bus_line in bus_lines:
-            self.generate_traffic_data_for_bus_line(bus_line=bus_line)
+            edge_object_ids.update(
+                self.mongodb_database_connection.get_edge_object_ids_included_in_bus_line(bus_line=bus_line)
+            )
+
+        self.generate_traffic_data_for_edge_object_ids(edge_object_ids=list(edge_object_ids))
+
+    def generate_traffic_data_for_edge_documents(self, edge_documents):
+        """
+        Generate random traffic density values and update the corresponding edge_documents.
+
+        :param edge_documents: [edge_document] (The points of the nodes are required for correlated values)
+        :return: None
+        """
+        points = None
+
+        if self.congestion_radius > 0:
+            points = np.array([
+                [(edge_document.get('starting_node').get('point').get('longitude') +
+                  edge_document.get('ending_node').get('point').get('longitude')) / 2.0,
+                 (edge_document.get('starting_node').get('point').get('latitude') +
+                  edge_document.get('ending_node').get('point').get('latitude')) / 2.0]
+                for edge_document in edge_documents
+            ], dtype=float)
+
+        traffic_density_values = self.generate_traffic_density_values(
+            number_of_values=len(edge_documents),
+            points=points
+        )
+        traffic_densities = dict(zip(
+            [edge_document.get('_id') for edge_document in edge_documents],
+            traffic_density_values.tolist()
+        ))
+        self.mongodb_database_connection.update_traffic_densities(traffic_densities=traffic_densities)
 
     def generate_traffic_data_for_edge_object_ids(self, edge_object_ids):
         """
@@ -258,21 +306,50 @@ class TrafficDataSimulator(object):
         :param edge_object_ids: [ObjectId]
         :return: None
         """
-        number_of_edge_object_ids = len(edge_object_ids)
-        number_of_produced_traffic_values = random.randint(0, number_of_edge_object_ids - 1)
-
-        for i in range(0, number_of_produced_traffic_values):
-            # edge_object_ids_index = random.randint(0, number_of_edge_object_ids - 1)
-            edge_object_ids_index = i
-            edge_object_id = edge_object_ids[edge_object_ids_index]
-            new_traffic_density_value = random.uniform(
-                self.lowest_traffic_density_value,
-                self.highest_traffic_density_value
+        if self.congestion_radius > 0:
+            edge_documents = self.mongodb_database_connection.find_edge_documents(
+                object_ids=edge_object_ids,
+                projection={'starting_node.point': 1, 'ending_node.point': 1}
             )
-            self.mongodb_database_connection.update_traffic_density(
-                edge_object_id=edge_object_id,
-                new_traffic_density_value=new_traffic_density_value
+            self.generate_traffic_data_for_edge_documents(edge_documents=edge_documents)
+        else:
+            traffic_density_values = self.generate_traffic_density_values(number_of_values=len(edge_object_ids))
+            traffic_densities = dict(zip(edge_object_ids, traffic_density_values.tolist()))
+            self.mongodb_database_connection.update_traffic_densities(traffic_densities=traffic_densities)
+
+    def generate_traffic_density_values(self, number_of_values, points=None):
+        """
+        Generate random traffic density values, between the lowest and highest traffic density values.
+
+        If the points of the edges are provided, then congestion areas are generated around randomly
+        selected points, and the values of the edges which are close to them are increased.
+
+        :param number_of_values: int
+        :param points: np.ndarray [[longitude, latitude]]
+        :return: traffic_density_values: np.ndarray
+        """
+        traffic_density_values = self.random_state.uniform(0.0, 1.0, number_of_values)
+
+        if points is not None and number_of_values > 0 and self.congestion_radius > 0:
+            # Equirectangular projection of the points (in meters), around their mean latitude.
+            earth_radius = 6371000
+            reference_latitude = math.radians(np.mean(points[:, 1]))
+            x = np.radians(points[:, 0]) * earth_radius * math.cos(reference_latitude)
+            y = np.radians(points[:, 1]) * earth_radius
+
+            centers = self.random_state.choice(
+                number_of_values,
+                size=min(self.number_of_congestion_areas, number_of_values),
+                replace=False
             )
+            squared_distances = (x[:, np.newaxis] - x[centers]) ** 2 + (y[:, np.newaxis] - y[centers]) ** 2
+            congestion_values = np.exp(-squared_distances.min(axis=1) / (2.0 * self.congestion_radius ** 2))
+            traffic_density_values = (traffic_density_values + congestion_values) / 2.0
+
+        traffic_density_values = self.lowest_traffic_density_value + traffic_density_values * (
+            self.highest_traffic_density_value - self.lowest_traffic_density_value
+        )
+        return traffic_density_values
 
     def set_traffic_density_limits(self, lowest_traffic_density_value, highest_traffic_density_value):
         """
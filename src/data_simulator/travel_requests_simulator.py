@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,11 +146,12 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
-import random
+import numpy as np
 from datetime import timedelta
 from src.mongodb_database.mongodb_database_connection import MongodbDatabaseConnection
 from src.common.logger import log
-from src.common.parameters import mongodb_host, mongodb_port, travel_requests_simulator_datetime_distribution_weights
+from src.common.parameters import mongodb_host, mongodb_port, travel_requests_simulator_datetime_distribution_weights, \
+    travel_requests_simulator_seed, travel_requests_simulator_batch_size
 
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
@@ -153,8 +162,10 @@ __credits__ = [
 
 
 class TravelRequestsSimulator(object):
-    def __init__(self):
+    def __init__(self, seed=travel_requests_simulator_seed, batch_size=travel_requests_simulator_batch_size):
         self.mongodb_database_connection = MongodbDatabaseConnection(host=mongodb_host, port=mongodb_port)
+        self.random_state = np.random.RandomState(seed)
+        self.batch_size = batch_size
         log(module_name='travel_requests_simulator', log_type='DEBUG',
             log_message='mongodb_database_connection: established')
 
@@ -202,12 +213,12 @@ class TravelRequestsSimulator(object):
         :param max_number_of_travel_request_documents: int
         :return: None
         """
-        bus_lines = self.mongodb_database_connection.find_bus_line_documents()
+        bus_lines = self.mongodb_database_connection.iter_bus_line_documents()
 
         for bus_line in bus_lines:
-            number_of_travel_request_documents = random.randint(
+            number_of_travel_request_documents = self.random_state.randint(
                 min_number_of_travel_request_documents,
-                max_number_of_travel_request_documents
+                max_number_of_travel_request_documents + 1
             )
             self.generate_travel_request_documents(
                 initial_datetime=initial_datetime,
@@ -241,74 +252,76 @@ class TravelRequestsSimulator(object):
         elif bus_line is None:
             bus_line = self.mongodb_database_connection.find_bus_line_document(bus_line_id=bus_line_id)
         else:
-            pass
+            bus_line_id = bus_line.get('bus_line_id')
 
         bus_stops = bus_line.get('bus_stops')
-        number_of_bus_stops = len(bus_stops)
 
-        # 3: The Travel Requests Simulator generates the travel_request_documents, taking into consideration
-        #    the variation of transportation demand during the hours of the day.
+        # 3: The Travel Requests Simulator samples the bus_stops and the departure_datetimes of all the
+        #    travel_request_documents at once, taking into consideration the variation of transportation
+        #    demand during the hours of the day.
         #
-        # distribution_weighted_datetimes = [
-        #     (initial_datetime + timedelta(hours=0), 1),
-        #     (initial_datetime + timedelta(hours=1), 1),
-        #     (initial_datetime + timedelta(hours=2), 1),
-        #     (initial_datetime + timedelta(hours=3), 1),
-        #     (initial_datetime + timedelta(hours=4), 1),
-        #     (initial_datetime + timedelta(hours=5), 1),
-        #     (initial_datetime + timedelta(hours=6), 1),
-        #     (initial_datetime + timedelta(hours=7), 1),
-        #     (initial_datetime + timedelta(hours=8), 1),
-        #     (initial_datetime + timedelta(hours=9), 1),
-        #     (initial_datetime + timedelta(hours=10), 1),
-        #     (initial_datetime + timedelta(hours=11), 1),
-        #     (initial_datetime + timedelta(hours=12), 1),
-        #     (initial_datetime + timedelta(hours=13), 1),
-        #     (initial_datetime + timedelta(hours=14), 1),
-        #     (initial_datetime + timedelta(hours=15), 1),
-        #     (initial_datetime + timedelta(hours=16), 1),
-        #     (initial_datetime + timedelta(hours=17), 1),
-        #     (initial_datetime + timedelta(hours=18), 1),
-        #     (initial_datetime + timedelta(hours=19), 1),
-        #     (initial_datetime + timedelta(hours=20), 1),
-        #     (initial_datetime + timedelta(hours=21), 1),
-        #     (initial_datetime + timedelta(hours=22), 1),
-        #     (initial_datetime + timedelta(hours=23), 1)
-        # ]
-        distribution_weighted_datetimes = [
-            (initial_datetime + timedelta(hours=i),
-             travel_requests_simulator_datetime_distribution_weights[i]) for i in range(0, 24)
-        ]
-        datetime_population = [val for val, cnt in distribution_weighted_datetimes for i in range(cnt)]
-        travel_request_documents = []
-        maximum_client_id = self.mongodb_database_connection.get_maximum_or_minimum(collection='travel_request')
-
-        for i in range(0, number_of_travel_request_documents):
-            client_id = maximum_client_id + 1
-            maximum_client_id = client_id
-            starting_bus_stop_index = random.randint(0, number_of_bus_stops - 2)
-            starting_bus_stop = bus_stops[starting_bus_stop_index]
-            ending_bus_stop_index = random.randint(starting_bus_stop_index + 1, number_of_bus_stops - 1)
-            ending_bus_stop = bus_stops[ending_bus_stop_index]
-            additional_departure_time_interval = random.randint(0, 59)
-            departure_datetime = (random.choice(datetime_population) +
-                                  timedelta(minutes=additional_departure_time_interval))
-
-            travel_request_document = {
-                'client_id': client_id,
-                'bus_line_id': bus_line_id,
-                'starting_bus_stop': starting_bus_stop,
-                'ending_bus_stop': ending_bus_stop,
-                'departure_datetime': departure_datetime,
-                'arrival_datetime': None,
-                'starting_timetable_entry_index': None,
-                'ending_timetable_entry_index': None
-            }
-            travel_request_documents.append(travel_request_document)
-
-        # 4: The generated travel_request_documents are stored at the
-        #    TravelRequests collection of the System Database.
+        starting_bus_stop_indexes, ending_bus_stop_indexes, departure_minutes = self.sample_travel_requests(
+            number_of_travel_request_documents=number_of_travel_request_documents,
+            number_of_bus_stops=len(bus_stops)
+        )
+        departure_datetimes = [initial_datetime + timedelta(minutes=minute) for minute in range(0, 24 * 60)]
+        first_client_id = self.mongodb_database_connection.reserve_identifiers(
+            collection='travel_request',
+            number_of_identifiers=number_of_travel_request_documents
+        )
+
+        # 4: The generated travel_request_documents are stored at the TravelRequests collection
+        #    of the System Database in batches, so as only one batch to be kept in memory.
         #
-        self.mongodb_database_connection.insert_travel_request_documents(
-            travel_request_documents=travel_request_documents
+        for batch_start in range(0, number_of_travel_request_documents, self.batch_size):
+            batch_end = min(batch_start + self.batch_size, number_of_travel_request_documents)
+            travel_request_documents = [
+                {
+                    'client_id': first_client_id + i,
+                    'bus_line_id': bus_line_id,
+                    'starting_bus_stop': bus_stops[starting_bus_stop_indexes[i]],
+                    'ending_bus_stop': bus_stops[ending_bus_stop_indexes[i]],
+                    'departure_datetime': departure_datetimes[departure_minutes[i]],
+                    'arrival_datetime': None,
+                    'starting_timetable_entry_index': None,
+                    'ending_timetable_entry_index': None
+                }
+                for i in range(batch_start, batch_end)
+            ]
+            self.mongodb_database_connection.insert_travel_request_documents(
+                travel_request_documents=travel_request_documents
+            )
+
+        log(module_name='travel_requests_simulator', log_type='DEBUG',
+            log_message='insert_travel_request_documents: ok')
+
+    def sample_travel_requests(self, number_of_travel_request_documents, number_of_bus_stops):
+        """
+        Sample the bus_stops and the departure times of travel_requests.
+
+        The hour of each departure is drawn from travel_requests_simulator_datetime_distribution_weights,
+        and the minute uniformly. The starting_bus_stop is drawn uniformly from all the bus_stops except
+        for the last one, and the ending_bus_stop uniformly from the ones which follow it.
+
+        :param number_of_travel_request_documents: int
+        :param number_of_bus_stops: int
+        :return: (starting_bus_stop_indexes, ending_bus_stop_indexes, departure_minutes): (np.ndarray, np.ndarray,
+                 np.ndarray) (departure_minutes are counted from the initial_datetime)
+        """
+        weights = np.array(travel_requests_simulator_datetime_distribution_weights, dtype=float)
+        departure_hours = self.random_state.choice(
+            24, size=number_of_travel_request_documents, p=weights / weights.sum()
         )
+        departure_minutes = departure_hours * 60 + self.random_state.randint(
+            0, 60, size=number_of_travel_request_documents
+        )
+
+        starting_bus_stop_indexes = self.random_state.randint(
+            0, number_of_bus_stops - 1, size=number_of_travel_request_documents
+        )
+        number_of_following_bus_stops = number_of_bus_stops - 1 - starting_bus_stop_indexes
+        ending_bus_stop_indexes = starting_bus_stop_indexes + 1 + (
+            self.random_state.random_sample(number_of_travel_request_documents) * number_of_following_bus_stops
+        ).astype(int)
+
+        return starting_bus_stop_indexes, ending_bus_stop_indexes, departure_minutes
@@ -0,0 +1,333 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+"""
+- LICENCE
+
+The MIT License (MIT)
+
+Copyright (c) 2016 Eleftherios Anagnostopoulos for Ericsson AB (EU FP7 CityPulse Project)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+
+- DESCRIPTION OF DOCUMENTS
+
+-- MongoDB Database Documents:
+
+address_document: {
+    '_id', 'name', 'node_id', 'point': {'longitude', 'latitude'}
+}
+bus_line_document: {
+    '_id', 'bus_line_id', 'bus_stops': [{'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}]
+}
+bus_stop_document: {
+    '_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}
+}
+bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_object_id]]
+}
+bus_vehicle_document: {
+    '_id', 'bus_vehicle_id', 'maximum_capacity',
+    'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
+}
+counter_document: {
+    '_id', 'sequence_value'
+}
+detailed_bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_document]]
+}
+edge_document: {
+    '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'max_speed', 'road_type', 'way_id', 'traffic_density'
+}
+node_document: {
+    '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
+}
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
+point_document: {
+    '_id', 'osm_id', 'point': {'longitude', 'latitude'}
+}
+timetable_document: {
+    '_id', 'timetable_id', 'bus_line_id', 'bus_vehicle_id',
+    'timetable_entries': [{
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime', 'number_of_onboarding_passengers',
+        'number_of_deboarding_passengers', 'number_of_current_passengers',
+        'route': {
+            'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+            'distances_from_starting_node', 'times_from_starting_node',
+            'distances_from_previous_node', 'times_from_previous_node'
+        }
+    }],
+    'travel_requests': [{
+        '_id', 'client_id', 'bus_line_id',
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime',
+        'starting_timetable_entry_index', 'ending_timetable_entry_index'
+    }]
+}
+traffic_event_document: {
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
+}
+travel_request_document: {
+    '_id', 'client_id', 'bus_line_id',
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'departure_datetime', 'arrival_datetime',
+    'starting_timetable_entry_index', 'ending_timetable_entry_index'
+}
+way_document: {
+    '_id', 'osm_id', 'tags', 'references'
+}
+
+-- Route Generator Responses:
+
+get_route_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}
+get_route_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}]
+get_waypoints_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}
+get_waypoints_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}]
+"""
+import math
+import numpy as np
+
+from src.common.parameters import traffic_data_parser_edge_index_cell_size
+
+__author__ = 'Eleftherios Anagnostopoulos'
+__email__ = 'eanagnostopoulos@hotmail.com'
+__credits__ = [
+    'Azadeh Bararsani (Senior Researcher at Ericsson AB) - email: azadeh.bararsani@ericsson.com'
+    'Aneta Vulgarakis Feljan (Senior Researcher at Ericsson AB) - email: aneta.vulgarakis@ericsson.com'
+]
+
+# Radius of the earth in meters
+earth_radius = 6371000
+
+
+class EdgeIndex(object):
+    """
+    A uniform grid index over the segments of edge_documents, used in order to identify
+    the edge_document which is closest to a geographic point.
+
+    The coordinates of the nodes are projected to a local equirectangular plane (in meters), around the mean
+    latitude of the indexed edges, and each edge is registered to the grid cells which are covered by its bounding box.
+    The distance between a point and an edge is the distance between the point and the segment of the edge.
+    """
+
+    def __init__(self, edge_documents, cell_size=traffic_data_parser_edge_index_cell_size):
+        """
+        Initialize the EdgeIndex.
+
+        :param edge_documents: [edge_document]
+        :param cell_size: float (meters)
+        :return: None
+        """
+        self.edge_documents = list(edge_documents)
+        self.cell_size = float(cell_size)
+        self.cells = {}
+        self.reference_latitude = 0.0
+        self.starting_x = np.zeros(0)
+        self.starting_y = np.zeros(0)
+        self.ending_x = np.zeros(0)
+        self.ending_y = np.zeros(0)
+        self.minimum_cell = (0, 0)
+        self.maximum_cell = (0, 0)
+
+        if len(self.edge_documents) > 0:
+            self.build()
+
+    def build(self):
+        """
+        Project the segments of the edge_documents and register them to the cells of the grid.
+
+        :return: None (Updates cells)
+        """
+        coordinates = np.array([
+            [edge_document.get('starting_node').get('point').get('longitude'),
+             edge_document.get('starting_node').get('point').get('latitude'),
+             edge_document.get('ending_node').get('point').get('longitude'),
+             edge_document.get('ending_node').get('point').get('latitude')]
+            for edge_document in self.edge_documents
+        ], dtype=float)
+
+        self.reference_latitude = float(np.mean(coordinates[:, [1, 3]]))
+        self.starting_x, self.starting_y = self.project(longitude=coordinates[:, 0], latitude=coordinates[:, 1])
+        self.ending_x, self.ending_y = self.project(longitude=coordinates[:, 2], latitude=coordinates[:, 3])
+
+        minimum_cell_x = np.floor(np.minimum(self.starting_x, self.ending_x) / self.cell_size).astype(int)
+        maximum_cell_x = np.floor(np.maximum(self.starting_x, self.ending_x) / self.cell_size).astype(int)
+        minimum_cell_y = np.floor(np.minimum(self.starting_y, self.ending_y) / self.cell_size).astype(int)
+        maximum_cell_y = np.floor(np.maximum(self.starting_y, self.ending_y) / self.cell_size).astype(int)
+
+        for edge_index in range(0, len(self.edge_documents)):
+            for cell_x in range(minimum_cell_x[edge_index], maximum_cell_x[edge_index] + 1):
+                for cell_y in range(minimum_cell_y[edge_index], maximum_cell_y[edge_index] + 1):
+                    self.cells.setdefault((cell_x, cell_y), []).append(edge_index)
+
+        self.minimum_cell = (int(minimum_cell_x.min()), int(minimum_cell_y.min()))
+        self.maximum_cell = (int(maximum_cell_x.max()), int(maximum_cell_y.max()))
+
+    def get_candidate_edge_indexes(self, cell_x, cell_y, ring):
+        """
+        Get the indexes of the edges which are registered to the cells of a square ring around a cell.
+
+        :param cell_x: int
+        :param cell_y: int
+        :param ring: int
+        :return: candidate_edge_indexes: set([int])
+        """
+        candidate_edge_indexes = set()
+
+        for x in range(cell_x - ring, cell_x + ring + 1):
+            for y in range(cell_y - ring, cell_y + ring + 1):
+                if max(abs(x - cell_x), abs(y - cell_y)) == ring:
+                    candidate_edge_indexes.update(self.cells.get((x, y), []))
+
+        return candidate_edge_indexes
+
+    def get_nearest_edge_document(self, longitude, latitude):
+        """
+        Get the edge_document whose segment is closest to a geographic point.
+
+        The rings of cells around the cell of the point are examined in increasing order, until
+        the distance of the next ring exceeds the minimum distance which has been identified.
+
+        :param longitude: float
+        :param latitude: float
+        :return: (edge_document, distance_in_meters) or (None, inf) if there are no indexed edges
+        """
+        nearest_edge_document = None
+        minimum_distance = float('inf')
+
+        if len(self.edge_documents) == 0:
+            return nearest_edge_document, minimum_distance
+
+        x, y = self.project(longitude=longitude, latitude=latitude)
+        cell_x = int(math.floor(x / self.cell_size))
+        cell_y = int(math.floor(y / self.cell_size))
+        maximum_ring = max(
+            abs(cell_x - self.minimum_cell[0]), abs(cell_x - self.maximum_cell[0]),
+            abs(cell_y - self.minimum_cell[1]), abs(cell_y - self.maximum_cell[1])
+        )
+        ring = 0
+
+        while ring <= maximum_ring and ring * self.cell_size < minimum_distance + self.cell_size:
+            candidate_edge_indexes = self.get_candidate_edge_indexes(cell_x=cell_x, cell_y=cell_y, ring=ring)
+
+            if len(candidate_edge_indexes) > 0:
+                candidate_edge_indexes = np.fromiter(candidate_edge_indexes, dtype=int)
+                distances = point_to_segments_distances(
+                    x=x,
+                    y=y,
+                    starting_x=self.starting_x[candidate_edge_indexes],
+                    starting_y=self.starting_y[candidate_edge_indexes],
+                    ending_x=self.ending_x[candidate_edge_indexes],
+                    ending_y=self.ending_y[candidate_edge_indexes]
+                )
+                position = int(np.argmin(distances))
+
+                if distances[position] < minimum_distance:
+                    minimum_distance = float(distances[position])
+                    nearest_edge_document = self.edge_documents[candidate_edge_indexes[position]]
+
+            ring += 1
+
+        return nearest_edge_document, minimum_distance
+
+    def project(self, longitude, latitude):
+        """
+        Project geographic coordinates to the local equirectangular plane of the index.
+
+        :param longitude: float or np.ndarray
+        :param latitude: float or np.ndarray
+        :return: (x, y) in meters
+        """
+        x = np.radians(longitude) * earth_radius * math.cos(math.radians(self.reference_latitude))
+        y = np.radians(latitude) * earth_radius
+        return x, y
+
+
+def point_to_segments_distances(x, y, starting_x, starting_y, ending_x, ending_y):
+    """
+    Calculate the distances between a point and multiple segments of a plane.
+
+    :param x: float
+    :param y: float
+    :param starting_x: np.ndarray
+    :param starting_y: np.ndarray
+    :param ending_x: np.ndarray
+    :param ending_y: np.ndarray
+    :return: distances: np.ndarray
+    """
+    segment_x = ending_x - starting_x
+    segment_y = ending_y - starting_y
+    squared_lengths = segment_x ** 2 + segment_y ** 2
+
+    # The projection of the point to each segment is clipped to its endpoints.
+    # Segments with zero length are handled as points.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        t = ((x - starting_x) * segment_x + (y - starting_y) * segment_y) / squared_lengths
+
+    t = np.where(squared_lengths > 0, np.clip(t, 0.0, 1.0), 0.0)
+    closest_x = starting_x + t * segment_x
+    closest_y = starting_y + t * segment_y
+    distances = np.hypot(x - closest_x, y - closest_y)
+    return distances
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -270,6 +278,61 @@ def closest_point_in_list(point, points):
     return points[np.argmin([distance(point, pointy) for pointy in points])]
 
 
+def convex_hull(points):
+    """
+    Calculate the convex hull of multiple geographic points, using the monotone chain algorithm.
+
+    The longitude and latitude values are handled as planar coordinates, which is adequate
+    for the extent of a city. The vertices of the hull are returned in counter-clockwise order.
+
+    :param points: [Point]
+    :return: [Point]
+    """
+    tuples = sorted(set(point.coordinates() for point in points))
+
+    if len(tuples) < 3:
+        return [Point(longitude=x, latitude=y) for (x, y) in tuples]
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for t in tuples:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], t) <= 0:
+            lower.pop()
+        lower.append(t)
+
+    upper = []
+    for t in reversed(tuples):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], t) <= 0:
+            upper.pop()
+        upper.append(t)
+
+    return [Point(longitude=x, latitude=y) for (x, y) in lower[:-1] + upper[:-1]]
+
+
+def included_in_convex_polygon(point, polygon):
+    """
+    Check if a geographic point is included in (or on the border of) a convex polygon.
+
+    :param point: Point
+    :param polygon: [Point] (counter-clockwise order)
+    :return: bool
+    """
+    if len(polygon) < 3:
+        return False
+
+    for i in range(0, len(polygon)):
+        a = polygon[i]
+        b = polygon[(i + 1) % len(polygon)]
+
+        if ((b.longitude - a.longitude) * (point.latitude - a.latitude) -
+                (b.latitude - a.latitude) * (point.longitude - a.longitude)) < 0:
+            return False
+
+    return True
+
+
 def y2lat(y):
     """
     Translate a y-axis coordinate to longitude geographic coordinate, assuming
@@ -0,0 +1,235 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+"""
+- LICENCE
+
+The MIT License (MIT)
+
+Copyright (c) 2016 Eleftherios Anagnostopoulos for Ericsson AB (EU FP7 CityPulse Project)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+
+- DESCRIPTION OF DOCUMENTS
+
+-- MongoDB Database Documents:
+
+address_document: {
+    '_id', 'name', 'node_id', 'point': {'longitude', 'latitude'}
+}
+bus_line_document: {
+    '_id', 'bus_line_id', 'bus_stops': [{'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}]
+}
+bus_stop_document: {
+    '_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}
+}
+bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_object_id]]
+}
+bus_vehicle_document: {
+    '_id', 'bus_vehicle_id', 'maximum_capacity',
+    'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
+}
+counter_document: {
+    '_id', 'sequence_value'
+}
+detailed_bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_document]]
+}
+edge_document: {
+    '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'max_speed', 'road_type', 'way_id', 'traffic_density'
+}
+node_document: {
+    '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
+}
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
+point_document: {
+    '_id', 'osm_id', 'point': {'longitude', 'latitude'}
+}
+timetable_document: {
+    '_id', 'timetable_id', 'bus_line_id', 'bus_vehicle_id',
+    'timetable_entries': [{
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime', 'number_of_onboarding_passengers',
+        'number_of_deboarding_passengers', 'number_of_current_passengers',
+        'route': {
+            'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+            'distances_from_starting_node', 'times_from_starting_node',
+            'distances_from_previous_node', 'times_from_previous_node'
+        }
+    }],
+    'travel_requests': [{
+        '_id', 'client_id', 'bus_line_id',
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime',
+        'starting_timetable_entry_index', 'ending_timetable_entry_index'
+    }]
+}
+traffic_event_document: {
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
+}
+travel_request_document: {
+    '_id', 'client_id', 'bus_line_id',
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'departure_datetime', 'arrival_datetime',
+    'starting_timetable_entry_index', 'ending_timetable_entry_index'
+}
+way_document: {
+    '_id', 'osm_id', 'tags', 'references'
+}
+
+-- Route Generator Responses:
+
+get_route_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}
+get_route_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}]
+get_waypoints_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}
+get_waypoints_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}]
+"""
+__author__ = 'Eleftherios Anagnostopoulos'
+__email__ = 'eanagnostopoulos@hotmail.com'
+__credits__ = [
+    'Azadeh Bararsani (Senior Researcher at Ericsson AB) - email: azadeh.bararsani@ericsson.com'
+    'Aneta Vulgarakis Feljan (Senior Researcher at Ericsson AB) - email: aneta.vulgarakis@ericsson.com'
+]
+
+
+class BusLineSegmentIndex(object):
+    """
+    A reverse index from the edges of the road network to the segments of the bus_lines which include them.
+
+    The segment i of a bus_line connects its bus_stops i and i + 1, and it includes the edges
+    of all the waypoints of the corresponding bus_stop_waypoints_document.
+    """
+
+    def __init__(self, bus_line_documents, bus_stop_waypoints_documents):
+        """
+        Initialize the BusLineSegmentIndex.
+
+        :param bus_line_documents: [bus_line_document]
+        :param bus_stop_waypoints_documents: [bus_stop_waypoints_document]
+        :return: None
+        """
+        self.bus_line_ids = set()
+        # {edge_object_id -> set([(bus_line_id, segment_index)])}
+        self.segments_of_edges = {}
+        self.build(
+            bus_line_documents=bus_line_documents,
+            bus_stop_waypoints_documents=bus_stop_waypoints_documents
+        )
+
+    def build(self, bus_line_documents, bus_stop_waypoints_documents):
+        """
+        Register the segments of the bus_lines to the edges which are included in their waypoints.
+
+        :param bus_line_documents: [bus_line_document]
+        :param bus_stop_waypoints_documents: [bus_stop_waypoints_document]
+        :return: None (Updates segments_of_edges)
+        """
+        # {(starting_bus_stop_object_id, ending_bus_stop_object_id) -> set([edge_object_id])}
+        edge_object_ids_of_bus_stop_pairs = {}
+
+        for bus_stop_waypoints_document in bus_stop_waypoints_documents:
+            bus_stop_pair = (
+                bus_stop_waypoints_document.get('starting_bus_stop').get('_id'),
+                bus_stop_waypoints_document.get('ending_bus_stop').get('_id')
+            )
+            edge_object_ids_of_bus_stop_pairs[bus_stop_pair] = set(
+                edge_object_id
+                for waypoints in bus_stop_waypoints_document.get('waypoints')
+                for edge_object_id in waypoints
+            )
+
+        for bus_line_document in bus_line_documents:
+            bus_line_id = bus_line_document.get('bus_line_id')
+            bus_stops = bus_line_document.get('bus_stops')
+            self.bus_line_ids.add(bus_line_id)
+
+            for segment_index in range(0, len(bus_stops) - 1):
+                bus_stop_pair = (bus_stops[segment_index].get('_id'), bus_stops[segment_index + 1].get('_id'))
+
+                for edge_object_id in edge_object_ids_of_bus_stop_pairs.get(bus_stop_pair, set()):
+                    self.segments_of_edges.setdefault(edge_object_id, set()).add((bus_line_id, segment_index))
+
+    def get_edge_object_ids(self):
+        """
+        Get the object_ids of the edges which are included in at least one bus_line.
+
+        :return: edge_object_ids: [ObjectId]
+        """
+        return self.segments_of_edges.keys()
+
+    def get_segments_of_edges(self, edge_object_ids):
+        """
+        Get the segments of the bus_lines which include at least one of the provided edges.
+
+        :param edge_object_ids: [ObjectId]
+        :return: segments_of_bus_lines: {bus_line_id -> set([segment_index])}
+        """
+        segments_of_bus_lines = {}
+
+        for edge_object_id in edge_object_ids:
+            for bus_line_id, segment_index in self.segments_of_edges.get(edge_object_id, set()):
+                segments_of_bus_lines.setdefault(bus_line_id, set()).add(segment_index)
+
+        return segments_of_bus_lines
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -213,8 +221,7 @@ class BusVehicleHandler(object):
         :param maximum_capacity: int
         :return: new_object_id: ObjectId
         """
-        maximum_bus_vehicle_id = self.mongodb_database_connection.get_maximum_or_minimum(collection='bus_vehicle')
-        bus_vehicle_id = maximum_bus_vehicle_id + 1
+        bus_vehicle_id = self.mongodb_database_connection.reserve_identifiers(collection='bus_vehicle')
 
         bus_vehicle_document = {
             'bus_vehicle_id': bus_vehicle_id,
@@ -233,11 +240,13 @@ class BusVehicleHandler(object):
         :return: new_object_ids: [ObjectIds]
         """
         bus_vehicle_documents = []
-        maximum_bus_vehicle_id = self.mongodb_database_connection.get_maximum_or_minimum(collection='bus_vehicle')
+        first_bus_vehicle_id = self.mongodb_database_connection.reserve_identifiers(
+            collection='bus_vehicle',
+            number_of_identifiers=number_of_bus_vehicle_documents
+        )
 
         for i in range(0, number_of_bus_vehicle_documents):
-            bus_vehicle_id = maximum_bus_vehicle_id + 1
-            maximum_bus_vehicle_id = bus_vehicle_id
+            bus_vehicle_id = first_bus_vehicle_id + i
 
             bus_vehicle_document = {
                 'bus_vehicle_id': bus_vehicle_id,
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,12 +146,23 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
-from src.common.parameters import mongodb_host, mongodb_port
-from src.mongodb_database.mongodb_database_connection import MongodbDatabaseConnection
-from src.route_generator.route_generator_client import get_waypoints_between_two_bus_stops
+from multiprocessing import Pool
+from Queue import Empty
+from src.common.parameters import mongodb_host, mongodb_port, look_ahead_timetables_updater_event_timeout, \
+    look_ahead_timetables_updater_max_operation_timeout, look_ahead_traffic_density_change_threshold, \
+    look_ahead_timetables_generation_engine, look_ahead_number_of_workers, look_ahead_time_dependent_routing_interval
+from src.mongodb_database.mongodb_database_connection import MongodbDatabaseConnection, \
+    timetable_waiting_time_projection
+from src.route_generator.route_generator_client import get_route_between_two_bus_stops, \
+    get_waypoints_between_two_bus_stops
 from src.common.logger import log
+from src.look_ahead.bus_line_segment_index import BusLineSegmentIndex
+from src.look_ahead.timetable_arrays import TimetableArrays
+from src.look_ahead.timetable_clustering import generate_timetable_arrays_with_optimal_clustering
 from src.look_ahead.timetable_generator import *
 from src.look_ahead.timetable_updater import *
+# The time module is imported after the star imports, since timetable_generator exports datetime.time.
+import time
 
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
@@ -156,6 +175,10 @@ __credits__ = [
 class LookAheadHandler(object):
     def __init__(self):
         self.mongodb_database_connection = MongodbDatabaseConnection(host=mongodb_host, port=mongodb_port)
+        self.bus_line_segment_index = None
+        # The traffic_density values of the edges, which were taken into consideration
+        # by the latest update of the timetables: {edge_object_id -> traffic_density}
+        self.traffic_densities = {}
         log(module_name='look_ahead_handler', log_type='DEBUG',
             log_message='mongodb_database_connection: established')
 
@@ -177,8 +200,7 @@ class LookAheadHandler(object):
         #    in case there is a bus_stop_name which does not correspond to a stored bus_stop.
         #
         if bus_line_id is None:
-            maximum_bus_line_id = self.mongodb_database_connection.get_maximum_or_minimum(collection='bus_line')
-            bus_line_id = maximum_bus_line_id + 1
+            bus_line_id = self.mongodb_database_connection.reserve_identifiers(collection='bus_line')
 
         bus_stops = []
 
@@ -286,10 +308,6 @@ class LookAheadHandler(object):
         :return: None
         """
 
-        maximum_timetable_id_in_database = self.mongodb_database_connection.get_maximum_or_minimum(
-            collection='timetable'
-        )
-
         # 1: The list of bus_stops corresponding to the provided bus_line is retrieved.
         #
         # bus_stop_document: {
@@ -324,15 +342,17 @@ class LookAheadHandler(object):
             max_departure_datetime=requests_max_departure_datetime
         )
 
-        # 3: (TimetableGenerator is initialized) The Look Ahead sends a request to the Route Generator so as
-        #    to identify the less time-consuming bus_route between the bus_stops of bus_line,
-        #    while taking into consideration the current levels of traffic density.
+        # 3: (TimetableGenerator is initialized) The Look Ahead sends requests to the Route Generator so as
+        #    to identify the less time-consuming bus_routes between the bus_stops of bus_line, for departure
+        #    datetimes throughout the period of the timetables, while taking into consideration the expected
+        #    levels of traffic density at the corresponding time of day.
         #
         timetable_generator = TimetableGenerator(
-            maximum_timetable_id_in_database=maximum_timetable_id_in_database,
             bus_line_id=bus_line_id,
             bus_stops=bus_stops,
-            travel_requests=travel_requests
+            travel_requests=travel_requests,
+            timetables_starting_datetime=timetables_starting_datetime,
+            timetables_ending_datetime=timetables_ending_datetime
         )
 
         # The list of bus_stops of a bus_line might contain the same bus_stop_osm_ids more than once.
@@ -356,28 +376,45 @@ class LookAheadHandler(object):
             bus_line_id=bus_line_id,
             timetables_starting_datetime=timetables_starting_datetime,
             timetables_ending_datetime=timetables_ending_datetime,
-            route_generator_response=timetable_generator.route_generator_response
+            route_generator_response=timetable_generator.route_generator_response,
+            route_generator_responses=timetable_generator.route_generator_responses
         )
 
-        current_average_waiting_time_of_timetables = float('Inf')
-
-        while True:
-            new_timetables = generate_new_timetables_based_on_travel_requests(
-                current_timetables=timetable_generator.timetables,
-                travel_requests=timetable_generator.travel_requests
+        # The clustering of the travel_requests is performed on a columnar representation of the timetables,
+        # which is converted back to timetable_documents only once, before being stored at the System Database.
+        #
+        # Depending on look_ahead_timetables_generation_engine, the initial timetables are either repeatedly
+        # regenerated (steps 6-11), or replaced by the optimal clustering of the travel_requests.
+        #
+        initial_timetable_arrays = TimetableArrays(
+            timetables=timetable_generator.timetables,
+            travel_requests=timetable_generator.travel_requests
+        )
+        if look_ahead_timetables_generation_engine == 'optimal':
+            timetable_arrays, objective = generate_timetable_arrays_with_optimal_clustering(
+                initial_timetable_arrays=initial_timetable_arrays
             )
-            new_average_waiting_time_of_timetables = calculate_average_waiting_time_of_timetables_in_seconds(
-                timetables=new_timetables
+            log(module_name='look_ahead_handler', log_type='DEBUG',
+                log_message='generate_timetable_arrays_with_optimal_clustering: ok - objective: ' + str(objective))
+        else:
+            timetable_arrays = generate_timetable_arrays_iteratively(
+                initial_timetable_arrays=initial_timetable_arrays
             )
-            if new_average_waiting_time_of_timetables < current_average_waiting_time_of_timetables:
-                timetable_generator.timetables = new_timetables
-                current_average_waiting_time_of_timetables = new_average_waiting_time_of_timetables
-                print_timetables(timetables=timetable_generator.timetables)
-            else:
-                break
 
+        timetable_generator.timetables = timetable_arrays.get_timetable_documents()
         print_timetables(timetables=timetable_generator.timetables)
 
+        # The timetable_ids of the generated timetables are reserved in a single request to the System Database,
+        # so as concurrent Look Ahead processes not to allocate duplicate timetable_ids.
+        #
+        first_timetable_id = self.mongodb_database_connection.reserve_identifiers(
+            collection='timetable',
+            number_of_identifiers=len(timetable_generator.timetables)
+        )
+        adjust_timetable_ids(
+            timetables=timetable_generator.timetables,
+            maximum_timetable_id_in_database=first_timetable_id - 1
+        )
         self.mongodb_database_connection.delete_timetable_documents(
             bus_line_id=bus_line.get('bus_line_id')
         )
@@ -388,7 +425,8 @@ class LookAheadHandler(object):
             log_message='insert_timetable_documents (mongodb_database): ok')
 
     def generate_timetables_for_bus_lines(self, timetables_starting_datetime, timetables_ending_datetime,
-                                          requests_min_departure_datetime, requests_max_departure_datetime):
+                                          requests_min_departure_datetime, requests_max_departure_datetime,
+                                          number_of_workers=look_ahead_number_of_workers):
         """
         Generate timetables for all bus_lines, for a selected datetime period,
         evaluating travel_requests of a specific datetime period.
@@ -397,25 +435,228 @@ class LookAheadHandler(object):
         :param timetables_ending_datetime: datetime
         :param requests_min_departure_datetime: datetime
         :param requests_max_departure_datetime: datetime
-        :return: None
+        :param number_of_workers: int (1 for sequential processing, None for one per CPU core)
+        :return: elapsed_times_of_bus_lines: {bus_line_id -> elapsed_time (in seconds)}
         """
         bus_lines = self.mongodb_database_connection.find_bus_line_documents()
+        list_of_keyword_arguments = [
+            {'bus_line': bus_line,
+             'timetables_starting_datetime': timetables_starting_datetime,
+             'timetables_ending_datetime': timetables_ending_datetime,
+             'requests_min_departure_datetime': requests_min_departure_datetime,
+             'requests_max_departure_datetime': requests_max_departure_datetime}
+            for bus_line in bus_lines
+        ]
+        elapsed_times_of_bus_lines = self.process_bus_lines(
+            operation='generate_timetables_for_bus_line',
+            list_of_keyword_arguments=list_of_keyword_arguments,
+            number_of_workers=number_of_workers
+        )
+        log(module_name='look_ahead_handler', log_type='DEBUG',
+            log_message='generate_timetables_for_bus_lines: ok - elapsed_times_of_bus_lines: ' +
+                        str(elapsed_times_of_bus_lines))
+        return elapsed_times_of_bus_lines
+
+    def get_bus_line_segment_index(self):
+        """
+        Get the BusLineSegmentIndex of the stored bus_lines, which is rebuilt only if bus_lines have been
+        inserted or deleted since the latest call.
+
+        :return: bus_line_segment_index: BusLineSegmentIndex
+        """
+        bus_line_documents = self.mongodb_database_connection.find_bus_line_documents(
+            projection={'bus_line_id': 1, 'bus_stops._id': 1}
+        )
+        bus_line_ids = set(bus_line_document.get('bus_line_id') for bus_line_document in bus_line_documents)
 
-        for bus_line in bus_lines:
-            self.generate_timetables_for_bus_line(
-                bus_line=bus_line,
-                timetables_starting_datetime=timetables_starting_datetime,
-                timetables_ending_datetime=timetables_ending_datetime,
-                requests_min_departure_datetime=requests_min_departure_datetime,
-                requests_max_departure_datetime=requests_max_departure_datetime
+        if self.bus_line_segment_index is None or self.bus_line_segment_index.bus_line_ids != bus_line_ids:
+            bus_stop_waypoints_documents = self.mongodb_database_connection.find_bus_stop_waypoints_documents(
+                projection={'starting_bus_stop._id': 1, 'ending_bus_stop._id': 1, 'waypoints': 1}
+            )
+            self.bus_line_segment_index = BusLineSegmentIndex(
+                bus_line_documents=bus_line_documents,
+                bus_stop_waypoints_documents=bus_stop_waypoints_documents
             )
 
-    def update_timetables_of_bus_line(self, bus_line=None, bus_line_id=None):
+        return self.bus_line_segment_index
+
+    def get_route_generator_response_of_segments(self, bus_stops, timetable, segment_indexes,
+                                                 intermediate_responses=None,
+                                                 routing_interval=look_ahead_time_dependent_routing_interval):
+        """
+        Get a route_generator_response for the bus_stops of a bus_line, where only the routes of the provided
+        segments are recalculated, while the rest of them are the stored routes of the timetable.
+
+        The route of each recalculated segment is identified in time-dependent mode, departing at the start
+        of the routing_interval which includes the departure_datetime of the corresponding timetable_entry.
+        The intermediate_responses are shared between the timetables of the bus_line, so as each route
+        to be requested once per segment and routing_interval, instead of once per timetable.
+        If the routing_interval is 0, then a single route is requested per segment, based on the current
+        traffic_density.
+
+        :param bus_stops: [bus_stop_document]
+        :param timetable: timetable_document (including the routes of the timetable_entries)
+        :param segment_indexes: set([int])
+        :param intermediate_responses: {(segment_index, departure_datetime) -> intermediate_response}
+        :param routing_interval: int (seconds)
+        :return: route_generator_response: get_route_between_multiple_bus_stops
+                 (None if the stored routes do not correspond to the bus_stops)
+        """
+        timetable_entries = timetable.get('timetable_entries')
+
+        if len(timetable_entries) != len(bus_stops) - 1:
+            return None
+
+        if intermediate_responses is None:
+            intermediate_responses = {}
+
+        route_generator_response = []
+
+        for i in range(0, len(bus_stops) - 1):
+            timetable_entry = timetable_entries[i]
+
+            if i in segment_indexes or timetable_entry.get('route') is None:
+                if routing_interval > 0:
+                    departure_seconds = datetime_to_seconds(
+                        provided_datetime=timetable_entry.get('departure_datetime')
+                    )
+                    departure_datetime = seconds_to_datetime(
+                        seconds=departure_seconds - departure_seconds % routing_interval
+                    )
+                else:
+                    departure_datetime = None
+
+                key = (i, departure_datetime)
+
+                if key not in intermediate_responses:
+                    intermediate_responses[key] = get_route_between_two_bus_stops(
+                        starting_bus_stop=bus_stops[i],
+                        ending_bus_stop=bus_stops[i + 1],
+                        departure_datetime=departure_datetime
+                    )
+
+                intermediate_response = intermediate_responses.get(key)
+            else:
+                intermediate_response = {
+                    'starting_bus_stop': bus_stops[i],
+                    'ending_bus_stop': bus_stops[i + 1],
+                    'route': timetable_entry.get('route')
+                }
+            route_generator_response.append(intermediate_response)
+
+        return route_generator_response
+
+    def get_segments_with_changed_traffic_density(self, edge_object_ids=None,
+                                                  threshold=look_ahead_traffic_density_change_threshold):
+        """
+        Get the segments of the bus_lines, which include edges whose traffic_density has changed more than
+        the threshold since the latest update of the timetables.
+
+        :param edge_object_ids: [ObjectId] (If None, then all the edges of the bus_lines are examined)
+        :param threshold: float
+        :return: segments_of_bus_lines: {bus_line_id -> set([segment_index])}
+        """
+        bus_line_segment_index = self.get_bus_line_segment_index()
+
+        if edge_object_ids is None:
+            edge_object_ids = bus_line_segment_index.get_edge_object_ids()
+
+        if len(edge_object_ids) == 0:
+            return {}
+
+        edge_documents = self.mongodb_database_connection.find_edge_documents(
+            object_ids=edge_object_ids,
+            projection={'traffic_density': 1}
+        )
+        changed_edge_object_ids = []
+
+        for edge_document in edge_documents:
+            edge_object_id = edge_document.get('_id')
+            traffic_density = edge_document.get('traffic_density') or 0.0
+
+            if abs(traffic_density - self.traffic_densities.get(edge_object_id, 0.0)) > threshold:
+                changed_edge_object_ids.append(edge_object_id)
+                self.traffic_densities[edge_object_id] = traffic_density
+
+        segments_of_bus_lines = bus_line_segment_index.get_segments_of_edges(edge_object_ids=changed_edge_object_ids)
+        return segments_of_bus_lines
+
+    def handle_updated_edges(self, edge_object_ids_queue,
+                             max_operation_timeout=look_ahead_timetables_updater_max_operation_timeout):
+        """
+        Update the timetables of the bus_lines, which include edges whose traffic_density has been updated,
+        as soon as the object_ids of the edges are published to edge_object_ids_queue.
+
+        :param edge_object_ids_queue: multiprocessing.Queue
+        :param max_operation_timeout: int (seconds)
+        :return: None
+        """
+        initial_time = time.time()
+
+        while time.time() - initial_time < max_operation_timeout:
+            try:
+                edge_object_ids = set(edge_object_ids_queue.get(timeout=look_ahead_timetables_updater_event_timeout))
+            except Empty:
+                continue
+
+            # The edge_object_ids which have been published in the meantime are handled together,
+            # so as the timetables of each bus_line to be updated once.
+            while True:
+                try:
+                    edge_object_ids.update(edge_object_ids_queue.get_nowait())
+                except Empty:
+                    break
+
+            self.update_timetables_of_bus_lines_including_edges(edge_object_ids=list(edge_object_ids))
+
+    def process_bus_lines(self, operation, list_of_keyword_arguments, number_of_workers=look_ahead_number_of_workers):
+        """
+        Apply an operation of the LookAheadHandler to a number of bus_lines, either sequentially
+        or in parallel, by a pool of worker processes, each one with its own LookAheadHandler.
+
+        The bus_lines are independent of each other, and the identifiers of the generated timetables
+        are reserved atomically at the System Database, so the workers receive disjoint ranges.
+
+        :param operation: string ('generate_timetables_for_bus_line' or 'update_timetables_of_bus_line')
+        :param list_of_keyword_arguments: [{'bus_line' or 'bus_line_id', ...}]
+        :param number_of_workers: int (1 for sequential processing, None for one per CPU core)
+        :return: elapsed_times_of_bus_lines: {bus_line_id -> elapsed_time (in seconds)}
+        """
+        if number_of_workers == 1 or len(list_of_keyword_arguments) < 2:
+            results = [
+                process_bus_line(look_ahead_handler=self, operation=operation, keyword_arguments=keyword_arguments)
+                for keyword_arguments in list_of_keyword_arguments
+            ]
+        else:
+            pool = Pool(processes=number_of_workers, initializer=initialize_look_ahead_handler_of_worker)
+
+            try:
+                results = pool.map(
+                    process_bus_line_in_worker,
+                    [(operation, keyword_arguments) for keyword_arguments in list_of_keyword_arguments],
+                    chunksize=1
+                )
+            finally:
+                pool.close()
+                pool.join()
+
+        elapsed_times_of_bus_lines = dict(results)
+        return elapsed_times_of_bus_lines
+
+    def update_timetables_of_bus_line(self, bus_line=None, bus_line_id=None, segment_indexes=None):
         """
         Update the timetables of a bus_line, taking into consideration the current levels of traffic_density.
 
+        If segment_indexes are provided, then only the routes of the corresponding segments are recalculated.
+        Otherwise, the routes of all the segments are recalculated. Unless the
+        look_ahead_time_dependent_routing_interval is 0, the routes are time-dependent and each one of them
+        is requested once per segment and routing interval, using get_route_generator_response_of_segments.
+        So, the number of requests to the Route Generator is O(segments x routing intervals),
+        independently of the number of timetables.
+
         :param bus_line: bus_line_document
         :param bus_line_id: int
+        :param segment_indexes: set([int])
         :return: None
         """
         if bus_line is None and bus_line_id is None:
@@ -426,17 +667,54 @@ class LookAheadHandler(object):
             bus_line_id = bus_line.get('bus_line_id')
 
         bus_stops = bus_line.get('bus_stops')
-        timetables = self.mongodb_database_connection.find_timetable_documents(bus_line_ids=[bus_line_id])
+
+        if segment_indexes is None:
+            # The routes of the timetable_entries are not retrieved, since they are replaced
+            # by the ones of the route_generator_response.
+            timetables = self.mongodb_database_connection.find_timetable_documents(
+                bus_line_ids=[bus_line_id],
+                projection=timetable_waiting_time_projection
+            )
+        else:
+            # The stored routes of each timetable are retrieved, since they are kept for the segments
+            # whose traffic_density has not changed.
+            timetables = self.mongodb_database_connection.find_timetable_documents(
+                bus_line_ids=[bus_line_id]
+            )
+
         travel_requests = get_travel_requests_of_timetables(timetables=timetables)
+        route_generator_responses_of_timetables = None
+
+        if segment_indexes is None and look_ahead_time_dependent_routing_interval > 0:
+            segment_indexes_of_routes = set(range(0, len(bus_stops) - 1))
+        else:
+            segment_indexes_of_routes = segment_indexes
+
+        if segment_indexes_of_routes is not None and len(timetables) > 0:
+            intermediate_responses = {}
+            route_generator_responses_of_timetables = [
+                self.get_route_generator_response_of_segments(
+                    bus_stops=bus_stops,
+                    timetable=timetable,
+                    segment_indexes=segment_indexes_of_routes,
+                    intermediate_responses=intermediate_responses,
+                    routing_interval=look_ahead_time_dependent_routing_interval
+                )
+                for timetable in timetables
+            ]
+            if None in route_generator_responses_of_timetables:
+                route_generator_responses_of_timetables = None
 
         timetable_updater = TimetableUpdater(
             bus_stops=bus_stops,
             timetables=timetables,
-            travel_requests=travel_requests
+            travel_requests=travel_requests,
+            route_generator_responses_of_timetables=route_generator_responses_of_timetables
         )
         update_entries_of_timetables(
             timetables=timetable_updater.timetables,
-            route_generator_response=timetable_updater.route_generator_response
+            route_generator_response=timetable_updater.route_generator_response,
+            route_generator_responses_of_timetables=timetable_updater.route_generator_responses_of_timetables
         )
         current_average_waiting_time_of_timetables = calculate_average_waiting_time_of_timetables_in_seconds(
             timetables=timetable_updater.timetables
@@ -460,6 +738,18 @@ class LookAheadHandler(object):
 
         print_timetables(timetables=timetable_updater.timetables)
 
+        # The timetable_ids of the updated timetables are reserved in a single request to the System Database,
+        # as in generate_timetables_for_bus_line, so as concurrent Look Ahead processes not to allocate
+        # duplicate timetable_ids.
+        #
+        first_timetable_id = self.mongodb_database_connection.reserve_identifiers(
+            collection='timetable',
+            number_of_identifiers=len(timetable_updater.timetables)
+        )
+        adjust_timetable_ids(
+            timetables=timetable_updater.timetables,
+            maximum_timetable_id_in_database=first_timetable_id - 1
+        )
         self.mongodb_database_connection.delete_timetable_documents(
             bus_line_id=bus_line.get('bus_line_id')
         )
@@ -469,16 +759,95 @@ class LookAheadHandler(object):
         log(module_name='look_ahead_handler', log_type='DEBUG',
             log_message='update_timetable_documents (mongodb_database): ok')
 
-    def update_timetables_of_bus_lines(self):
+    def update_timetables_of_bus_lines(self, number_of_workers=look_ahead_number_of_workers):
         """
-        Update the timetables of all bus_lines, taking into consideration the current levels of traffic_density.
+        Update the timetables of the bus_lines, taking into consideration the current levels of traffic_density.
 
-        :return: None
+        Only the segments of the bus_lines, which include edges whose traffic_density has changed
+        more than look_ahead_traffic_density_change_threshold since the latest update, are recalculated.
+
+        :param number_of_workers: int (1 for sequential processing, None for one per CPU core)
+        :return: elapsed_times_of_bus_lines: {bus_line_id -> elapsed_time (in seconds)}
         """
-        bus_lines = self.mongodb_database_connection.find_bus_line_documents()
+        segments_of_bus_lines = self.get_segments_with_changed_traffic_density()
+        list_of_keyword_arguments = [
+            {'bus_line_id': bus_line_id, 'segment_indexes': segment_indexes}
+            for bus_line_id, segment_indexes in segments_of_bus_lines.iteritems()
+        ]
+        elapsed_times_of_bus_lines = self.process_bus_lines(
+            operation='update_timetables_of_bus_line',
+            list_of_keyword_arguments=list_of_keyword_arguments,
+            number_of_workers=number_of_workers
+        )
+        log(module_name='look_ahead_handler', log_type='DEBUG',
+            log_message='update_timetables_of_bus_lines: ok - elapsed_times_of_bus_lines: ' +
+                        str(elapsed_times_of_bus_lines))
+        return elapsed_times_of_bus_lines
+
+    def update_timetables_of_bus_lines_including_edges(self, edge_object_ids,
+                                                       number_of_workers=look_ahead_number_of_workers):
+        """
+        Update the timetables of the bus_lines, which include at least one of the provided edges.
+
+        Only the segments of the bus_lines, which include edges whose traffic_density has changed
+        more than look_ahead_traffic_density_change_threshold since the latest update, are recalculated.
+
+        :param edge_object_ids: [ObjectId]
+        :param number_of_workers: int (1 for sequential processing, None for one per CPU core)
+        :return: elapsed_times_of_bus_lines: {bus_line_id -> elapsed_time (in seconds)}
+        """
+        segments_of_bus_lines = self.get_segments_with_changed_traffic_density(edge_object_ids=edge_object_ids)
+        list_of_keyword_arguments = [
+            {'bus_line_id': bus_line_id, 'segment_indexes': segment_indexes}
+            for bus_line_id, segment_indexes in segments_of_bus_lines.iteritems()
+        ]
+        elapsed_times_of_bus_lines = self.process_bus_lines(
+            operation='update_timetables_of_bus_line',
+            list_of_keyword_arguments=list_of_keyword_arguments,
+            number_of_workers=number_of_workers
+        )
+        log(module_name='look_ahead_handler', log_type='DEBUG',
+            log_message='update_timetables_of_bus_lines_including_edges: ok - elapsed_times_of_bus_lines: ' +
+                        str(elapsed_times_of_bus_lines))
+        return elapsed_times_of_bus_lines
+
+
+# The LookAheadHandler of each worker process of process_bus_lines, with its own connection to the System Database.
+look_ahead_handler_of_worker = None
 
-        for bus_line in bus_lines:
-            self.update_timetables_of_bus_line(bus_line=bus_line)
+
+def generate_new_timetable_arrays_based_on_travel_requests(current_timetable_arrays):
+    """
+    This function is the equivalent of generate_new_timetables_based_on_travel_requests for TimetableArrays.
+    The timetables and the assignment of the travel_requests of new_timetable_arrays are based on the ones of
+    current_timetable_arrays. Then, steps 6-11 of the algorithm are applied. In step 6, only the travel_requests
+    which could be affected by the timetables modified since the previous iteration are corresponded again.
+
+    :param current_timetable_arrays: TimetableArrays
+    :return: new_timetable_arrays: TimetableArrays
+    """
+    new_timetable_arrays = current_timetable_arrays.copy()
+
+    # 6: (Initial Clustering)
+    new_timetable_arrays.correspond_travel_requests_to_modified_timetables()
+
+    # 7: (Handling of Undercrowded Timetables)
+    travel_request_indexes_of_undercrowded_timetables = new_timetable_arrays.handle_undercrowded_timetables()
+    new_timetable_arrays.correspond_travel_requests_to_timetables(
+        travel_request_indexes=travel_request_indexes_of_undercrowded_timetables
+    )
+
+    # 8: (Handling of Overcrowded Timetables)
+    new_timetable_arrays.handle_overcrowded_timetables()
+
+    # 9: (Adjust Departure Datetimes)
+    new_timetable_arrays.adjust_departure_datetimes()
+
+    # 11: (Average Waiting Time)
+    new_timetable_arrays.handle_timetables_with_average_waiting_time_above_threshold()
+    new_timetable_arrays.adjust_departure_datetimes()
+
+    return new_timetable_arrays
 
 
 def generate_new_timetables_based_on_travel_requests(current_timetables, travel_requests):
@@ -575,6 +944,33 @@ def generate_new_timetables_based_on_travel_requests(current_timetables, travel_
     return new_timetables
 
 
+def generate_timetable_arrays_iteratively(initial_timetable_arrays):
+    """
+    Regenerate the timetables of initial_timetable_arrays, based on their travel_requests,
+    as long as the average waiting time of the passengers is reduced. The assignment of the travel_requests
+    is kept across iterations, so as each iteration to re-evaluate only the ones affected by modified timetables.
+
+    :param initial_timetable_arrays: TimetableArrays
+    :return: timetable_arrays: TimetableArrays
+    """
+    timetable_arrays = initial_timetable_arrays
+    current_average_waiting_time_of_timetables = float('Inf')
+
+    while True:
+        new_timetable_arrays = generate_new_timetable_arrays_based_on_travel_requests(
+            current_timetable_arrays=timetable_arrays
+        )
+        new_average_waiting_time_of_timetables = new_timetable_arrays.calculate_average_waiting_time()
+
+        if new_average_waiting_time_of_timetables < current_average_waiting_time_of_timetables:
+            timetable_arrays = new_timetable_arrays
+            current_average_waiting_time_of_timetables = new_average_waiting_time_of_timetables
+        else:
+            break
+
+    return timetable_arrays
+
+
 def get_travel_requests_of_timetables(timetables):
     """
     Retrieve a list containing all the travel_request_documents,
@@ -590,3 +986,50 @@ def get_travel_requests_of_timetables(timetables):
         travel_requests.extend(travel_requests_of_timetable)
 
     return travel_requests
+
+
+def initialize_look_ahead_handler_of_worker():
+    """
+    Initialize the LookAheadHandler of a worker process, after the process has been started,
+    so as each worker to use its own connection to the System Database.
+
+    :return: None
+    """
+    global look_ahead_handler_of_worker
+    look_ahead_handler_of_worker = LookAheadHandler()
+
+
+def process_bus_line(look_ahead_handler, operation, keyword_arguments):
+    """
+    Apply an operation of a LookAheadHandler to a bus_line, and measure its elapsed_time.
+
+    :param look_ahead_handler: LookAheadHandler
+    :param operation: string ('generate_timetables_for_bus_line' or 'update_timetables_of_bus_line')
+    :param keyword_arguments: {'bus_line' or 'bus_line_id', ...}
+    :return: (bus_line_id, elapsed_time): (int, float)
+    """
+    start_time = time.time()
+    getattr(look_ahead_handler, operation)(**keyword_arguments)
+    elapsed_time = time.time() - start_time
+
+    if keyword_arguments.get('bus_line') is not None:
+        bus_line_id = keyword_arguments.get('bus_line').get('bus_line_id')
+    else:
+        bus_line_id = keyword_arguments.get('bus_line_id')
+
+    return bus_line_id, elapsed_time
+
+
+def process_bus_line_in_worker(arguments):
+    """
+    Apply an operation to a bus_line, using the LookAheadHandler of the current worker process.
+
+    :param arguments: (operation, keyword_arguments)
+    :return: (bus_line_id, elapsed_time): (int, float)
+    """
+    operation, keyword_arguments = arguments
+    return process_bus_line(
+        look_ahead_handler=look_ahead_handler_of_worker,
+        operation=operation,
+        keyword_arguments=keyword_arguments
+    )
@@ -0,0 +1,837 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+"""
+- LICENCE
+
+The MIT License (MIT)
+
+Copyright (c) 2016 Eleftherios Anagnostopoulos for Ericsson AB (EU FP7 CityPulse Project)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+
+- DESCRIPTION OF DOCUMENTS
+
+-- MongoDB Database Documents:
+
+address_document: {
+    '_id', 'name', 'node_id', 'point': {'longitude', 'latitude'}
+}
+bus_line_document: {
+    '_id', 'bus_line_id', 'bus_stops': [{'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}]
+}
+bus_stop_document: {
+    '_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}
+}
+bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_object_id]]
+}
+bus_vehicle_document: {
+    '_id', 'bus_vehicle_id', 'maximum_capacity',
+    'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
+}
+counter_document: {
+    '_id', 'sequence_value'
+}
+detailed_bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_document]]
+}
+edge_document: {
+    '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'max_speed', 'road_type', 'way_id', 'traffic_density'
+}
+node_document: {
+    '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
+}
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
+point_document: {
+    '_id', 'osm_id', 'point': {'longitude', 'latitude'}
+}
+timetable_document: {
+    '_id', 'timetable_id', 'bus_line_id', 'bus_vehicle_id',
+    'timetable_entries': [{
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime', 'number_of_onboarding_passengers',
+        'number_of_deboarding_passengers', 'number_of_current_passengers',
+        'route': {
+            'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+            'distances_from_starting_node', 'times_from_starting_node',
+            'distances_from_previous_node', 'times_from_previous_node'
+        }
+    }],
+    'travel_requests': [{
+        '_id', 'client_id', 'bus_line_id',
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime',
+        'starting_timetable_entry_index', 'ending_timetable_entry_index'
+    }]
+}
+traffic_event_document: {
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
+}
+travel_request_document: {
+    '_id', 'client_id', 'bus_line_id',
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'departure_datetime', 'arrival_datetime',
+    'starting_timetable_entry_index', 'ending_timetable_entry_index'
+}
+way_document: {
+    '_id', 'osm_id', 'tags', 'references'
+}
+
+-- Route Generator Responses:
+
+get_route_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}
+get_route_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}]
+get_waypoints_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}
+get_waypoints_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}]
+"""
+import numpy as np
+from src.common.parameters import maximum_bus_capacity, average_waiting_time_threshold, \
+    minimum_number_of_passengers_in_timetable
+from src.look_ahead.timetable_generator import calculate_numbers_of_passengers, datetime_to_seconds, \
+    get_positions_of_nearest_departure_seconds, seconds_to_datetime, split_departure_seconds_in_two_clusters
+
+__author__ = 'Eleftherios Anagnostopoulos'
+__email__ = 'eanagnostopoulos@hotmail.com'
+__credits__ = [
+    'Azadeh Bararsani (Senior Researcher at Ericsson AB) - email: azadeh.bararsani@ericsson.com'
+    'Aneta Vulgarakis Feljan (Senior Researcher at Ericsson AB) - email: aneta.vulgarakis@ericsson.com'
+]
+
+
+class TimetableArrays(object):
+    """
+    A columnar representation of the timetables of a bus_line and of their travel_requests,
+    which is used by the timetable generation algorithm instead of nested timetable_documents.
+
+    Each timetable is a row of the [timetables x timetable_entries] matrices departure_seconds
+    (departure datetimes, in seconds since the epoch) and total_times (travelling times of the routes,
+    in seconds). The bus_stops and the routes of each row are provided by the timetable_entries of one
+    of the initial timetable_documents (route_indexes). Each travel_request is an item of the arrays
+    starting_timetable_entry_indexes, ending_timetable_entry_indexes, departure_seconds_of_travel_requests,
+    and timetable_indexes_of_travel_requests (-1 for travel_requests which are not assigned to a timetable).
+
+    The timetables whose departure datetimes or travel_requests have been changed, since the travel_requests
+    were last corresponded to the timetables, are marked in modified_timetables, so as only the travel_requests
+    which could be affected to be corresponded again.
+    """
+
+    def __init__(self, timetables, travel_requests):
+        """
+        Initialize the TimetableArrays, converting the timetable_documents and the travel_request_documents.
+        The travel_requests of the timetables are not taken into consideration.
+
+        :param timetables: [timetable_document]
+        :param travel_requests: [travel_request_document] (with starting and ending timetable_entry_indexes)
+        :return: None
+        """
+        number_of_timetables = len(timetables)
+        number_of_timetable_entries = len(timetables[0].get('timetable_entries')) if number_of_timetables > 0 else 0
+
+        self.bus_line_id = timetables[0].get('bus_line_id') if number_of_timetables > 0 else None
+        self.entry_templates = [timetable.get('timetable_entries') for timetable in timetables]
+        self.route_indexes = np.arange(number_of_timetables, dtype=np.int64)
+        self.departure_seconds = np.array([
+            [datetime_to_seconds(provided_datetime=timetable_entry.get('departure_datetime'))
+             for timetable_entry in timetable.get('timetable_entries')]
+            for timetable in timetables
+        ], dtype=np.int64).reshape(number_of_timetables, number_of_timetable_entries)
+        self.total_times = np.rint(np.array([
+            [timetable_entry.get('route').get('total_time') for timetable_entry in timetable.get('timetable_entries')]
+            for timetable in timetables
+        ], dtype=float)).astype(np.int64).reshape(number_of_timetables, number_of_timetable_entries)
+
+        self.travel_requests = list(travel_requests)
+        self.starting_timetable_entry_indexes = np.array(
+            [travel_request.get('starting_timetable_entry_index') for travel_request in self.travel_requests],
+            dtype=np.int64
+        )
+        self.ending_timetable_entry_indexes = np.array(
+            [travel_request.get('ending_timetable_entry_index') for travel_request in self.travel_requests],
+            dtype=np.int64
+        )
+        self.departure_seconds_of_travel_requests = np.array(
+            [datetime_to_seconds(provided_datetime=travel_request.get('departure_datetime'))
+             for travel_request in self.travel_requests],
+            dtype=np.int64
+        )
+        self.timetable_indexes_of_travel_requests = np.full(len(self.travel_requests), -1, dtype=np.int64)
+        self.modified_timetables = np.ones(number_of_timetables, dtype=bool)
+
+    def add_timetable(self, timetable_index):
+        """
+        Add a timetable without travel_requests, copying the departure datetimes and the route of an existing one.
+
+        :param timetable_index: int
+        :return: new_timetable_index: int
+        """
+        new_timetable_index = len(self.departure_seconds)
+        self.departure_seconds = np.vstack([self.departure_seconds, self.departure_seconds[timetable_index]])
+        self.total_times = np.vstack([self.total_times, self.total_times[timetable_index]])
+        self.route_indexes = np.append(self.route_indexes, self.route_indexes[timetable_index])
+        self.modified_timetables = np.append(self.modified_timetables, True)
+        return new_timetable_index
+
+    def adjust_departure_datetimes(self, timetable_indexes=None):
+        """
+        Adjust the departure datetimes of timetables, taking into consideration the departure datetimes
+        of their travel_requests.
+
+        The ideal departure datetime of a travel_request from the first bus_stop is its departure_datetime,
+        reduced by the travelling time from the first bus_stop to its starting bus_stop. The departure datetime
+        of each timetable from the first bus_stop is the mean value of its current one and of the ideal departure
+        datetimes of its travel_requests, and the following ones are based on the travelling times of the route.
+
+        :param timetable_indexes: [int] (None for all the timetables)
+        :return: None (Updates departure_seconds)
+        """
+        number_of_timetables = len(self.departure_seconds)
+
+        if timetable_indexes is None:
+            timetable_indexes = np.arange(number_of_timetables)
+
+        if number_of_timetables == 0 or len(timetable_indexes) == 0:
+            return
+
+        departure_offsets = self.get_departure_offsets()
+        assigned = self.timetable_indexes_of_travel_requests >= 0
+        timetable_indexes_of_travel_requests = self.timetable_indexes_of_travel_requests[assigned]
+
+        # The differences are calculated from the current departure datetimes, so as to avoid large sums.
+        differences = (
+            self.departure_seconds_of_travel_requests[assigned] -
+            departure_offsets[timetable_indexes_of_travel_requests, self.starting_timetable_entry_indexes[assigned]] -
+            self.departure_seconds[timetable_indexes_of_travel_requests, 0]
+        )
+        sums_of_differences = np.bincount(
+            timetable_indexes_of_travel_requests, weights=differences, minlength=number_of_timetables
+        )
+        numbers_of_samples = np.bincount(timetable_indexes_of_travel_requests, minlength=number_of_timetables) + 1
+        first_departure_seconds = self.departure_seconds[:, 0] + np.floor(
+            sums_of_differences / numbers_of_samples
+        ).astype(np.int64)
+
+        adjusted_departure_seconds = (
+            first_departure_seconds[timetable_indexes][:, np.newaxis] + departure_offsets[timetable_indexes]
+        )
+        changed = (adjusted_departure_seconds != self.departure_seconds[timetable_indexes]).any(axis=1)
+        self.modified_timetables[np.asarray(timetable_indexes)[changed]] = True
+        self.departure_seconds[timetable_indexes] = adjusted_departure_seconds
+
+    def adjust_departure_datetimes_of_timetable(self, timetable_index, travel_request_indexes):
+        """
+        Adjust the departure datetimes of a timetable, as adjust_departure_datetimes does,
+        taking into consideration only the provided travel_requests of the timetable.
+
+        :param timetable_index: int
+        :param travel_request_indexes: np.ndarray (The travel_requests of the timetable)
+        :return: None (Updates departure_seconds)
+        """
+        departure_offsets = np.zeros(self.total_times.shape[1], dtype=np.int64)
+        departure_offsets[1:] = np.cumsum(self.total_times[timetable_index, :-1])
+
+        differences = (
+            self.departure_seconds_of_travel_requests[travel_request_indexes] -
+            departure_offsets[self.starting_timetable_entry_indexes[travel_request_indexes]] -
+            self.departure_seconds[timetable_index, 0]
+        )
+        first_departure_seconds = self.departure_seconds[timetable_index, 0] + int(
+            np.floor(float(differences.sum()) / (len(travel_request_indexes) + 1))
+        )
+        adjusted_departure_seconds = first_departure_seconds + departure_offsets
+
+        if (adjusted_departure_seconds != self.departure_seconds[timetable_index]).any():
+            self.modified_timetables[timetable_index] = True
+            self.departure_seconds[timetable_index] = adjusted_departure_seconds
+
+    def calculate_average_waiting_time(self):
+        """
+        Calculate the average value of the average waiting times of the timetables.
+
+        :return: average_waiting_time_in_seconds: float (-1 if there are no timetables)
+        """
+        if len(self.departure_seconds) == 0:
+            return -1
+
+        average_waiting_time_in_seconds = float(np.mean(self.calculate_average_waiting_times()))
+        return average_waiting_time_in_seconds
+
+    def calculate_average_waiting_time_of_timetable(self, timetable_index, travel_request_indexes=None):
+        """
+        Calculate the average waiting time of the travel_requests of a timetable.
+
+        :param timetable_index: int
+        :param travel_request_indexes: np.ndarray (The travel_requests of the timetable, None to look them up)
+        :return: average_waiting_time_in_seconds: float (0 if there are no travel_requests)
+        """
+        if travel_request_indexes is None:
+            travel_request_indexes = np.flatnonzero(self.timetable_indexes_of_travel_requests == timetable_index)
+
+        if len(travel_request_indexes) == 0:
+            return 0.0
+
+        average_waiting_time_in_seconds = float(np.mean(np.abs(
+            self.departure_seconds[timetable_index, self.starting_timetable_entry_indexes[travel_request_indexes]] -
+            self.departure_seconds_of_travel_requests[travel_request_indexes]
+        )))
+        return average_waiting_time_in_seconds
+
+    def calculate_average_waiting_times(self):
+        """
+        Calculate the average waiting time of the travel_requests of each timetable.
+
+        :return: average_waiting_times: np.ndarray (0 for timetables without travel_requests)
+        """
+        number_of_timetables = len(self.departure_seconds)
+        assigned = self.timetable_indexes_of_travel_requests >= 0
+        timetable_indexes_of_travel_requests = self.timetable_indexes_of_travel_requests[assigned]
+
+        sums_of_waiting_times = np.bincount(
+            timetable_indexes_of_travel_requests,
+            weights=self.calculate_waiting_times()[assigned],
+            minlength=number_of_timetables
+        )
+        numbers_of_travel_requests = np.bincount(timetable_indexes_of_travel_requests, minlength=number_of_timetables)
+        average_waiting_times = sums_of_waiting_times / np.maximum(numbers_of_travel_requests, 1)
+        return average_waiting_times
+
+    def calculate_maximum_number_of_current_passengers_of_timetable(self, travel_request_indexes):
+        """
+        Calculate the maximum number of current passengers of a timetable, among its timetable_entries.
+
+        :param travel_request_indexes: np.ndarray (The travel_requests of the timetable)
+        :return: maximum_number_of_current_passengers: int
+        """
+        _, _, numbers_of_current_passengers = calculate_numbers_of_passengers(
+            timetable_indexes=np.zeros(len(travel_request_indexes), dtype=np.int64),
+            starting_timetable_entry_indexes=self.starting_timetable_entry_indexes[travel_request_indexes],
+            ending_timetable_entry_indexes=self.ending_timetable_entry_indexes[travel_request_indexes],
+            number_of_timetables=1,
+            number_of_timetable_entries=self.departure_seconds.shape[1]
+        )
+        maximum_number_of_current_passengers = int(numbers_of_current_passengers.max())
+        return maximum_number_of_current_passengers
+
+    def calculate_number_of_passengers(self, timetable_indexes=None):
+        """
+        Calculate the number of onboarding, deboarding, and current passengers for each timetable_entry,
+        for all the timetables at once.
+
+        :param timetable_indexes: [int] (None for all the timetables)
+        :return: (numbers_of_onboarding_passengers, numbers_of_deboarding_passengers, numbers_of_current_passengers):
+                 (np.ndarray, np.ndarray, np.ndarray) ([timetable_indexes x timetable_entries])
+        """
+        number_of_timetables = len(self.departure_seconds)
+
+        if timetable_indexes is None:
+            timetable_indexes = np.arange(number_of_timetables)
+
+        # The rows of the result correspond to the positions of the timetable_indexes. The additional last item
+        # maps the travel_requests which are not assigned to a timetable (-1) to no position.
+        positions_of_timetables = np.full(number_of_timetables + 1, -1, dtype=np.int64)
+        positions_of_timetables[np.asarray(timetable_indexes, dtype=np.int64)] = np.arange(len(timetable_indexes))
+        positions = positions_of_timetables[self.timetable_indexes_of_travel_requests]
+        selected = positions >= 0
+
+        return calculate_numbers_of_passengers(
+            timetable_indexes=positions[selected],
+            starting_timetable_entry_indexes=self.starting_timetable_entry_indexes[selected],
+            ending_timetable_entry_indexes=self.ending_timetable_entry_indexes[selected],
+            number_of_timetables=len(timetable_indexes),
+            number_of_timetable_entries=self.departure_seconds.shape[1]
+        )
+
+    def calculate_waiting_times(self):
+        """
+        Calculate the waiting time of each travel_request, as the difference between its departure_datetime
+        and the departure datetime of its timetable from its starting bus_stop.
+
+        :return: waiting_times: np.ndarray (0 for travel_requests which are not assigned to a timetable)
+        """
+        waiting_times = np.zeros(len(self.travel_requests), dtype=np.int64)
+        assigned = self.timetable_indexes_of_travel_requests >= 0
+        waiting_times[assigned] = np.abs(
+            self.departure_seconds[
+                self.timetable_indexes_of_travel_requests[assigned], self.starting_timetable_entry_indexes[assigned]
+            ] - self.departure_seconds_of_travel_requests[assigned]
+        )
+        return waiting_times
+
+    def copy(self):
+        """
+        Create a copy of the TimetableArrays, which keeps the assignment of the travel_requests to the timetables.
+
+        :return: timetable_arrays: TimetableArrays
+        """
+        timetable_arrays = self.copy_without_travel_requests()
+        timetable_arrays.timetable_indexes_of_travel_requests = self.timetable_indexes_of_travel_requests.copy()
+        timetable_arrays.modified_timetables = self.modified_timetables.copy()
+        return timetable_arrays
+
+    def copy_without_travel_requests(self):
+        """
+        Create a copy of the TimetableArrays, where none of the travel_requests is assigned to a timetable.
+
+        :return: timetable_arrays: TimetableArrays
+        """
+        timetable_arrays = TimetableArrays(timetables=[], travel_requests=[])
+        timetable_arrays.bus_line_id = self.bus_line_id
+        timetable_arrays.entry_templates = self.entry_templates
+        timetable_arrays.route_indexes = self.route_indexes.copy()
+        timetable_arrays.departure_seconds = self.departure_seconds.copy()
+        timetable_arrays.total_times = self.total_times.copy()
+        timetable_arrays.travel_requests = self.travel_requests
+        timetable_arrays.starting_timetable_entry_indexes = self.starting_timetable_entry_indexes
+        timetable_arrays.ending_timetable_entry_indexes = self.ending_timetable_entry_indexes
+        timetable_arrays.departure_seconds_of_travel_requests = self.departure_seconds_of_travel_requests
+        timetable_arrays.timetable_indexes_of_travel_requests = np.full(len(self.travel_requests), -1, dtype=np.int64)
+        timetable_arrays.modified_timetables = np.ones(len(self.departure_seconds), dtype=bool)
+        return timetable_arrays
+
+    def correspond_travel_requests_to_timetables(self, travel_request_indexes=None):
+        """
+        Correspond each travel_request to the timetable which produces the minimum waiting time for the passenger.
+
+        :param travel_request_indexes: np.ndarray (None for all the travel_requests)
+        :return: None (Updates timetable_indexes_of_travel_requests)
+        """
+        if travel_request_indexes is None:
+            travel_request_indexes = np.arange(len(self.travel_requests))
+
+        if len(self.departure_seconds) == 0 or len(travel_request_indexes) == 0:
+            return
+
+        starting_timetable_entry_indexes = self.starting_timetable_entry_indexes[travel_request_indexes]
+
+        for timetable_entry_index in np.unique(starting_timetable_entry_indexes):
+            corresponding_travel_request_indexes = travel_request_indexes[
+                starting_timetable_entry_indexes == timetable_entry_index
+            ]
+            # A stable sort keeps the order of the timetables with equal departure datetimes.
+            timetable_indexes = np.argsort(self.departure_seconds[:, timetable_entry_index], kind='mergesort')
+            positions = get_positions_of_nearest_departure_seconds(
+                sorted_departure_seconds=self.departure_seconds[timetable_indexes, timetable_entry_index],
+                departure_seconds=self.departure_seconds_of_travel_requests[corresponding_travel_request_indexes]
+            )
+            self.timetable_indexes_of_travel_requests[corresponding_travel_request_indexes] = \
+                timetable_indexes[positions]
+
+    def correspond_travel_requests_to_modified_timetables(self):
+        """
+        Correspond to the timetables only the travel_requests whose timetable with the minimum waiting time
+        could have changed, since the latest correspondence, and clear modified_timetables.
+
+        These are the travel_requests which are not assigned to a timetable, the travel_requests of modified
+        timetables, and the travel_requests for which a modified timetable departs from their starting bus_stop
+        not later or earlier than their current waiting time. The assignment of the rest of them remains
+        the one that correspond_travel_requests_to_timetables would produce.
+
+        :return: number_of_corresponded_travel_requests: int
+        """
+        assigned = self.timetable_indexes_of_travel_requests >= 0
+        affected = ~assigned
+        affected[assigned] = self.modified_timetables[self.timetable_indexes_of_travel_requests[assigned]]
+        modified_timetable_indexes = np.flatnonzero(self.modified_timetables)
+        unaffected_travel_request_indexes = np.flatnonzero(~affected)
+
+        if len(modified_timetable_indexes) > 0 and len(unaffected_travel_request_indexes) > 0:
+            waiting_times = self.calculate_waiting_times()
+            starting_timetable_entry_indexes = self.starting_timetable_entry_indexes[unaffected_travel_request_indexes]
+
+            for timetable_entry_index in np.unique(starting_timetable_entry_indexes):
+                travel_request_indexes = unaffected_travel_request_indexes[
+                    starting_timetable_entry_indexes == timetable_entry_index
+                ]
+                sorted_departure_seconds = np.sort(
+                    self.departure_seconds[modified_timetable_indexes, timetable_entry_index]
+                )
+                departure_seconds = self.departure_seconds_of_travel_requests[travel_request_indexes]
+                positions = get_positions_of_nearest_departure_seconds(
+                    sorted_departure_seconds=sorted_departure_seconds,
+                    departure_seconds=departure_seconds
+                )
+                affected[travel_request_indexes] = (
+                    np.abs(sorted_departure_seconds[positions] - departure_seconds) <=
+                    waiting_times[travel_request_indexes]
+                )
+
+        affected_travel_request_indexes = np.flatnonzero(affected)
+        self.correspond_travel_requests_to_timetables(travel_request_indexes=affected_travel_request_indexes)
+        self.modified_timetables[:] = False
+        return len(affected_travel_request_indexes)
+
+    def divide_timetable(self, timetable_index, travel_request_indexes=None):
+        """
+        Divide a timetable into two timetables, partitioning its travel_requests,
+        and adjust the departure datetimes of both of them.
+
+        The new timetable is always the last one. Only the rows of the two timetables
+        and their travel_requests are processed.
+
+        :param timetable_index: int
+        :param travel_request_indexes: np.ndarray (The travel_requests of the timetable, None to look them up)
+        :return: (new_timetable_index, first_travel_request_indexes, second_travel_request_indexes):
+                 (int, np.ndarray, np.ndarray)
+        """
+        if travel_request_indexes is None:
+            travel_request_indexes = np.flatnonzero(self.timetable_indexes_of_travel_requests == timetable_index)
+
+        first_travel_request_indexes, second_travel_request_indexes = self.partition_travel_requests(
+            travel_request_indexes=travel_request_indexes
+        )
+        new_timetable_index = self.add_timetable(timetable_index=timetable_index)
+        self.timetable_indexes_of_travel_requests[second_travel_request_indexes] = new_timetable_index
+        self.modified_timetables[timetable_index] = True
+        self.adjust_departure_datetimes_of_timetable(
+            timetable_index=timetable_index,
+            travel_request_indexes=first_travel_request_indexes
+        )
+        self.adjust_departure_datetimes_of_timetable(
+            timetable_index=new_timetable_index,
+            travel_request_indexes=second_travel_request_indexes
+        )
+        return new_timetable_index, first_travel_request_indexes, second_travel_request_indexes
+
+    def divide_timetable_based_on_average_waiting_time(self, timetable_index, travel_request_indexes=None):
+        """
+        Divide a timetable, if it has enough travel_requests and if the average waiting times
+        of both new timetables are not higher than the one of the initial timetable.
+
+        :param timetable_index: int
+        :param travel_request_indexes: np.ndarray (The travel_requests of the timetable, None to look them up)
+        :return: (new_timetable_index, first_travel_request_indexes, second_travel_request_indexes):
+                 (int, np.ndarray, np.ndarray) (None if the timetable was not divided)
+        """
+        if travel_request_indexes is None:
+            travel_request_indexes = np.flatnonzero(self.timetable_indexes_of_travel_requests == timetable_index)
+
+        if len(travel_request_indexes) < 2 * minimum_number_of_passengers_in_timetable:
+            return None
+
+        initial_departure_seconds = self.departure_seconds[timetable_index].copy()
+        initially_modified = self.modified_timetables[timetable_index]
+        initial_average_waiting_time = self.calculate_average_waiting_time_of_timetable(
+            timetable_index=timetable_index,
+            travel_request_indexes=travel_request_indexes
+        )
+        new_timetable_index, first_travel_request_indexes, second_travel_request_indexes = self.divide_timetable(
+            timetable_index=timetable_index,
+            travel_request_indexes=travel_request_indexes
+        )
+
+        if (self.calculate_average_waiting_time_of_timetable(
+                timetable_index=timetable_index,
+                travel_request_indexes=first_travel_request_indexes) > initial_average_waiting_time or
+                self.calculate_average_waiting_time_of_timetable(
+                    timetable_index=new_timetable_index,
+                    travel_request_indexes=second_travel_request_indexes) > initial_average_waiting_time):
+            self.departure_seconds[timetable_index] = initial_departure_seconds
+            self.modified_timetables[timetable_index] = initially_modified
+            self.timetable_indexes_of_travel_requests[second_travel_request_indexes] = timetable_index
+            self.remove_last_timetable()
+            return None
+
+        return new_timetable_index, first_travel_request_indexes, second_travel_request_indexes
+
+    def get_departure_offsets(self):
+        """
+        Get the travelling time from the first bus_stop to each bus_stop, for each timetable.
+
+        :return: departure_offsets: np.ndarray ([timetables x timetable_entries])
+        """
+        departure_offsets = np.zeros(self.total_times.shape, dtype=np.int64)
+        departure_offsets[:, 1:] = np.cumsum(self.total_times[:, :-1], axis=1)
+        return departure_offsets
+
+    def get_numbers_of_travel_requests(self):
+        """
+        Get the number of travel_requests of each timetable.
+
+        :return: numbers_of_travel_requests: np.ndarray
+        """
+        assigned = self.timetable_indexes_of_travel_requests >= 0
+        numbers_of_travel_requests = np.bincount(
+            self.timetable_indexes_of_travel_requests[assigned], minlength=len(self.departure_seconds)
+        )
+        return numbers_of_travel_requests
+
+    def get_travel_request_indexes_of_timetables(self):
+        """
+        Get the indexes of the travel_requests of each timetable, grouping all of them at once.
+
+        :return: travel_request_indexes_of_timetables: [np.ndarray] (One item for each timetable)
+        """
+        travel_request_indexes = np.flatnonzero(self.timetable_indexes_of_travel_requests >= 0)
+        timetable_indexes_of_travel_requests = self.timetable_indexes_of_travel_requests[travel_request_indexes]
+        # A stable sort keeps the travel_request_indexes of each timetable in ascending order.
+        order = np.argsort(timetable_indexes_of_travel_requests, kind='mergesort')
+        boundaries = np.cumsum(
+            np.bincount(timetable_indexes_of_travel_requests, minlength=len(self.departure_seconds))
+        )[:-1]
+        travel_request_indexes_of_timetables = np.split(travel_request_indexes[order], boundaries)
+        return travel_request_indexes_of_timetables
+
+    def get_timetable_documents(self):
+        """
+        Convert the timetables to timetable_documents, sorted by their starting datetime.
+
+        :return: timetables: [timetable_document]
+        """
+        timetables = []
+        numbers_of_onboarding_passengers, numbers_of_deboarding_passengers, numbers_of_current_passengers = \
+            self.calculate_number_of_passengers()
+        travel_requests_of_timetables = [[] for _ in range(0, len(self.departure_seconds))]
+
+        for travel_request, timetable_index in zip(self.travel_requests, self.timetable_indexes_of_travel_requests):
+            if timetable_index >= 0:
+                travel_requests_of_timetables[timetable_index].append(travel_request)
+
+        for timetable_index in np.argsort(self.departure_seconds[:, 0], kind='mergesort'):
+            timetable_entries = []
+
+            for timetable_entry_index, entry_template in enumerate(
+                    self.entry_templates[self.route_indexes[timetable_index]]):
+                departure_seconds = self.departure_seconds[timetable_index, timetable_entry_index]
+                timetable_entry = {
+                    'starting_bus_stop': entry_template.get('starting_bus_stop'),
+                    'ending_bus_stop': entry_template.get('ending_bus_stop'),
+                    'departure_datetime': seconds_to_datetime(seconds=departure_seconds),
+                    'arrival_datetime': seconds_to_datetime(
+                        seconds=departure_seconds + self.total_times[timetable_index, timetable_entry_index]
+                    ),
+                    'route': entry_template.get('route'),
+                    'number_of_onboarding_passengers': int(
+                        numbers_of_onboarding_passengers[timetable_index, timetable_entry_index]
+                    ),
+                    'number_of_deboarding_passengers': int(
+                        numbers_of_deboarding_passengers[timetable_index, timetable_entry_index]
+                    ),
+                    'number_of_current_passengers': int(
+                        numbers_of_current_passengers[timetable_index, timetable_entry_index]
+                    )
+                }
+                timetable_entries.append(timetable_entry)
+
+            timetable = {
+                'bus_line_id': self.bus_line_id,
+                'timetable_entries': timetable_entries,
+                'travel_requests': travel_requests_of_timetables[timetable_index]
+            }
+            timetables.append(timetable)
+
+        return timetables
+
+    def handle_overcrowded_timetables(self):
+        """
+        Divide the timetables where the number of current passengers exceeds the maximum_bus_capacity,
+        until there is no such timetable.
+
+        The travel_requests are grouped by timetable once. After that, each division processes only
+        the travel_requests of the divided timetable, and only the two resulting timetables are checked again.
+
+        :return: None
+        """
+        if len(self.departure_seconds) == 0:
+            return
+
+        travel_request_indexes_of_timetables = self.get_travel_request_indexes_of_timetables()
+        _, _, numbers_of_current_passengers = self.calculate_number_of_passengers()
+        overcrowded_timetable_indexes = np.flatnonzero(numbers_of_current_passengers.max(axis=1) > maximum_bus_capacity)
+
+        while len(overcrowded_timetable_indexes) > 0:
+            divided_timetable_indexes = []
+
+            for timetable_index in overcrowded_timetable_indexes:
+                new_timetable_index, first_travel_request_indexes, second_travel_request_indexes = \
+                    self.divide_timetable(
+                        timetable_index=timetable_index,
+                        travel_request_indexes=travel_request_indexes_of_timetables[timetable_index]
+                    )
+                travel_request_indexes_of_timetables[timetable_index] = first_travel_request_indexes
+                travel_request_indexes_of_timetables.append(second_travel_request_indexes)
+                divided_timetable_indexes.extend([timetable_index, new_timetable_index])
+
+            overcrowded_timetable_indexes = [
+                timetable_index for timetable_index in sorted(divided_timetable_indexes)
+                if self.calculate_maximum_number_of_current_passengers_of_timetable(
+                    travel_request_indexes=travel_request_indexes_of_timetables[timetable_index]
+                ) > maximum_bus_capacity
+            ]
+
+    def handle_timetables_with_average_waiting_time_above_threshold(self):
+        """
+        Divide the timetables where the average waiting time exceeds the average_waiting_time_threshold,
+        as long as the division reduces the average waiting times.
+
+        The travel_requests are grouped by timetable once. After that, each division processes only
+        the travel_requests of the divided timetable. A timetable which was not divided remains unchanged,
+        so only the two resulting timetables of each division are checked again.
+
+        :return: None
+        """
+        travel_request_indexes_of_timetables = self.get_travel_request_indexes_of_timetables()
+        timetable_indexes = np.flatnonzero(self.calculate_average_waiting_times() > average_waiting_time_threshold)
+
+        while len(timetable_indexes) > 0:
+            divided_timetable_indexes = []
+
+            for timetable_index in timetable_indexes:
+                division = self.divide_timetable_based_on_average_waiting_time(
+                    timetable_index=timetable_index,
+                    travel_request_indexes=travel_request_indexes_of_timetables[timetable_index]
+                )
+                if division is None:
+                    continue
+
+                new_timetable_index, first_travel_request_indexes, second_travel_request_indexes = division
+                travel_request_indexes_of_timetables[timetable_index] = first_travel_request_indexes
+                travel_request_indexes_of_timetables.append(second_travel_request_indexes)
+                divided_timetable_indexes.extend([timetable_index, new_timetable_index])
+
+            timetable_indexes = [
+                timetable_index for timetable_index in sorted(divided_timetable_indexes)
+                if self.calculate_average_waiting_time_of_timetable(
+                    timetable_index=timetable_index,
+                    travel_request_indexes=travel_request_indexes_of_timetables[timetable_index]
+                ) > average_waiting_time_threshold
+            ]
+
+    def handle_undercrowded_timetables(self):
+        """
+        Remove the timetables where the number of travel_requests is lower than the
+        minimum_number_of_passengers_in_timetable. If all the timetables are undercrowded,
+        then only the ones without travel_requests are removed.
+
+        :return: travel_request_indexes: np.ndarray (The travel_requests of the removed timetables)
+        """
+        numbers_of_travel_requests = self.get_numbers_of_travel_requests()
+        undercrowded = numbers_of_travel_requests < minimum_number_of_passengers_in_timetable
+
+        if undercrowded.all():
+            undercrowded = numbers_of_travel_requests == 0
+
+        undercrowded_timetable_indexes = np.flatnonzero(undercrowded)
+        travel_request_indexes = np.flatnonzero(
+            np.in1d(self.timetable_indexes_of_travel_requests, undercrowded_timetable_indexes)
+        )
+        self.remove_timetables(timetable_indexes=undercrowded_timetable_indexes)
+        return travel_request_indexes
+
+    def partition_travel_requests(self, travel_request_indexes):
+        """
+        Partition the travel_requests of a timetable into two lists, based on their departure datetimes.
+
+        The travel_requests of each starting bus_stop are partitioned separately,
+        using split_departure_seconds_in_two_clusters.
+
+        :param travel_request_indexes: np.ndarray
+        :return: (first_travel_request_indexes, second_travel_request_indexes): (np.ndarray, np.ndarray)
+        """
+        second_cluster = np.zeros(len(travel_request_indexes), dtype=bool)
+        starting_timetable_entry_indexes = self.starting_timetable_entry_indexes[travel_request_indexes]
+
+        for timetable_entry_index in np.unique(starting_timetable_entry_indexes):
+            positions = np.flatnonzero(starting_timetable_entry_indexes == timetable_entry_index)
+            second_cluster[positions] = split_departure_seconds_in_two_clusters(
+                departure_seconds=self.departure_seconds_of_travel_requests[travel_request_indexes[positions]]
+            )
+
+        return travel_request_indexes[~second_cluster], travel_request_indexes[second_cluster]
+
+    def remove_last_timetable(self):
+        """
+        Remove the last timetable, which must not have travel_requests. In contrast to remove_timetables,
+        the timetable_indexes of the travel_requests do not need to be updated.
+
+        :return: None
+        """
+        self.departure_seconds = self.departure_seconds[:-1]
+        self.total_times = self.total_times[:-1]
+        self.route_indexes = self.route_indexes[:-1]
+        self.modified_timetables = self.modified_timetables[:-1]
+
+    def remove_timetables(self, timetable_indexes):
+        """
+        Remove timetables. Their travel_requests are not assigned to any timetable.
+
+        :param timetable_indexes: [int]
+        :return: None
+        """
+        if len(timetable_indexes) == 0:
+            return
+
+        kept = np.ones(len(self.departure_seconds), dtype=bool)
+        kept[timetable_indexes] = False
+        new_timetable_indexes = np.cumsum(kept) - 1
+        new_timetable_indexes[~kept] = -1
+
+        self.departure_seconds = self.departure_seconds[kept]
+        self.total_times = self.total_times[kept]
+        self.route_indexes = self.route_indexes[kept]
+        self.modified_timetables = self.modified_timetables[kept]
+
+        assigned = self.timetable_indexes_of_travel_requests >= 0
+        self.timetable_indexes_of_travel_requests[assigned] = new_timetable_indexes[
+            self.timetable_indexes_of_travel_requests[assigned]
+        ]
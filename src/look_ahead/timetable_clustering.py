@@ -0,0 +1,310 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+"""
+- LICENCE
+
+The MIT License (MIT)
+
+Copyright (c) 2016 Eleftherios Anagnostopoulos for Ericsson AB (EU FP7 CityPulse Project)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+
+- DESCRIPTION OF DOCUMENTS
+
+-- MongoDB Database Documents:
+
+address_document: {
+    '_id', 'name', 'node_id', 'point': {'longitude', 'latitude'}
+}
+bus_line_document: {
+    '_id', 'bus_line_id', 'bus_stops': [{'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}]
+}
+bus_stop_document: {
+    '_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}
+}
+bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_object_id]]
+}
+bus_vehicle_document: {
+    '_id', 'bus_vehicle_id', 'maximum_capacity',
+    'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
+}
+counter_document: {
+    '_id', 'sequence_value'
+}
+detailed_bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_document]]
+}
+edge_document: {
+    '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'max_speed', 'road_type', 'way_id', 'traffic_density'
+}
+node_document: {
+    '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
+}
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
+point_document: {
+    '_id', 'osm_id', 'point': {'longitude', 'latitude'}
+}
+timetable_document: {
+    '_id', 'timetable_id', 'bus_line_id', 'bus_vehicle_id',
+    'timetable_entries': [{
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime', 'number_of_onboarding_passengers',
+        'number_of_deboarding_passengers', 'number_of_current_passengers',
+        'route': {
+            'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+            'distances_from_starting_node', 'times_from_starting_node',
+            'distances_from_previous_node', 'times_from_previous_node'
+        }
+    }],
+    'travel_requests': [{
+        '_id', 'client_id', 'bus_line_id',
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime',
+        'starting_timetable_entry_index', 'ending_timetable_entry_index'
+    }]
+}
+traffic_event_document: {
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
+}
+travel_request_document: {
+    '_id', 'client_id', 'bus_line_id',
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'departure_datetime', 'arrival_datetime',
+    'starting_timetable_entry_index', 'ending_timetable_entry_index'
+}
+way_document: {
+    '_id', 'osm_id', 'tags', 'references'
+}
+
+-- Route Generator Responses:
+
+get_route_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}
+get_route_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}]
+get_waypoints_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}
+get_waypoints_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}]
+"""
+import numpy as np
+from src.common.parameters import maximum_bus_capacity, minimum_number_of_passengers_in_timetable, \
+    look_ahead_timetable_cost
+
+__author__ = 'Eleftherios Anagnostopoulos'
+__email__ = 'eanagnostopoulos@hotmail.com'
+__credits__ = [
+    'Azadeh Bararsani (Senior Researcher at Ericsson AB) - email: azadeh.bararsani@ericsson.com'
+    'Aneta Vulgarakis Feljan (Senior Researcher at Ericsson AB) - email: aneta.vulgarakis@ericsson.com'
+]
+
+
+def calculate_costs_of_clusters(sorted_values, prefix_sums, starting_positions, ending_position):
+    """
+    Calculate the sum of absolute differences from the median value, for the clusters
+    of sorted_values which start at starting_positions and end before ending_position.
+
+    :param sorted_values: np.ndarray
+    :param prefix_sums: np.ndarray (prefix_sums[i] is the sum of the first i sorted_values)
+    :param starting_positions: np.ndarray
+    :param ending_position: int
+    :return: costs: np.ndarray
+    """
+    median_positions = (starting_positions + ending_position) // 2
+    median_values = sorted_values[median_positions]
+    costs = (
+        median_values * (median_positions - starting_positions) -
+        (prefix_sums[median_positions] - prefix_sums[starting_positions]) +
+        (prefix_sums[ending_position] - prefix_sums[median_positions]) -
+        median_values * (ending_position - median_positions)
+    )
+    return costs
+
+
+def cluster_sorted_values(sorted_values, minimum_cluster_size, maximum_cluster_size, cluster_cost=0):
+    """
+    Partition sorted_values into clusters of consecutive values, with sizes between minimum_cluster_size and
+    maximum_cluster_size, so as the sum of absolute differences from the median value of each cluster,
+    plus cluster_cost for each cluster, to be minimized.
+
+    The optimal partition is identified using dynamic programming over the ending positions of the clusters.
+    If there are less values than minimum_cluster_size, then they form a single cluster, and if there is no
+    partition respecting minimum_cluster_size, then it is not taken into consideration.
+
+    :param sorted_values: np.ndarray
+    :param minimum_cluster_size: int
+    :param maximum_cluster_size: int
+    :param cluster_cost: float
+    :return: (clusters, objective): ([(starting_position, ending_position)], float)
+    """
+    number_of_values = len(sorted_values)
+
+    if number_of_values == 0:
+        return [], 0.0
+
+    minimum_cluster_size = max(1, min(minimum_cluster_size, maximum_cluster_size, number_of_values))
+
+    # The values are shifted to their minimum, so as the prefix sums to remain precise.
+    sorted_values = np.asarray(sorted_values, dtype=float) - sorted_values[0]
+    prefix_sums = np.concatenate([[0.0], np.cumsum(sorted_values)])
+
+    # objectives[j] is the minimum objective for the first j values, and
+    # previous_positions[j] the starting position of the last of their clusters.
+    objectives = np.full(number_of_values + 1, np.inf)
+    objectives[0] = 0.0
+    previous_positions = np.zeros(number_of_values + 1, dtype=np.int64)
+
+    for ending_position in range(minimum_cluster_size, number_of_values + 1):
+        starting_positions = np.arange(
+            max(0, ending_position - maximum_cluster_size), ending_position - minimum_cluster_size + 1
+        )
+        candidate_objectives = objectives[starting_positions] + cluster_cost + calculate_costs_of_clusters(
+            sorted_values=sorted_values,
+            prefix_sums=prefix_sums,
+            starting_positions=starting_positions,
+            ending_position=ending_position
+        )
+        best_candidate = int(np.argmin(candidate_objectives))
+        objectives[ending_position] = candidate_objectives[best_candidate]
+        previous_positions[ending_position] = starting_positions[best_candidate]
+
+    if np.isinf(objectives[number_of_values]):
+        return cluster_sorted_values(
+            sorted_values=sorted_values,
+            minimum_cluster_size=1,
+            maximum_cluster_size=maximum_cluster_size,
+            cluster_cost=cluster_cost
+        )
+
+    clusters = []
+    ending_position = number_of_values
+
+    while ending_position > 0:
+        starting_position = previous_positions[ending_position]
+        clusters.append((int(starting_position), ending_position))
+        ending_position = starting_position
+
+    clusters.reverse()
+    objective = float(objectives[number_of_values])
+    return clusters, objective
+
+
+def generate_timetable_arrays_with_optimal_clustering(initial_timetable_arrays,
+                                                      timetable_cost=look_ahead_timetable_cost):
+    """
+    Generate timetables by clustering the travel_requests of a bus_line directly, instead of
+    repeatedly regenerating the initial timetables.
+
+    Each travel_request follows the route of the initial timetable which produces the minimum waiting time for it.
+    Its ideal departure datetime from the first bus_stop is its departure_datetime, reduced by the travelling time
+    of this route from the first bus_stop to its starting bus_stop. The sorted ideal departure datetimes are
+    clustered using cluster_sorted_values, with at most maximum_bus_capacity travel_requests in each cluster,
+    so as the number of current passengers never to exceed it, and at least
+    minimum_number_of_passengers_in_timetable. Each cluster becomes a timetable, which departs at the median
+    ideal departure datetime and follows the route of the corresponding travel_request.
+
+    The clustering assumes that each travel_request follows its own route, while the generated timetable follows
+    the route of its median travel_request, so the returned objective is recalculated from the generated timetables.
+    With a timetable_cost of 0, the clustering minimizes only the waiting time, so it generates as many timetables
+    as minimum_number_of_passengers_in_timetable allows.
+
+    :param initial_timetable_arrays: TimetableArrays
+    :param timetable_cost: float (in seconds)
+    :return: (timetable_arrays, objective): (TimetableArrays, float)
+             (objective: total waiting time of the travel_requests in seconds, plus timetable_cost for each timetable)
+    """
+    timetable_arrays = initial_timetable_arrays.copy_without_travel_requests()
+    timetable_arrays.correspond_travel_requests_to_timetables()
+    travel_request_indexes = np.flatnonzero(timetable_arrays.timetable_indexes_of_travel_requests >= 0)
+    route_timetable_indexes = timetable_arrays.timetable_indexes_of_travel_requests[travel_request_indexes]
+
+    ideal_departure_seconds = (
+        timetable_arrays.departure_seconds_of_travel_requests[travel_request_indexes] -
+        timetable_arrays.get_departure_offsets()[
+            route_timetable_indexes, timetable_arrays.starting_timetable_entry_indexes[travel_request_indexes]
+        ]
+    )
+    order = np.argsort(ideal_departure_seconds, kind='mergesort')
+    clusters, _ = cluster_sorted_values(
+        sorted_values=ideal_departure_seconds[order],
+        minimum_cluster_size=minimum_number_of_passengers_in_timetable,
+        maximum_cluster_size=maximum_bus_capacity,
+        cluster_cost=timetable_cost
+    )
+    median_positions = np.array(
+        [order[(starting_position + ending_position) // 2] for starting_position, ending_position in clusters],
+        dtype=np.int64
+    )
+    route_timetable_indexes_of_clusters = route_timetable_indexes[median_positions]
+
+    timetable_arrays.departure_seconds = (
+        ideal_departure_seconds[median_positions][:, np.newaxis] +
+        timetable_arrays.get_departure_offsets()[route_timetable_indexes_of_clusters]
+    ).reshape(len(clusters), timetable_arrays.departure_seconds.shape[1])
+    timetable_arrays.total_times = timetable_arrays.total_times[route_timetable_indexes_of_clusters]
+    timetable_arrays.route_indexes = timetable_arrays.route_indexes[route_timetable_indexes_of_clusters]
+    timetable_arrays.timetable_indexes_of_travel_requests[travel_request_indexes[order]] = np.repeat(
+        np.arange(len(clusters)),
+        [ending_position - starting_position for starting_position, ending_position in clusters]
+    )
+    objective = float(timetable_arrays.calculate_waiting_times().sum()) + timetable_cost * len(clusters)
+    return timetable_arrays, objective
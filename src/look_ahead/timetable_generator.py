@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,10 +146,12 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
-from datetime import datetime, timedelta, time
+import numpy as np
+from datetime import datetime, timedelta
 from src.common.parameters import maximum_bus_capacity, average_waiting_time_threshold, \
-    individual_waiting_time_threshold, minimum_number_of_passengers_in_timetable
-from src.common.functions import quicksort
+    individual_waiting_time_threshold, minimum_number_of_passengers_in_timetable, \
+    look_ahead_time_dependent_routing_interval
+from src.common.functions import insert_sorted
 from src.route_generator.route_generator_client import get_route_between_multiple_bus_stops
 
 __author__ = 'Eleftherios Anagnostopoulos'
@@ -151,25 +161,50 @@ __credits__ = [
     'Aneta Vulgarakis Feljan (Senior Researcher at Ericsson AB) - email: aneta.vulgarakis@ericsson.com'
 ]
 
+epoch = datetime(1970, 1, 1)
+
 
 class TimetableGenerator(object):
-    def __init__(self, bus_line_id, bus_stops, travel_requests, maximum_timetable_id_in_database):
+    def __init__(self, bus_line_id, bus_stops, travel_requests, timetables_starting_datetime=None,
+                 timetables_ending_datetime=None, routing_interval=look_ahead_time_dependent_routing_interval):
         """
         Initialize the TimetableGenerator, send a request to the RouteGenerator and receive the less time-consuming
         route which connects the provided bus stops.
 
+        If the datetime period of the timetables is provided, then a time-dependent route is requested for
+        every routing_interval seconds of the period, based on the expected traffic_density at the corresponding
+        time of day, so as each timetable to follow the route which corresponds to its departure_datetime.
+
         :param bus_line_id: int
         :param bus_stops: [bus_stop_document]
         :param travel_requests: [travel_request_document]
-        :param maximum_timetable_id_in_database: int
+        :param timetables_starting_datetime: datetime
+        :param timetables_ending_datetime: datetime
+        :param routing_interval: int (seconds)
         :return: None
         """
-        self.maximum_timetable_id_in_database = maximum_timetable_id_in_database
         self.timetables = []
         self.bus_line_id = bus_line_id
         self.bus_stops = bus_stops
         self.travel_requests = travel_requests
-        self.route_generator_response = get_route_between_multiple_bus_stops(bus_stops=bus_stops)
+        # [(departure_datetime, route_generator_response)]
+        self.route_generator_responses = []
+
+        if timetables_starting_datetime is not None and timetables_ending_datetime is not None \
+                and routing_interval > 0:
+            departure_datetime = timetables_starting_datetime
+
+            while departure_datetime < timetables_ending_datetime:
+                self.route_generator_responses.append((
+                    departure_datetime,
+                    get_route_between_multiple_bus_stops(bus_stops=bus_stops, departure_datetime=departure_datetime)
+                ))
+                departure_datetime += timedelta(seconds=routing_interval)
+
+        if len(self.route_generator_responses) > 0:
+            self.route_generator_response = self.route_generator_responses[0][1]
+        else:
+            self.route_generator_response = get_route_between_multiple_bus_stops(bus_stops=bus_stops)
 
 
 def add_ideal_departure_datetimes_of_travel_request(ideal_departure_datetimes_of_travel_request,
@@ -190,47 +225,26 @@ def add_ideal_departure_datetimes_of_travel_request(ideal_departure_datetimes_of
 def add_timetable_to_timetables_sorted_by_starting_datetime(timetable, timetables):
     """
     Add a provided timetable to the timetables list, sorted by its starting_datetime.
+    The insertion index is identified with binary search.
 
     :param timetable: timetable_document
     :param timetables: [timetable_document]
     :return: None (Updates timetables)
     """
-    number_of_timetables = len(timetables)
-    insertion_index = number_of_timetables
-
-    for i in range(0, number_of_timetables):
-        current_timetable = timetables[i]
-        starting_datetime_of_new_timetable = get_starting_datetime_of_timetable(timetable=timetable)
-        starting_datetime_of_current_timetable = get_starting_datetime_of_timetable(timetable=current_timetable)
-
-        if starting_datetime_of_new_timetable < starting_datetime_of_current_timetable:
-            insertion_index = i
-            break
-
-    timetables.insert(insertion_index, timetable)
+    insert_sorted(sorted_list=timetables, item=timetable, key=get_starting_datetime_of_timetable)
 
 
 def add_travel_request_sorted_by_departure_datetime(travel_request, travel_requests):
     """
     Add a travel_request to the corresponding index position of the travel_requests list,
     so as to keep the list sorted by the departure_datetime value.
+    The insertion index is identified with binary search.
 
     :param travel_request: travel_request_document
     :param travel_requests: [travel_request_document]
     :return: None (Updates travel_requests)
     """
-    departure_datetime_of_travel_request = travel_request.get('departure_datetime')
-    insertion_index = 0
-
-    for current_travel_request in travel_requests:
-        current_departure_datetime = current_travel_request.get('departure_datetime')
-
-        if departure_datetime_of_travel_request < current_departure_datetime:
-            break
-        else:
-            insertion_index += 1
-
-    travel_requests.insert(insertion_index, travel_request)
+    insert_sorted(sorted_list=travel_requests, item=travel_request, key=get_departure_datetime_of_travel_request)
 
 
 def add_travel_request_to_timetable_with_adjustments(travel_request, timetable):
@@ -243,7 +257,7 @@ def add_travel_request_to_timetable_with_adjustments(travel_request, timetable):
     """
     add_travel_request_to_timetable_without_adjustments(travel_request=travel_request, timetable=timetable)
     adjust_departure_datetimes_of_timetable(timetable=timetable)
-    calculate_number_of_passengers_of_timetable(timetable=timetable)
+    update_number_of_passengers_of_timetable(travel_request=travel_request, timetable=timetable, increment=1)
 
 
 def add_travel_request_to_timetable_without_adjustments(travel_request, timetable):
@@ -354,6 +368,29 @@ def adjust_timetable_ids(timetables, maximum_timetable_id_in_database):
         previous_timetable_id += 1
 
 
+def build_departure_datetime_index(timetables, timetable_entry_index):
+    """
+    Sort the departure_datetimes of the timetable_entries, which correspond to a specific index,
+    of a list of timetables.
+
+    :param timetables: [timetable_document]
+    :param timetable_entry_index: int
+    :return: (sorted_departure_seconds, timetable_indexes): (np.ndarray, np.ndarray)
+             (timetable_indexes[i] is the index in timetables of the i-th sorted departure_datetime)
+    """
+    departure_seconds = np.array([
+        datetime_to_seconds(
+            provided_datetime=timetable.get('timetable_entries')[timetable_entry_index].get('departure_datetime')
+        )
+        for timetable in timetables
+    ], dtype=np.int64)
+
+    # A stable sort keeps the order of the timetables with equal departure_datetimes.
+    timetable_indexes = np.argsort(departure_seconds, kind='mergesort')
+    sorted_departure_seconds = departure_seconds[timetable_indexes]
+    return sorted_departure_seconds, timetable_indexes
+
+
 def calculate_average_number_of_travel_requests_in_timetables(timetables):
     """
     Calculate the average number of travel_requests in timetables.
@@ -392,7 +429,7 @@ def calculate_average_waiting_time_of_timetable_in_seconds(timetable):
         )
         total_waiting_time_in_seconds += waiting_time_of_travel_request_in_seconds
 
-    average_waiting_time_in_seconds = total_waiting_time_in_seconds / number_of_passengers
+    average_waiting_time_in_seconds = float(total_waiting_time_in_seconds) / number_of_passengers
     return average_waiting_time_in_seconds
 
 
@@ -424,7 +461,7 @@ def calculate_departure_datetime_differences_between_travel_request_and_timetabl
     :param travel_request: timetable_document
     :param timetables: [timetable_document]
     :return: departure_datetime_differences: [{
-                 'timetable': timetable_document, 'departure_datetime_difference': float (in seconds)}]
+                 'timetable': timetable_document, 'departure_datetime_difference': int (in seconds)}]
     """
     departure_datetime_differences = []
     # starting_timetable_entry_index corresponds to the timetable_entry from where the passenger departs from.
@@ -454,22 +491,13 @@ def calculate_departure_datetime_differences_between_travel_request_and_timetabl
 
 def calculate_mean_departure_datetime(departure_datetimes):
     """
-    Calculate the mean value of a list of departure_datetime values.
+    Calculate the mean value of a list of departure_datetime values, rounded down to seconds.
 
     :param departure_datetimes: [datetime]
     :return: mean_departure_datetime: datetime
     """
-    total = 0
-    number_of_departure_datetimes = len(departure_datetimes)
-
-    for departure_datetime in departure_datetimes:
-        total += (departure_datetime.hour * 3600) + (departure_datetime.minute * 60) + departure_datetime.second
-
-    avg = total / number_of_departure_datetimes
-    minutes, seconds = divmod(int(avg), 60)
-    hours, minutes = divmod(minutes, 60)
-    mean_departure_datetime = datetime.combine(departure_datetimes[0].date(), time(hours, minutes, seconds))
-
+    total = sum(datetime_to_seconds(provided_datetime=departure_datetime) for departure_datetime in departure_datetimes)
+    mean_departure_datetime = seconds_to_datetime(seconds=total // len(departure_datetimes))
     return mean_departure_datetime
 
 
@@ -481,30 +509,7 @@ def calculate_number_of_passengers_of_timetable(timetable):
     :param timetable: timetable_document
     :return: None (Updates timetable)
     """
-    clear_number_of_passengers_of_timetable(timetable=timetable)
-    travel_requests = timetable.get('travel_requests')
-    timetable_entries = timetable.get('timetable_entries')
-
-    for travel_request in travel_requests:
-        starting_timetable_entry_index = travel_request.get('starting_timetable_entry_index')
-        starting_timetable_entry = timetable_entries[starting_timetable_entry_index]
-        starting_timetable_entry['number_of_onboarding_passengers'] += 1
-
-        ending_timetable_entry_index = travel_request.get('ending_timetable_entry_index')
-        ending_timetable_entry = timetable_entries[ending_timetable_entry_index]
-        ending_timetable_entry['number_of_deboarding_passengers'] += 1
-
-    previous_number_of_current_passengers = 0
-    previous_number_of_deboarding_passengers = 0
-
-    for timetable_entry in timetable_entries:
-        number_of_current_passengers = (previous_number_of_current_passengers -
-                                        previous_number_of_deboarding_passengers +
-                                        timetable_entry.get('number_of_onboarding_passengers'))
-
-        timetable_entry['number_of_current_passengers'] = number_of_current_passengers
-        previous_number_of_current_passengers = number_of_current_passengers
-        previous_number_of_deboarding_passengers = timetable_entry.get('number_of_deboarding_passengers')
+    calculate_number_of_passengers_of_timetables(timetables=[timetable])
 
 
 def calculate_number_of_passengers_of_timetables(timetables):
@@ -512,11 +517,80 @@ def calculate_number_of_passengers_of_timetables(timetables):
     Calculate the number of onboarding, deboarding, and current passengers for each timetable entry,
     and update the corresponding values in each one of timetables.
 
+    The numbers of passengers of all the timetables are calculated at once, using the
+    starting and ending timetable_entry_indexes of the travel_requests.
+
     :param timetables: [timetable_document]
     :return: None (Updates timetables)
     """
-    for timetable in timetables:
-        calculate_number_of_passengers_of_timetable(timetable=timetable)
+    if len(timetables) == 0:
+        return
+
+    timetable_indexes = []
+    starting_timetable_entry_indexes = []
+    ending_timetable_entry_indexes = []
+
+    for timetable_index, timetable in enumerate(timetables):
+        for travel_request in timetable.get('travel_requests'):
+            timetable_indexes.append(timetable_index)
+            starting_timetable_entry_indexes.append(travel_request.get('starting_timetable_entry_index'))
+            ending_timetable_entry_indexes.append(travel_request.get('ending_timetable_entry_index'))
+
+    numbers_of_onboarding_passengers, numbers_of_deboarding_passengers, numbers_of_current_passengers = \
+        calculate_numbers_of_passengers(
+            timetable_indexes=np.array(timetable_indexes, dtype=np.int64),
+            starting_timetable_entry_indexes=np.array(starting_timetable_entry_indexes, dtype=np.int64),
+            ending_timetable_entry_indexes=np.array(ending_timetable_entry_indexes, dtype=np.int64),
+            number_of_timetables=len(timetables),
+            number_of_timetable_entries=max(len(timetable.get('timetable_entries')) for timetable in timetables)
+        )
+
+    for timetable_index, timetable in enumerate(timetables):
+        for timetable_entry_index, timetable_entry in enumerate(timetable.get('timetable_entries')):
+            timetable_entry['number_of_onboarding_passengers'] = int(
+                numbers_of_onboarding_passengers[timetable_index, timetable_entry_index]
+            )
+            timetable_entry['number_of_deboarding_passengers'] = int(
+                numbers_of_deboarding_passengers[timetable_index, timetable_entry_index]
+            )
+            timetable_entry['number_of_current_passengers'] = int(
+                numbers_of_current_passengers[timetable_index, timetable_entry_index]
+            )
+
+
+def calculate_numbers_of_passengers(timetable_indexes, starting_timetable_entry_indexes,
+                                    ending_timetable_entry_indexes, number_of_timetables, number_of_timetable_entries):
+    """
+    Calculate the number of onboarding, deboarding, and current passengers for each timetable_entry
+    of a number of timetables, given the timetable and the starting and ending timetable_entry_indexes
+    of each travel_request.
+
+    The onboarding and deboarding passengers are histograms of the starting and ending timetable_entry_indexes,
+    and the current passengers are the cumulative sum of their difference. The deboarding passengers of
+    a timetable_entry are still included in its current passengers.
+
+    :param timetable_indexes: np.ndarray
+    :param starting_timetable_entry_indexes: np.ndarray
+    :param ending_timetable_entry_indexes: np.ndarray
+    :param number_of_timetables: int
+    :param number_of_timetable_entries: int
+    :return: (numbers_of_onboarding_passengers, numbers_of_deboarding_passengers, numbers_of_current_passengers):
+             (np.ndarray, np.ndarray, np.ndarray) ([timetables x timetable_entries])
+    """
+    shape = (number_of_timetables, number_of_timetable_entries)
+    size = number_of_timetables * number_of_timetable_entries
+
+    numbers_of_onboarding_passengers = np.bincount(
+        timetable_indexes * number_of_timetable_entries + starting_timetable_entry_indexes, minlength=size
+    ).reshape(shape)
+    numbers_of_deboarding_passengers = np.bincount(
+        timetable_indexes * number_of_timetable_entries + ending_timetable_entry_indexes, minlength=size
+    ).reshape(shape)
+    numbers_of_current_passengers = (
+        np.cumsum(numbers_of_onboarding_passengers - numbers_of_deboarding_passengers, axis=1) +
+        numbers_of_deboarding_passengers
+    )
+    return numbers_of_onboarding_passengers, numbers_of_deboarding_passengers, numbers_of_current_passengers
 
 
 def calculate_total_number_of_travel_requests_in_timetables(timetables):
@@ -548,7 +622,7 @@ def calculate_waiting_time_of_travel_request_in_seconds(travel_request, timetabl
                'departure_datetime', 'arrival_datetime', 'total_time', 'number_of_onboarding_passengers',
                'number_of_deboarding_passengers', 'number_of_current_passengers'}]
 
-    :return: waiting_time_in_seconds (float)
+    :return: waiting_time_in_seconds (int)
     """
     departure_datetime_of_travel_request = travel_request.get('departure_datetime')
     departure_datetime_of_travel_request_in_seconds = datetime_to_seconds(
@@ -760,42 +834,59 @@ def correspond_travel_requests_to_timetables(travel_requests, timetables):
     Correspond each travel request to a timetable, so as to produce
     the minimum waiting time for each passenger.
 
+    The departure_datetimes of the timetable_entries are sorted once for each starting_timetable_entry_index,
+    so as the timetable with the minimum departure_datetime difference to be identified with binary search.
+
     :param travel_requests: [travel_request_document]
     :param timetables: [timetable_document]
     :return: None (Updates timetables)
     """
-    for travel_request in travel_requests:
-        departure_datetime_differences = \
-            calculate_departure_datetime_differences_between_travel_request_and_timetables(
-                travel_request=travel_request,
-                timetables=timetables
-            )
+    if len(timetables) == 0:
+        return
+
+    # {starting_timetable_entry_index -> [index of travel_request]}
+    travel_request_indexes_of_timetable_entry_indexes = {}
 
-        timetable_with_minimum_datetime_difference = get_timetable_with_minimum_departure_datetime_difference(
-            departure_datetime_differences=departure_datetime_differences
+    for travel_request_index, travel_request in enumerate(travel_requests):
+        travel_request_indexes_of_timetable_entry_indexes.setdefault(
+            travel_request.get('starting_timetable_entry_index'), []
+        ).append(travel_request_index)
+
+    timetable_indexes_of_travel_requests = [None] * len(travel_requests)
+
+    for timetable_entry_index, travel_request_indexes in travel_request_indexes_of_timetable_entry_indexes.iteritems():
+        sorted_departure_seconds, timetable_indexes = build_departure_datetime_index(
+            timetables=timetables,
+            timetable_entry_index=timetable_entry_index
+        )
+        departure_seconds_of_travel_requests = np.array([
+            datetime_to_seconds(provided_datetime=travel_requests[travel_request_index].get('departure_datetime'))
+            for travel_request_index in travel_request_indexes
+        ], dtype=np.int64)
+        positions = get_positions_of_nearest_departure_seconds(
+            sorted_departure_seconds=sorted_departure_seconds,
+            departure_seconds=departure_seconds_of_travel_requests
         )
+        for travel_request_index, position in zip(travel_request_indexes, positions):
+            timetable_indexes_of_travel_requests[travel_request_index] = timetable_indexes[position]
 
+    # The travel_requests are added to the timetables in their initial order.
+    for travel_request, timetable_index in zip(travel_requests, timetable_indexes_of_travel_requests):
         add_travel_request_to_timetable_without_adjustments(
             travel_request=travel_request,
-            timetable=timetable_with_minimum_datetime_difference
+            timetable=timetables[timetable_index]
         )
 
 
 def datetime_to_seconds(provided_datetime):
     """
-    Convert a datetime to seconds.
+    Convert a datetime to the exact number of seconds since the epoch (microseconds are ignored).
 
     :param provided_datetime: datetime
-    :return: seconds: float
-    """
-    seconds = (
-        provided_datetime.year * 31556926 +
-        provided_datetime.month * 2629743.83 +
-        provided_datetime.day * 86400 +
-        provided_datetime.hour * 3600 +
-        provided_datetime.minute * 60 +
-        provided_datetime.second
-    )
+    :return: seconds: int
+    """
+    difference = provided_datetime - epoch
+    seconds = difference.days * 86400 + difference.seconds
     return seconds
 
 
@@ -988,12 +1079,16 @@ def generate_additional_timetables(timetables):
 
 
 def generate_initial_timetables(bus_line_id, timetables_starting_datetime, timetables_ending_datetime,
-                                route_generator_response):
+                                route_generator_response, route_generator_responses=None):
     """
+    Generate timetables which cover the period from timetables_starting_datetime to timetables_ending_datetime,
+    using only one bus vehicle. If time-dependent route_generator_responses are provided, then each timetable
+    follows the route which corresponds to its starting datetime.
 
     :param bus_line_id: int
     :param timetables_starting_datetime: datetime
     :param timetables_ending_datetime: datetime
+    :param route_generator_responses: [(departure_datetime, route_generator_response)]
 
     :param route_generator_response: [{
            'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -1008,6 +1103,12 @@ def generate_initial_timetables(bus_line_id, timetables_starting_datetime, timet
     current_datetime = timetables_starting_datetime
 
     while current_datetime < timetables_ending_datetime:
+        if route_generator_responses:
+            route_generator_response = get_route_generator_response_of_datetime(
+                route_generator_responses=route_generator_responses,
+                provided_datetime=current_datetime
+            )
+
         timetable = generate_new_timetable(
             bus_line_id=bus_line_id,
             timetable_starting_datetime=current_datetime,
@@ -1094,6 +1195,17 @@ def get_bus_stop_index(bus_stop_osm_id, bus_stop_osm_ids, start):
     return bus_stop_index
 
 
+def get_departure_datetime_of_travel_request(travel_request):
+    """
+    Get the departure_datetime of a travel_request.
+
+    :param travel_request: travel_request_document
+    :return: departure_datetime: datetime
+    """
+    departure_datetime = travel_request.get('departure_datetime')
+    return departure_datetime
+
+
 def get_ending_datetime_of_timetable(timetable):
     """
     Get the ending_datetime of a timetable, which corresponds to
@@ -1124,6 +1236,51 @@ def get_overcrowded_timetables(timetables):
     return overcrowded_timetables
 
 
+def get_positions_of_nearest_departure_seconds(sorted_departure_seconds, departure_seconds):
+    """
+    Get the position of the nearest value of sorted_departure_seconds, for each one of the departure_seconds.
+
+    In case of equal differences, the earlier departure is selected, and in case of equal values
+    the first of them, like in get_timetable_with_minimum_departure_datetime_difference.
+
+    :param sorted_departure_seconds: np.ndarray (sorted, not empty)
+    :param departure_seconds: np.ndarray
+    :return: positions: np.ndarray
+    """
+    last_position = len(sorted_departure_seconds) - 1
+    following_positions = np.searchsorted(sorted_departure_seconds, departure_seconds, side='left')
+    previous_positions = np.clip(following_positions - 1, 0, last_position)
+    following_positions = np.clip(following_positions, 0, last_position)
+
+    select_following_positions = (
+        np.abs(sorted_departure_seconds[following_positions] - departure_seconds) <
+        np.abs(sorted_departure_seconds[previous_positions] - departure_seconds)
+    )
+    positions = np.where(select_following_positions, following_positions, previous_positions)
+    positions = np.searchsorted(sorted_departure_seconds, sorted_departure_seconds[positions], side='left')
+    return positions
+
+
+def get_route_generator_response_of_datetime(route_generator_responses, provided_datetime):
+    """
+    Get the route_generator_response with the latest departure_datetime, which is not greater than
+    the provided_datetime (or the first one, if all of them are greater).
+
+    :param route_generator_responses: [(departure_datetime, route_generator_response)] (sorted by departure_datetime)
+    :param provided_datetime: datetime
+    :return: route_generator_response: get_route_between_multiple_bus_stops
+    """
+    route_generator_response = route_generator_responses[0][1]
+
+    for departure_datetime, current_route_generator_response in route_generator_responses:
+        if departure_datetime > provided_datetime:
+            break
+
+        route_generator_response = current_route_generator_response
+
+    return route_generator_response
+
+
 def get_starting_datetime_of_timetable(timetable):
     """
     Get the starting_datetime of a timetable, which corresponds to
@@ -1138,22 +1295,6 @@ def get_starting_datetime_of_timetable(timetable):
     return starting_datetime_of_timetable
 
 
-def get_starting_datetimes_of_timetables(timetables):
-    """
-    Retrieve a list containing the starting_datetimes of timetables.
-
-    :param timetables: [timetable_document]
-    :return: starting_datetimes: datetime
-    """
-    starting_datetimes = []
-
-    for timetable in timetables:
-        starting_datetime = get_starting_datetime_of_timetable(timetable=timetable)
-        starting_datetimes.append(starting_datetime)
-
-    return starting_datetimes
-
-
 def get_starting_timetable_entry_dictionary(travel_requests):
     """
     Create a dictionary containing the starting_timetable_entry_index as key,
@@ -1354,53 +1495,28 @@ def partition_travel_requests_list(travel_requests):
     """
     Partition a list of travel_requests into two lists, and return a dictionary containing both of them.
 
+    The travel_requests are clustered into two groups of consecutive departure_datetimes,
+    minimizing the sum of squared differences from the mean departure_datetime of each group.
+
     :param travel_requests: [travel_request_document]
     :return: travel_requests_lists: {'first_list': [travel_request_document], 'second_list': [travel_request_document]}
     """
-    number_of_travel_requests = len(travel_requests)
-    # half_number_of_travel_requests = number_of_travel_requests / 2
-    #
-    # first_list_of_travel_requests = travel_requests[0:half_number_of_travel_requests]
-    # second_list_of_travel_requests = travel_requests[half_number_of_travel_requests:number_of_travel_requests]
-
     first_list_of_travel_requests = []
     second_list_of_travel_requests = []
 
-    if number_of_travel_requests == 0:
-        pass
-    elif number_of_travel_requests == 1:
-        first_list_of_travel_requests.append(travel_requests[0])
-    else:
-        first_list_of_travel_requests.append(travel_requests[0])
-        second_list_of_travel_requests.append(travel_requests[number_of_travel_requests - 1])
-
-        departure_datetimes = [travel_request.get('departure_datetime') for travel_request in travel_requests]
-        first_list_of_departure_datetimes = [departure_datetimes[0]]
-        second_list_of_departure_datetimes = [departure_datetimes[number_of_travel_requests - 1]]
-
-        for i in range(1, number_of_travel_requests - 1):
-            travel_request = travel_requests[i]
-            departure_datetime = departure_datetimes[i]
-
-            mean_of_first_list_of_departure_datetimes = calculate_mean_departure_datetime(
-                departure_datetimes=first_list_of_departure_datetimes
-            )
-            mean_of_second_list_of_departure_datetimes = calculate_mean_departure_datetime(
-                departure_datetimes=second_list_of_departure_datetimes
-            )
-            difference_with_first_list_of_departure_datetimes = abs(
-                departure_datetime - mean_of_first_list_of_departure_datetimes
-            )
-            difference_with_second_list_departure_datetimes = abs(
-                departure_datetime - mean_of_second_list_of_departure_datetimes
-            )
+    if len(travel_requests) > 0:
+        departure_seconds = np.array(
+            [datetime_to_seconds(provided_datetime=travel_request.get('departure_datetime'))
+             for travel_request in travel_requests],
+            dtype=np.int64
+        )
+        second_cluster = split_departure_seconds_in_two_clusters(departure_seconds=departure_seconds)
 
-            if difference_with_first_list_of_departure_datetimes < difference_with_second_list_departure_datetimes:
-                first_list_of_travel_requests.append(travel_request)
-                first_list_of_departure_datetimes.append(departure_datetime)
-            else:
+        for travel_request, in_second_cluster in zip(travel_requests, second_cluster):
+            if in_second_cluster:
                 second_list_of_travel_requests.append(travel_request)
-                second_list_of_departure_datetimes.append(departure_datetime)
+            else:
+                first_list_of_travel_requests.append(travel_request)
 
     travel_requests_lists = {
         'first_list': first_list_of_travel_requests,
@@ -1425,25 +1541,29 @@ def handle_travel_requests_of_timetable_with_waiting_time_above_threshold(timeta
     travel_requests_with_waiting_time_above_threshold = \
         get_travel_requests_of_timetable_with_waiting_time_above_threshold(timetable=timetable)
 
+    # The travel_requests which are moved to other timetables are removed together, after the iteration,
+    # and the ones which cannot be served by other timetables are collected in remaining_travel_requests.
+    moved_travel_requests = []
+    remaining_travel_requests = []
+
     for dictionary_entry in travel_requests_with_waiting_time_above_threshold:
         travel_request = dictionary_entry.get('travel_request')
         waiting_time = dictionary_entry.get('waiting_time')
 
-        departure_datetime_differences = \
+        departure_datetime_differences = [
+            departure_datetime_difference_entry for departure_datetime_difference_entry in
             calculate_departure_datetime_differences_between_travel_request_and_timetables(
                 travel_request=travel_request,
                 timetables=timetables
             )
-
-        for departure_datetime_difference_entry in departure_datetime_differences:
-            current_timetable = departure_datetime_difference_entry.get('timetable')
-            departure_datetime_difference = departure_datetime_difference_entry.get('departure_datetime_difference')
-
-            if (departure_datetime_difference > waiting_time or
-                        departure_datetime_difference > average_waiting_time_threshold or
-                        departure_datetime_difference > individual_waiting_time_threshold or
-                        len(current_timetable.get('travel_requests')) >= maximum_bus_capacity):
-                departure_datetime_differences.remove(departure_datetime_difference_entry)
+            if not (departure_datetime_difference_entry.get('departure_datetime_difference') > waiting_time or
+                    departure_datetime_difference_entry.get('departure_datetime_difference') >
+                    average_waiting_time_threshold or
+                    departure_datetime_difference_entry.get('departure_datetime_difference') >
+                    individual_waiting_time_threshold or
+                    len(departure_datetime_difference_entry.get('timetable').get('travel_requests')) >=
+                    maximum_bus_capacity)
+        ]
 
         if len(departure_datetime_differences) > 0:
             timetable_with_minimum_departure_datetime_difference = \
@@ -1451,19 +1571,23 @@ def handle_travel_requests_of_timetable_with_waiting_time_above_threshold(timeta
                     departure_datetime_differences=departure_datetime_differences
                 )
 
-            add_travel_request_to_timetable_without_adjustments(
-                travel_request=travel_request,
-                timetable=timetable_with_minimum_departure_datetime_difference
-            )
-            remove_travel_request_from_timetable_without_adjustments(travel_request=travel_request, timetable=timetable)
-            travel_requests_with_waiting_time_above_threshold.remove(dictionary_entry)
+            if timetable_with_minimum_departure_datetime_difference is not timetable:
+                add_travel_request_to_timetable_without_adjustments(
+                    travel_request=travel_request,
+                    timetable=timetable_with_minimum_departure_datetime_difference
+                )
+                moved_travel_requests.append(travel_request)
+        else:
+            remaining_travel_requests.append(travel_request)
 
+    remove_travel_requests_from_timetable_without_adjustments(
+        travel_requests=moved_travel_requests,
+        timetable=timetable
+    )
     calculate_number_of_passengers_of_timetable(timetable=timetable)
     adjust_departure_datetimes_of_timetable(timetable=timetable)
 
     average_waiting_time_of_timetable = calculate_average_waiting_time_of_timetable_in_seconds(timetable=timetable)
-    remaining_travel_requests = [travel_request_entry.get('travel_request') for travel_request_entry in
-                                 travel_requests_with_waiting_time_above_threshold]
 
     if len(remaining_travel_requests) >= minimum_number_of_passengers_in_timetable:
 
@@ -1494,9 +1618,9 @@ def handle_undercrowded_timetable(timetable, timetables):
     :param timetables: [timetable_document]
     :return: None (Updates timetables)
     """
-    travel_requests = timetable.get('travel_requests')
+    moved_travel_requests = []
 
-    for travel_request in travel_requests:
+    for travel_request in timetable.get('travel_requests'):
         departure_datetime_differences = \
             calculate_departure_datetime_differences_between_travel_request_and_timetables(
                 travel_request=travel_request,
@@ -1508,17 +1632,18 @@ def handle_undercrowded_timetable(timetable, timetables):
                 departure_datetime_differences=departure_datetime_differences
             )
 
-        add_travel_request_to_timetable_without_adjustments(
-            travel_request=travel_request,
-            timetable=timetable_with_minimum_departure_datetime_difference
-        )
-
-        # travel_requests.remove(travel_request)
+        if timetable_with_minimum_departure_datetime_difference is not timetable:
+            add_travel_request_to_timetable_without_adjustments(
+                travel_request=travel_request,
+                timetable=timetable_with_minimum_departure_datetime_difference
+            )
+            moved_travel_requests.append(travel_request)
 
-        remove_travel_request_from_timetable_without_adjustments(
-            travel_request=travel_request,
-            timetable=timetable
-        )
+    # The travel_requests are removed after the iteration, in a single pass.
+    remove_travel_requests_from_timetable_without_adjustments(
+        travel_requests=moved_travel_requests,
+        timetable=timetable
+    )
 
 
 def handle_undercrowded_timetables(timetables):
@@ -1531,10 +1656,11 @@ def handle_undercrowded_timetables(timetables):
     undercrowded_timetables = get_undercrowded_timetables(timetables=timetables)
 
     for undercrowded_timetable in undercrowded_timetables:
-        travel_requests_of_undercrowded_timetable = list(undercrowded_timetable.get('travel_requests'))
-        travel_requests_of_undercrowded_timetables.extend(travel_requests_of_undercrowded_timetable)
-        timetables.remove(undercrowded_timetable)
-        del undercrowded_timetable
+        travel_requests_of_undercrowded_timetables.extend(undercrowded_timetable.get('travel_requests'))
+
+    # The undercrowded_timetables are identified by identity, instead of comparing whole timetable_documents.
+    undercrowded_timetable_ids = set(id(undercrowded_timetable) for undercrowded_timetable in undercrowded_timetables)
+    timetables[:] = [timetable for timetable in timetables if id(timetable) not in undercrowded_timetable_ids]
 
     return travel_requests_of_undercrowded_timetables
 
@@ -1680,23 +1806,40 @@ def remove_travel_request_from_timetable_with_adjustments(travel_request, timeta
     :param timetable: timetable_document
     :return: None (Updates timetable)
     """
+    number_of_travel_requests = len(timetable.get('travel_requests'))
     remove_travel_request_from_timetable_without_adjustments(travel_request=travel_request, timetable=timetable)
+
+    if len(timetable.get('travel_requests')) == number_of_travel_requests:
+        return
+
     adjust_departure_datetimes_of_timetable(timetable=timetable)
-    calculate_number_of_passengers_of_timetable(timetable=timetable)
+    update_number_of_passengers_of_timetable(travel_request=travel_request, timetable=timetable, increment=-1)
 
 
 def remove_travel_request_from_timetable_without_adjustments(travel_request, timetable):
     """
     Remove a travel_request from the list of travel_requests of a timetable, without adjusting the timetable_entries.
 
+    The removal of a single travel_request is linear in the number of travel_requests of the timetable, like
+    list.remove, so multiple travel_requests should be removed with
+    remove_travel_requests_from_timetable_without_adjustments, which scans the list once for all of them.
+
     :param travel_request: travel_request_document
     :param timetable: timetable_document
     :return: None (Updates timetable)
     """
-    travel_requests = timetable.get('travel_requests')
+    travel_requests_of_timetable = timetable.get('travel_requests')
+    object_id = travel_request.get('_id')
+
+    if object_id is None:
+        if travel_request in travel_requests_of_timetable:
+            travel_requests_of_timetable.remove(travel_request)
+        return
 
-    if travel_request in travel_requests:
-        travel_requests.remove(travel_request)
+    for index, travel_request_of_timetable in enumerate(travel_requests_of_timetable):
+        if travel_request_of_timetable.get('_id') == object_id:
+            del travel_requests_of_timetable[index]
+            return
 
 
 def remove_travel_requests_from_timetable_without_adjustments(travel_requests, timetable):
@@ -1708,11 +1851,50 @@ def remove_travel_requests_from_timetable_without_adjustments(travel_requests, t
     :param timetable: timetable_document
     :return: None (Updates timetable)
     """
-    travel_requests_of_timetable = timetable.get('travel_requests')
+    if len(travel_requests) == 0:
+        return
+
+    # The travel_requests which have been stored at the System Database are identified by their '_id',
+    # and membership is checked in a set, in a single pass which keeps the order of the remaining travel_requests.
+    # The rest of them are compared as whole documents, removing one occurrence for each one, like list.remove,
+    # which is linear in their number, since they are not stored and should be few.
+    object_ids_of_travel_requests = set()
+    travel_requests_without_object_id = []
 
     for travel_request in travel_requests:
-        if travel_request in travel_requests_of_timetable:
-            travel_requests_of_timetable.remove(travel_request)
+        object_id = travel_request.get('_id')
+
+        if object_id is None:
+            travel_requests_without_object_id.append(travel_request)
+        else:
+            object_ids_of_travel_requests.add(object_id)
+
+    remaining_travel_requests = []
+
+    for travel_request in timetable.get('travel_requests'):
+        object_id = travel_request.get('_id')
+
+        if object_id is not None and object_id in object_ids_of_travel_requests:
+            continue
+
+        if object_id is None and travel_request in travel_requests_without_object_id:
+            travel_requests_without_object_id.remove(travel_request)
+            continue
+
+        remaining_travel_requests.append(travel_request)
+
+    timetable.get('travel_requests')[:] = remaining_travel_requests
+
+
+def seconds_to_datetime(seconds):
+    """
+    Convert a number of seconds since the epoch to a datetime.
+
+    :param seconds: int
+    :return: provided_datetime: datetime
+    """
+    provided_datetime = epoch + timedelta(seconds=int(seconds))
+    return provided_datetime
 
 
 def sort_timetables_by_starting_datetime(timetables):
@@ -1722,5 +1904,76 @@ def sort_timetables_by_starting_datetime(timetables):
     :param timetables: [timetable_document]
     :return: None (Updates timetables)
     """
-    starting_datetimes = get_starting_datetimes_of_timetables(timetables=timetables)
-    quicksort(list_to_be_sorted=timetables, comparison_list=starting_datetimes, low=0, high=len(timetables)-1)
+    timetables.sort(key=get_starting_datetime_of_timetable)
+
+
+def split_departure_seconds_in_two_clusters(departure_seconds):
+    """
+    Split a list of departure_seconds into two clusters (1-D 2-means), so as the sum of squared differences
+    from the mean value of each cluster to be minimized.
+
+    The optimal clusters consist of consecutive values of the sorted departure_seconds, so all the possible
+    split positions are evaluated at once, using prefix sums. Equal departure_seconds belong to the same cluster,
+    unless all of them are equal. In that case, the last one forms the second cluster, so as an overcrowded
+    timetable to be divided in any case. If there are at least two departure_seconds, then both clusters
+    contain at least one of them.
+
+    :param departure_seconds: np.ndarray
+    :return: second_cluster: np.ndarray (bool, True for the departure_seconds of the second cluster)
+    """
+    number_of_departure_seconds = len(departure_seconds)
+    second_cluster = np.zeros(number_of_departure_seconds, dtype=bool)
+
+    if number_of_departure_seconds < 2:
+        return second_cluster
+
+    # A stable sort keeps the initial order of equal departure_seconds.
+    order = np.argsort(departure_seconds, kind='mergesort')
+    sorted_departure_seconds = np.asarray(departure_seconds, dtype=float)[order]
+
+    # The values are shifted to their minimum, so as the squared sums to remain precise.
+    sorted_departure_seconds -= sorted_departure_seconds[0]
+    prefix_sums = np.cumsum(sorted_departure_seconds)
+    prefix_squared_sums = np.cumsum(sorted_departure_seconds ** 2)
+
+    # The first cluster contains the first k values, for k in [1, number_of_departure_seconds - 1].
+    first_sizes = np.arange(1, number_of_departure_seconds)
+    second_sizes = number_of_departure_seconds - first_sizes
+    first_sums = prefix_sums[:-1]
+    second_sums = prefix_sums[-1] - first_sums
+    costs = (
+        prefix_squared_sums[:-1] - first_sums ** 2 / first_sizes +
+        (prefix_squared_sums[-1] - prefix_squared_sums[:-1]) - second_sums ** 2 / second_sizes
+    )
+    # Equal values belong to the same cluster, if there are at least two different values.
+    costs[sorted_departure_seconds[1:] == sorted_departure_seconds[:-1]] = np.inf
+
+    if np.isinf(costs).all():
+        # All the departure_seconds are equal, so the last one forms the second cluster.
+        split_position = number_of_departure_seconds - 1
+    else:
+        split_position = int(np.argmin(costs)) + 1
+
+    second_cluster[order[split_position:]] = True
+    return second_cluster
+
+
+def update_number_of_passengers_of_timetable(travel_request, timetable, increment):
+    """
+    Update the number of onboarding, deboarding, and current passengers of the timetable_entries of a timetable,
+    after adding (increment: 1) or removing (increment: -1) a travel_request, without recalculating them.
+
+    :param travel_request: travel_request_document
+    :param timetable: timetable_document
+    :param increment: int
+    :return: None (Updates timetable)
+    """
+    timetable_entries = timetable.get('timetable_entries')
+    starting_timetable_entry_index = travel_request.get('starting_timetable_entry_index')
+    ending_timetable_entry_index = travel_request.get('ending_timetable_entry_index')
+
+    timetable_entries[starting_timetable_entry_index]['number_of_onboarding_passengers'] += increment
+    timetable_entries[ending_timetable_entry_index]['number_of_deboarding_passengers'] += increment
+
+    for timetable_entry in timetable_entries[starting_timetable_entry_index:ending_timetable_entry_index + 1]:
+        timetable_entry['number_of_current_passengers'] += increment
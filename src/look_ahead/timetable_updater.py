@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -151,20 +159,30 @@ __credits__ = [
 
 
 class TimetableUpdater(object):
-    def __init__(self, bus_stops, timetables, travel_requests):
+    def __init__(self, bus_stops, timetables, travel_requests, route_generator_response=None,
+                 route_generator_responses_of_timetables=None):
         """
-        Initialize the TimetableUpdater and send a request to the Route Generator in order to
-        identify the less time-consuming route which connects the provided bus_stops.
+        Initialize the TimetableUpdater and, unless a route_generator_response or a route_generator_response
+        for each one of the timetables is provided, send a request to the Route Generator in order to identify
+        the less time-consuming route which connects the bus_stops.
 
         :param bus_stops: [bus_stop_document]
         :param timetables: [timetable_document]
         :param travel_requests: [travel_request_document]
+        :param route_generator_response: get_route_between_multiple_bus_stops
+        :param route_generator_responses_of_timetables: [get_route_between_multiple_bus_stops]
+               (in the same order as the timetables)
         :return: None
         """
         self.bus_stops = bus_stops
         self.timetables = timetables
         self.travel_requests = travel_requests
-        self.route_generator_response = get_route_between_multiple_bus_stops(bus_stops=bus_stops)
+        self.route_generator_responses_of_timetables = route_generator_responses_of_timetables
+
+        if route_generator_response is None and route_generator_responses_of_timetables is None:
+            route_generator_response = get_route_between_multiple_bus_stops(bus_stops=bus_stops)
+
+        self.route_generator_response = route_generator_response
 
 
 def update_entries_of_timetable(timetable, route_generator_response):
@@ -207,9 +225,11 @@ def update_entries_of_timetable(timetable, route_generator_response):
     )
 
 
-def update_entries_of_timetables(timetables, route_generator_response):
+def update_entries_of_timetables(timetables, route_generator_response=None,
+                                 route_generator_responses_of_timetables=None):
     """
-    Update the timetable_entries of a list of timetables, taking into consideration the route_generator_response.
+    Update the timetable_entries of a list of timetables, taking into consideration the route_generator_response,
+    or the route_generator_response of each timetable, if route_generator_responses_of_timetables is provided.
 
     :param timetables: [timetable_documents]
     :param route_generator_response: [{
@@ -218,8 +238,12 @@ def update_entries_of_timetables(timetables, route_generator_response):
                'route': {'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
                          'distances_from_starting_node', 'times_from_starting_node',
                          'distances_from_previous_node', 'times_from_previous_node'}}]
+    :param route_generator_responses_of_timetables: [route_generator_response] (in the same order as the timetables)
 
     :return: None (Updates timetables)
     """
-    for timetable in timetables:
-        update_entries_of_timetable(timetable=timetable, route_generator_response=route_generator_response)
+    if route_generator_responses_of_timetables is None:
+        route_generator_responses_of_timetables = [route_generator_response] * len(timetables)
+
+    for timetable, route_generator_response_of_timetable in zip(timetables, route_generator_responses_of_timetables):
+        update_entries_of_timetable(timetable=timetable, route_generator_response=route_generator_response_of_timetable)
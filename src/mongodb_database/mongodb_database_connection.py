@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -139,7 +147,9 @@ get_waypoints_between_multiple_bus_stops: [{
 }]
 """
 from bson import ObjectId
-from pymongo import MongoClient
+from pymongo import MongoClient, ASCENDING, ReturnDocument, UpdateOne
+from src.common.parameters import mongodb_cursor_batch_size
+from src.geospatial_data.point import Point, convex_hull
 from src.look_ahead.timetable_generator import print_timetables
 
 __author__ = 'Eleftherios Anagnostopoulos'
@@ -149,6 +159,85 @@ __credits__ = [
     'Aneta Vulgarakis Feljan (Senior Researcher at Ericsson AB) - email: aneta.vulgarakis@ericsson.com'
 ]
 
+# Declarative specification of the indexes which are maintained for each collection.
+# Each collection attribute maps to a list of indexes, and each index is a list of (field, order) keys,
+# covering the query patterns of the find_*, delete_* and get_maximum_or_minimum methods.
+indexes_specification = {
+    'address_documents_collection': [
+        [('name', ASCENDING)],
+        [('node_id', ASCENDING)]
+    ],
+    'bus_line_documents_collection': [
+        [('bus_line_id', ASCENDING)]
+    ],
+    'bus_stop_documents_collection': [
+        [('osm_id', ASCENDING)],
+        [('name', ASCENDING)]
+    ],
+    'bus_stop_waypoints_documents_collection': [
+        [('starting_bus_stop._id', ASCENDING), ('ending_bus_stop._id', ASCENDING)],
+        [('starting_bus_stop.name', ASCENDING), ('ending_bus_stop.name', ASCENDING)]
+    ],
+    'bus_vehicle_documents_collection': [
+        [('bus_vehicle_id', ASCENDING)]
+    ],
+    'edge_documents_collection': [
+        [('starting_node.osm_id', ASCENDING), ('ending_node.osm_id', ASCENDING)],
+        [('ending_node.osm_id', ASCENDING)]
+    ],
+    'node_documents_collection': [
+        [('osm_id', ASCENDING)]
+    ],
+    'point_documents_collection': [
+        [('osm_id', ASCENDING)]
+    ],
+    'timetable_documents_collection': [
+        [('timetable_id', ASCENDING)],
+        [('bus_line_id', ASCENDING)]
+    ],
+    'traffic_event_documents_collection': [
+        [('event_id', ASCENDING)],
+        [('datetime', ASCENDING)],
+        [('modified_datetime', ASCENDING)]
+    ],
+    'travel_request_documents_collection': [
+        [('client_id', ASCENDING)],
+        [('bus_line_id', ASCENDING), ('departure_datetime', ASCENDING)],
+        [('departure_datetime', ASCENDING)]
+    ],
+    'way_documents_collection': [
+        [('osm_id', ASCENDING)]
+    ]
+}
+
+# Projections which can be provided to the find_* methods, so as only the fields
+# which are required by the corresponding computations to be retrieved.
+#
+# routing_edge_projection: Fields of edge_documents which are evaluated by the Route Generator.
+routing_edge_projection = {
+    'starting_node.osm_id': 1,
+    'starting_node.point': 1,
+    'ending_node.osm_id': 1,
+    'ending_node.point': 1,
+    'max_speed': 1,
+    'road_type': 1,
+    'traffic_density': 1
+}
+# traffic_matching_edge_projection: Fields of edge_documents which are evaluated by the Traffic Data Parser,
+# in order to correspond traffic_events to edges and to maintain their traffic_density.
+traffic_matching_edge_projection = {
+    'starting_node.osm_id': 1,
+    'starting_node.point': 1,
+    'ending_node.osm_id': 1,
+    'ending_node.point': 1,
+    'traffic_density': 1
+}
+# timetable_waiting_time_projection: The routes of the timetable_entries are excluded, since the waiting times
+# are calculated using only the departure_datetimes of timetable_entries and travel_requests.
+timetable_waiting_time_projection = {
+    'timetable_entries.route': 0
+}
+
 
 class MongodbDatabaseConnection(object):
     """
@@ -160,6 +249,7 @@ class MongodbDatabaseConnection(object):
         - BusStopDocuments
         - BusStopWaypointsDocuments
         - BusVehicleDocuments
+        - CounterDocuments
         - EdgeDocuments
         - NodeDocuments
         - PointDocuments
@@ -177,8 +267,10 @@ class MongodbDatabaseConnection(object):
         self.bus_stop_documents_collection = self.db.BusStopDocuments
         self.bus_stop_waypoints_documents_collection = self.db.BusStopWaypointsDocuments
         self.bus_vehicle_documents_collection = self.db.BusVehicleDocuments
+        self.counter_documents_collection = self.db.CounterDocuments
         self.edge_documents_collection = self.db.EdgeDocuments
         self.node_documents_collection = self.db.NodeDocuments
+        self.operation_area_documents_collection = self.db.OperationAreaDocuments
         self.point_documents_collection = self.db.PointDocuments
         self.timetable_documents_collection = self.db.TimetableDocuments
         self.traffic_event_documents_collection = self.db.TrafficEventDocuments
@@ -191,8 +283,10 @@ class MongodbDatabaseConnection(object):
         self.clear_bus_stop_documents_collection()
         self.clear_bus_stop_waypoints_documents_collection()
         self.clear_bus_vehicle_documents_collection()
+        self.clear_counter_documents_collection()
         self.clear_edge_documents_collection()
         self.clear_node_documents_collection()
+        self.clear_operation_area_documents_collection()
         self.clear_point_documents_collection()
         self.clear_timetable_documents_collection()
         self.clear_traffic_event_documents_collection()
@@ -215,6 +309,7 @@ class MongodbDatabaseConnection(object):
         :return: The number of deleted documents.
         """
         result = self.bus_line_documents_collection.delete_many({})
+        self.counter_documents_collection.delete_one({'_id': 'bus_line'})
         return result.deleted_count
 
     def clear_bus_stop_documents_collection(self):
@@ -242,6 +337,16 @@ class MongodbDatabaseConnection(object):
         :return: The number of deleted documents.
         """
         result = self.bus_vehicle_documents_collection.delete_many({})
+        self.counter_documents_collection.delete_one({'_id': 'bus_vehicle'})
+        return result.deleted_count
+
+    def clear_counter_documents_collection(self):
+        """
+        Delete all the documents of the CounterDocuments collection.
+
+        :return: The number of deleted documents.
+        """
+        result = self.counter_documents_collection.delete_many({})
         return result.deleted_count
 
     def clear_edge_documents_collection(self):
@@ -251,6 +356,7 @@ class MongodbDatabaseConnection(object):
         :return: The number of deleted documents.
         """
         result = self.edge_documents_collection.delete_many({})
+        self.operation_area_documents_collection.delete_one({'_id': 'operation_area'})
         return result.deleted_count
 
     def clear_node_documents_collection(self):
@@ -262,6 +368,15 @@ class MongodbDatabaseConnection(object):
         result = self.node_documents_collection.delete_many({})
         return result.deleted_count
 
+    def clear_operation_area_documents_collection(self):
+        """
+        Delete all the documents of the OperationAreaDocuments collection.
+
+        :return: The number of deleted documents.
+        """
+        result = self.operation_area_documents_collection.delete_many({})
+        return result.deleted_count
+
     def clear_point_documents_collection(self):
         """
         Delete all the documents of the PointDocuments collection.
@@ -278,6 +393,7 @@ class MongodbDatabaseConnection(object):
         :return: The number of deleted documents.
         """
         result = self.timetable_documents_collection.delete_many({})
+        self.counter_documents_collection.delete_one({'_id': 'timetable'})
         return result.deleted_count
 
     def clear_traffic_density(self):
@@ -308,6 +424,7 @@ class MongodbDatabaseConnection(object):
         :return: The number of deleted documents.
         """
         result = self.travel_request_documents_collection.delete_many({})
+        self.counter_documents_collection.delete_one({'_id': 'travel_request'})
         return result.deleted_count
 
     def clear_way_documents_collection(self):
@@ -597,6 +714,11 @@ class MongodbDatabaseConnection(object):
         else:
             return False
 
+        # The operation_area_document cannot shrink incrementally, so it is deleted
+        # and rebuilt from the remaining edge_documents, when it is requested again.
+        if result.deleted_count == 1:
+            self.operation_area_documents_collection.delete_one({'_id': 'operation_area'})
+
         return result.deleted_count == 1
 
     def delete_edge_documents(self, object_ids=None, starting_node_osm_id=None, ending_node_osm_id=None):
@@ -624,6 +746,9 @@ class MongodbDatabaseConnection(object):
         else:
             return 0
 
+        if result.deleted_count > 0:
+            self.operation_area_documents_collection.delete_one({'_id': 'operation_area'})
+
         return result.deleted_count
 
     def delete_node_document(self, object_id=None, osm_id=None):
@@ -905,7 +1030,35 @@ class MongodbDatabaseConnection(object):
 
         return result.deleted_count
 
-    def find_address_document(self, object_id=None, name=None, node_id=None, longitude=None, latitude=None):
+    def drop_indexes(self):
+        """
+        Drop the indexes of all the collections, apart from the default index on _id.
+
+        :return: None
+        """
+        for collection_name in indexes_specification:
+            collection = getattr(self, collection_name)
+            collection.drop_indexes()
+
+    def ensure_indexes(self):
+        """
+        Create the indexes which are included in the indexes_specification, if they do not already exist.
+
+        The indexes are persisted by MongoDB, so this is called once while setting up the System Database
+        (by the OsmParser), instead of every time a connection is established.
+
+        :return: created_indexes: {collection_name -> [index_name]}
+        """
+        created_indexes = {}
+
+        for collection_name, indexes in indexes_specification.iteritems():
+            collection = getattr(self, collection_name)
+            created_indexes[collection_name] = [collection.create_index(keys=index) for index in indexes]
+
+        return created_indexes
+
+    def find_address_document(self, object_id=None, name=None, node_id=None, longitude=None, latitude=None,
+                              projection=None):
         """
         Retrieve an address_document.
 
@@ -914,33 +1067,34 @@ class MongodbDatabaseConnection(object):
         :param node_id: int
         :param longitude: float
         :param latitude: float
+        :param projection: {field -> 0 or 1}
         :return: address_document
         """
         if object_id is not None:
             address_document = self.address_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif name is not None:
             address_document = self.address_documents_collection.find_one({
                 'name': name
-            })
+            }, projection)
         elif node_id is not None:
             address_document = self.address_documents_collection.find_one({
                 'node_id': node_id
-            })
+            }, projection)
         elif longitude is not None and latitude is not None:
             address_document = self.address_documents_collection.find_one({
                 'point': {
                     'longitude': longitude,
                     'latitude': latitude
                 }
-            })
+            }, projection)
         else:
             return None
 
         return address_document
 
-    def find_address_documents(self, object_ids=None, names=None, node_ids=None, in_dictionary=False):
+    def find_address_documents(self, object_ids=None, names=None, node_ids=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple address_documents.
 
@@ -948,23 +1102,24 @@ class MongodbDatabaseConnection(object):
         :param names: [string]
         :param node_ids: [int]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: address_documents: [address_document] or {name -> address_document}
         """
         if object_ids is not None:
             processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
             address_documents_cursor = self.address_documents_collection.find({
                 '_id': {'$in': processed_object_ids}
-            })
+            }, projection)
         elif names is not None:
             address_documents_cursor = self.address_documents_collection.find({
                 'name': {'$in': names}
-            })
+            }, projection)
         elif node_ids is not None:
             address_documents_cursor = self.address_documents_collection.find({
                 'node_id': {'$in': node_ids}
-            })
+            }, projection)
         else:
-            address_documents_cursor = self.address_documents_collection.find({})
+            address_documents_cursor = self.address_documents_collection.find({}, projection)
 
         if in_dictionary:
             address_documents = {}
@@ -977,47 +1132,43 @@ class MongodbDatabaseConnection(object):
 
         return address_documents
 
-    def find_bus_line_document(self, object_id=None, bus_line_id=None):
+    def find_bus_line_document(self, object_id=None, bus_line_id=None, projection=None):
         """
         Retrieve a bus_line_document.
 
         :param object_id: ObjectId
         :param bus_line_id: int
+        :param projection: {field -> 0 or 1}
         :return: bus_line_document
         """
         if object_id is not None:
             bus_line_document = self.bus_line_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif bus_line_id is not None:
             bus_line_document = self.bus_line_documents_collection.find_one({
                 'bus_line_id': bus_line_id
-            })
+            }, projection)
         else:
             return None
 
         return bus_line_document
 
-    def find_bus_line_documents(self, object_ids=None, bus_line_ids=None, in_dictionary=False):
+    def find_bus_line_documents(self, object_ids=None, bus_line_ids=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple bus_line_documents.
 
         :param object_ids: [ObjectId]
         :param bus_line_ids: [int]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: bus_line_documents: [bus_line_document] or {bus_line_id -> bus_line_document}
         """
-        if object_ids is not None:
-            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
-            bus_line_documents_cursor = self.bus_line_documents_collection.find({
-                '_id': {'$in': processed_object_ids}
-            })
-        elif bus_line_ids is not None:
-            bus_line_documents_cursor = self.bus_line_documents_collection.find({
-                'bus_line_id': {'$in': bus_line_ids}
-            })
-        else:
-            bus_line_documents_cursor = self.bus_line_documents_collection.find({})
+        bus_line_documents_cursor = self.get_bus_line_documents_cursor(
+            object_ids=object_ids,
+            bus_line_ids=bus_line_ids,
+            projection=projection
+        )
 
         if in_dictionary:
             bus_line_documents = {}
@@ -1030,7 +1181,8 @@ class MongodbDatabaseConnection(object):
 
         return bus_line_documents
 
-    def find_bus_stop_document(self, object_id=None, osm_id=None, name=None, longitude=None, latitude=None):
+    def find_bus_stop_document(self, object_id=None, osm_id=None, name=None, longitude=None, latitude=None,
+                               projection=None):
         """
         Retrieve a bus_stop_document.
 
@@ -1039,33 +1191,34 @@ class MongodbDatabaseConnection(object):
         :param name: string
         :param longitude: float
         :param latitude: float
+        :param projection: {field -> 0 or 1}
         :return: bus_stop_document
         """
         if object_id is not None:
             bus_stop_document = self.bus_stop_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif osm_id is not None:
             bus_stop_document = self.bus_stop_documents_collection.find_one({
                 'osm_id': osm_id
-            })
+            }, projection)
         elif name is not None:
             bus_stop_document = self.bus_stop_documents_collection.find_one({
                 'name': name
-            })
+            }, projection)
         elif longitude is not None and latitude is not None:
             bus_stop_document = self.bus_stop_documents_collection.find_one({
                 'point': {
                     'longitude': longitude,
                     'latitude': latitude
                 }
-            })
+            }, projection)
         else:
             return None
 
         return bus_stop_document
 
-    def find_bus_stop_documents(self, object_ids=None, osm_ids=None, names=None, in_dictionary=False):
+    def find_bus_stop_documents(self, object_ids=None, osm_ids=None, names=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple bus_stop_documents.
 
@@ -1073,23 +1226,24 @@ class MongodbDatabaseConnection(object):
         :param osm_ids: [int]
         :param names: [string]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: bus_stop_documents: [bus_stop_document] or {name -> bus_stop_document}
         """
         if object_ids is not None:
             processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
             bus_stop_documents_cursor = self.bus_stop_documents_collection.find({
                 '_id': {'$in': processed_object_ids}
-            })
+            }, projection)
         elif osm_ids is not None:
             bus_stop_documents_cursor = self.bus_stop_documents_collection.find({
                 'osm_id': {'$in': osm_ids}
-            })
+            }, projection)
         elif names is not None:
             bus_stop_documents_cursor = self.bus_stop_documents_collection.find({
                 'name': {'$in': names}
-            })
+            }, projection)
         else:
-            bus_stop_documents_cursor = self.bus_stop_documents_collection.find({})
+            bus_stop_documents_cursor = self.bus_stop_documents_collection.find({}, projection)
 
         if in_dictionary:
             bus_stop_documents = {}
@@ -1103,7 +1257,7 @@ class MongodbDatabaseConnection(object):
         return bus_stop_documents
 
     def find_bus_stop_waypoints_document(self, object_id=None, starting_bus_stop=None, ending_bus_stop=None,
-                                         starting_bus_stop_name=None, ending_bus_stop_name=None):
+                                         starting_bus_stop_name=None, ending_bus_stop_name=None, projection=None):
         """
         Retrieve a bus_stop_waypoints_document.
 
@@ -1112,28 +1266,30 @@ class MongodbDatabaseConnection(object):
         :param ending_bus_stop: {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}
         :param starting_bus_stop_name: string
         :param ending_bus_stop_name: string
+        :param projection: {field -> 0 or 1}
         :return: bus_stop_waypoints_document
         """
         if object_id is not None:
             bus_stop_waypoints_document = self.bus_stop_waypoints_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif starting_bus_stop is not None and ending_bus_stop is not None:
             bus_stop_waypoints_document = self.bus_stop_waypoints_documents_collection.find_one({
                 'starting_bus_stop._id': starting_bus_stop.get('_id'),
                 'ending_bus_stop._id': ending_bus_stop.get('_id')
-            })
+            }, projection)
         elif starting_bus_stop_name is not None and ending_bus_stop_name is not None:
             bus_stop_waypoints_document = self.bus_stop_waypoints_documents_collection.find_one({
                 'starting_bus_stop.name': starting_bus_stop_name,
                 'ending_bus_stop.name': ending_bus_stop_name
-            })
+            }, projection)
         else:
             return None
 
         return bus_stop_waypoints_document
 
-    def find_bus_stop_waypoints_documents(self, object_ids=None, bus_stops=None, bus_stop_names=None, bus_line_id=None):
+    def find_bus_stop_waypoints_documents(self, object_ids=None, bus_stops=None, bus_stop_names=None, bus_line_id=None,
+                                          projection=None):
         """
         Retrieve multiple bus_stop_waypoints_documents.
 
@@ -1141,6 +1297,7 @@ class MongodbDatabaseConnection(object):
         :param bus_stops: [{'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}]
         :param bus_stop_names: [string]
         :param bus_line_id: int
+        :param projection: {field -> 0 or 1}
         :return: bus_stop_waypoints_documents: [bus_stop_waypoints_document]
         """
         bus_stop_waypoints_documents = []
@@ -1149,7 +1306,7 @@ class MongodbDatabaseConnection(object):
             processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
             bus_stop_waypoints_documents_cursor = self.bus_stop_waypoints_documents_collection.find({
                 '_id': {'$in': processed_object_ids}
-            })
+            }, projection)
             bus_stop_waypoints_documents.extend(list(bus_stop_waypoints_documents_cursor))
 
         elif bus_stops is not None:
@@ -1160,7 +1317,8 @@ class MongodbDatabaseConnection(object):
                 ending_bus_stop = bus_stops[i + 1]
                 bus_stop_waypoints_document = self.find_bus_stop_waypoints_document(
                     starting_bus_stop=starting_bus_stop,
-                    ending_bus_stop=ending_bus_stop
+                    ending_bus_stop=ending_bus_stop,
+                    projection=projection
                 )
                 bus_stop_waypoints_documents.append(bus_stop_waypoints_document)
 
@@ -1172,7 +1330,8 @@ class MongodbDatabaseConnection(object):
                 ending_bus_stop_name = bus_stop_names[i + 1]
                 bus_stop_waypoints_document = self.find_bus_stop_waypoints_document(
                     starting_bus_stop_name=starting_bus_stop_name,
-                    ending_bus_stop_name=ending_bus_stop_name
+                    ending_bus_stop_name=ending_bus_stop_name,
+                    projection=projection
                 )
                 bus_stop_waypoints_documents.append(bus_stop_waypoints_document)
 
@@ -1188,12 +1347,13 @@ class MongodbDatabaseConnection(object):
                     ending_bus_stop = retrieved_bus_stops[i + 1]
                     bus_stop_waypoints_document = self.find_bus_stop_waypoints_document(
                         starting_bus_stop=starting_bus_stop,
-                        ending_bus_stop=ending_bus_stop
+                        ending_bus_stop=ending_bus_stop,
+                        projection=projection
                     )
                     bus_stop_waypoints_documents.append(bus_stop_waypoints_document)
 
         else:
-            bus_stop_waypoints_documents_cursor = self.bus_stop_waypoints_documents_collection.find({})
+            bus_stop_waypoints_documents_cursor = self.bus_stop_waypoints_documents_collection.find({}, projection)
             bus_stop_waypoints_documents.extend(list(bus_stop_waypoints_documents_cursor))
 
         return bus_stop_waypoints_documents
@@ -1254,47 +1414,49 @@ class MongodbDatabaseConnection(object):
 
         return detailed_bus_stop_waypoints_documents
 
-    def find_bus_vehicle_document(self, object_id=None, bus_vehicle_id=None):
+    def find_bus_vehicle_document(self, object_id=None, bus_vehicle_id=None, projection=None):
         """
         Retrieve a bus_vehicle_document.
 
         :param object_id: ObjectId
         :param bus_vehicle_id: int
+        :param projection: {field -> 0 or 1}
         :return: bus_vehicle_document
         """
         if object_id is not None:
             bus_vehicle_document = self.bus_vehicle_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif bus_vehicle_id is not None:
             bus_vehicle_document = self.bus_vehicle_documents_collection.find_one({
                 'bus_vehicle_id': bus_vehicle_id
-            })
+            }, projection)
         else:
             return None
 
         return bus_vehicle_document
 
-    def find_bus_vehicle_documents(self, object_ids=None, bus_vehicle_ids=None, in_dictionary=False):
+    def find_bus_vehicle_documents(self, object_ids=None, bus_vehicle_ids=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple bus_vehicle_documents.
 
         :param object_ids: [ObjectId]
         :param bus_vehicle_ids: [int]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: bus_vehicle_documents: [bus_vehicle_document] or {bus_vehicle_id -> bus_vehicle_document}
         """
         if object_ids is not None:
             processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
             bus_vehicle_documents_cursor = self.bus_vehicle_documents_collection.find({
                 '_id': {'$in': processed_object_ids}
-            })
+            }, projection)
         elif bus_vehicle_ids is not None:
             bus_vehicle_documents_cursor = self.bus_vehicle_documents_collection.find({
                 'bus_vehicle_id': {'$in': bus_vehicle_ids}
-            })
+            }, projection)
         else:
-            bus_vehicle_documents_cursor = self.bus_vehicle_documents_collection.find({})
+            bus_vehicle_documents_cursor = self.bus_vehicle_documents_collection.find({}, projection)
 
         if in_dictionary:
             bus_vehicle_documents = {}
@@ -1307,31 +1469,32 @@ class MongodbDatabaseConnection(object):
 
         return bus_vehicle_documents
 
-    def find_edge_document(self, object_id=None, starting_node_osm_id=None, ending_node_osm_id=None):
+    def find_edge_document(self, object_id=None, starting_node_osm_id=None, ending_node_osm_id=None, projection=None):
         """
         Retrieve an edge_document.
 
         :param object_id: ObjectId
         :param starting_node_osm_id: int
         :param ending_node_osm_id: int
+        :param projection: {field -> 0 or 1}
         :return: edge_document
         """
         if object_id is not None:
             edge_document = self.edge_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif starting_node_osm_id is not None and ending_node_osm_id is not None:
             edge_document = self.edge_documents_collection.find_one({
                 'starting_node.osm_id': starting_node_osm_id,
-                'ending_node.oms_id': ending_node_osm_id}
-            )
+                'ending_node.osm_id': ending_node_osm_id
+            }, projection)
         else:
             return None
 
         return edge_document
 
     def find_edge_documents(self, object_ids=None, starting_node_osm_id=None,
-                            ending_node_osm_id=None, in_dictionary=False):
+                            ending_node_osm_id=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple edge_documents.
 
@@ -1339,23 +1502,15 @@ class MongodbDatabaseConnection(object):
         :param starting_node_osm_id: int
         :param ending_node_osm_id: int
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: edge_documents: [edge_document] or {starting_node_osm_id -> [edge_document]}
         """
-        if object_ids is not None:
-            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
-            edge_documents_cursor = self.edge_documents_collection.find({
-                '_id': {'$in': processed_object_ids}
-            })
-        elif starting_node_osm_id is not None:
-            edge_documents_cursor = self.edge_documents_collection.find({
-                'starting_node.osm_id': starting_node_osm_id
-            })
-        elif ending_node_osm_id is not None:
-            edge_documents_cursor = self.edge_documents_collection.find({
-                'ending_node.oms_id': ending_node_osm_id
-            })
-        else:
-            edge_documents_cursor = self.edge_documents_collection.find({})
+        edge_documents_cursor = self.get_edge_documents_cursor(
+            object_ids=object_ids,
+            starting_node_osm_id=starting_node_osm_id,
+            ending_node_osm_id=ending_node_osm_id,
+            projection=projection
+        )
 
         if in_dictionary:
             edge_documents = {}
@@ -1366,13 +1521,13 @@ class MongodbDatabaseConnection(object):
                 if starting_node_osm_id in edge_documents:
                     edge_documents[starting_node_osm_id].append(edge_document)
                 else:
-                    edge_documents[starting_node_osm_id] = list(edge_document)
+                    edge_documents[starting_node_osm_id] = [edge_document]
         else:
             edge_documents = list(edge_documents_cursor)
 
         return edge_documents
 
-    def find_node_document(self, object_id=None, osm_id=None, longitude=None, latitude=None):
+    def find_node_document(self, object_id=None, osm_id=None, longitude=None, latitude=None, projection=None):
         """
         Retrieve a node_document.
 
@@ -1380,48 +1535,44 @@ class MongodbDatabaseConnection(object):
         :param osm_id: int
         :param longitude: float
         :param latitude: float
+        :param projection: {field -> 0 or 1}
         :return: node_document
         """
         if object_id is not None:
             node_document = self.node_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif osm_id is not None:
             node_document = self.node_documents_collection.find_one({
                 'osm_id': osm_id
-            })
+            }, projection)
         elif longitude is not None and latitude is not None:
             node_document = self.node_documents_collection.find_one({
                 'point': {
                     'longitude': longitude,
                     'latitude': latitude
                 }
-            })
+            }, projection)
         else:
             return None
 
         return node_document
 
-    def find_node_documents(self, object_ids=None, osm_ids=None, in_dictionary=False):
+    def find_node_documents(self, object_ids=None, osm_ids=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple node_documents.
 
         :param object_ids: [ObjectId]
         :param osm_ids: [int]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: node_documents: [node_document] or {osm_id -> node_document}
         """
-        if object_ids is not None:
-            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
-            node_documents_cursor = self.node_documents_collection.find({
-                '_id': {'$in': processed_object_ids}
-            })
-        elif osm_ids is not None:
-            node_documents_cursor = self.node_documents_collection.find({
-                'osm_id': {'$in': osm_ids}
-            })
-        else:
-            node_documents_cursor = self.node_documents_collection.find({})
+        node_documents_cursor = self.get_node_documents_cursor(
+            object_ids=object_ids,
+            osm_ids=osm_ids,
+            projection=projection
+        )
 
         if in_dictionary:
             node_documents = {}
@@ -1434,7 +1585,19 @@ class MongodbDatabaseConnection(object):
 
         return node_documents
 
-    def find_point_document(self, object_id=None, osm_id=None, longitude=None, latitude=None):
+    def find_operation_area_document(self, projection=None):
+        """
+        Retrieve the operation_area_document.
+
+        :param projection: {field -> 0 or 1}
+        :return: operation_area_document (None if it has not been created)
+        """
+        operation_area_document = self.operation_area_documents_collection.find_one({
+            '_id': 'operation_area'
+        }, projection)
+        return operation_area_document
+
+    def find_point_document(self, object_id=None, osm_id=None, longitude=None, latitude=None, projection=None):
         """
         Retrieve a point_document.
 
@@ -1442,48 +1605,44 @@ class MongodbDatabaseConnection(object):
         :param osm_id: int
         :param longitude: float
         :param latitude: float
+        :param projection: {field -> 0 or 1}
         :return: point_document
         """
         if object_id is not None:
             point_document = self.point_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif osm_id is not None:
             point_document = self.point_documents_collection.find_one({
                 'osm_id': osm_id
-            })
+            }, projection)
         elif longitude is not None and latitude is not None:
             point_document = self.point_documents_collection.find_one({
                 'point': {
                     'longitude': longitude,
                     'latitude': latitude
                 }
-            })
+            }, projection)
         else:
             return None
 
         return point_document
 
-    def find_point_documents(self, object_ids=None, osm_ids=None, in_dictionary=False):
+    def find_point_documents(self, object_ids=None, osm_ids=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple point_documents.
 
         :param object_ids: [ObjectId]
         :param osm_ids: [int]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: point_documents: [point_document] or {osm_id -> point_document}
         """
-        if object_ids is not None:
-            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
-            point_documents_cursor = self.point_documents_collection.find({
-                '_id': {'$in': processed_object_ids}
-            })
-        elif osm_ids is not None:
-            point_documents_cursor = self.point_documents_collection.find({
-                'osm_id': {'$in': osm_ids}
-            })
-        else:
-            point_documents_cursor = self.point_documents_collection.find({})
+        point_documents_cursor = self.get_point_documents_cursor(
+            object_ids=object_ids,
+            osm_ids=osm_ids,
+            projection=projection
+        )
 
         if in_dictionary:
             point_documents = {}
@@ -1496,28 +1655,30 @@ class MongodbDatabaseConnection(object):
 
         return point_documents
 
-    def find_timetable_document(self, object_id=None, timetable_id=None):
+    def find_timetable_document(self, object_id=None, timetable_id=None, projection=None):
         """
         Retrieve a timetable_document.
 
         :param object_id: ObjectId
         :param timetable_id: int
+        :param projection: {field -> 0 or 1}
         :return: timetable_document
         """
         if object_id is not None:
             timetable_document = self.timetable_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif timetable_id is not None:
             timetable_document = self.timetable_documents_collection.find_one({
-                '_id': ObjectId(object_id)
-            })
+                'timetable_id': timetable_id
+            }, projection)
         else:
             return None
 
         return timetable_document
 
-    def find_timetable_documents(self, object_ids=None, timetable_ids=None, bus_line_ids=None, in_dictionary=False):
+    def find_timetable_documents(self, object_ids=None, timetable_ids=None, bus_line_ids=None, in_dictionary=False,
+                                 projection=None):
         """
         Retrieve multiple timetable_documents.
 
@@ -1525,23 +1686,24 @@ class MongodbDatabaseConnection(object):
         :param timetable_ids: [int]
         :param bus_line_ids: [int]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: timetable_documents: [timetable_document] or {timetable_id -> timetable_document}
         """
         if object_ids is not None:
             processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
             timetable_documents_cursor = self.timetable_documents_collection.find({
                 '_id': {'$in': processed_object_ids}
-            })
+            }, projection)
         elif timetable_ids is not None:
             timetable_documents_cursor = self.timetable_documents_collection.find({
                 'timetable_id': {'$in': timetable_ids}
-            })
+            }, projection)
         elif bus_line_ids is not None:
             timetable_documents_cursor = self.timetable_documents_collection.find({
                 'bus_line_id': {'$in': bus_line_ids}
-            })
+            }, projection)
         else:
-            timetable_documents_cursor = self.timetable_documents_collection.find({})
+            timetable_documents_cursor = self.timetable_documents_collection.find({}, projection)
 
         if in_dictionary:
             timetable_documents = {}
@@ -1554,47 +1716,43 @@ class MongodbDatabaseConnection(object):
 
         return timetable_documents
 
-    def find_traffic_event_document(self, object_id=None, event_id=None):
+    def find_traffic_event_document(self, object_id=None, event_id=None, projection=None):
         """
         Retrieve a traffic_event_document.
 
         :param object_id: ObjectId
         :param event_id: string
+        :param projection: {field -> 0 or 1}
         :return: traffic_event_document
         """
         if object_id is not None:
             traffic_event_document = self.traffic_event_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif event_id is not None:
             traffic_event_document = self.traffic_event_documents_collection.find_one({
                 'event_id': event_id
-            })
+            }, projection)
         else:
             return None
 
         return traffic_event_document
 
-    def find_traffic_event_documents(self, object_ids=None, event_ids=None, in_dictionary=False):
+    def find_traffic_event_documents(self, object_ids=None, event_ids=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple traffic_event_documents.
 
         :param object_ids: [ObjectId]
         :param event_ids: [string]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: traffic_event_documents: [traffic_event_document] or {event_id -> traffic_event_document}
         """
-        if object_ids is not None:
-            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
-            traffic_event_documents_cursor = self.traffic_event_documents_collection.find({
-                '_id': {'$in': processed_object_ids}
-            })
-        elif event_ids is not None:
-            traffic_event_documents_cursor = self.traffic_event_documents_collection.find({
-                'event_id': {'$in': event_ids}
-            })
-        else:
-            traffic_event_documents_cursor = self.traffic_event_documents_collection.find({})
+        traffic_event_documents_cursor = self.get_traffic_event_documents_cursor(
+            object_ids=object_ids,
+            event_ids=event_ids,
+            projection=projection
+        )
 
         if in_dictionary:
             traffic_event_documents = {}
@@ -1607,18 +1765,22 @@ class MongodbDatabaseConnection(object):
 
         return traffic_event_documents
 
-    def find_travel_request_document(self, object_id):
+    def find_travel_request_document(self, object_id, projection=None):
         """
         Retrieve a travel_request_document.
 
         :param object_id: ObjectId
+        :param projection: {field -> 0 or 1}
         :return: travel_request_document
         """
-        travel_request_document = self.travel_request_documents_collection.find_one({'_id': ObjectId(object_id)})
+        travel_request_document = self.travel_request_documents_collection.find_one(
+            {'_id': ObjectId(object_id)}, projection
+        )
         return travel_request_document
 
     def find_travel_request_documents(self, object_ids=None, client_ids=None, bus_line_ids=None,
-                                      min_departure_datetime=None, max_departure_datetime=None, in_dictionary=False):
+                                      min_departure_datetime=None, max_departure_datetime=None, in_dictionary=False,
+                                      projection=None):
         """
         Retrieve multiple travel_request_documents.
 
@@ -1628,40 +1790,17 @@ class MongodbDatabaseConnection(object):
         :param min_departure_datetime: datetime
         :param max_departure_datetime
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: travel_request_documents: [travel_request_document] or {client_id: [travel_request_document]}
         """
-        if object_ids is not None:
-            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
-            travel_requests_cursor = self.travel_request_documents_collection.find({
-                '_id': {'$in': processed_object_ids}
-            })
-        elif client_ids is not None and min_departure_datetime is not None and max_departure_datetime is not None:
-            travel_requests_cursor = self.travel_request_documents_collection.find({
-                'client_id': {'$in': client_ids},
-                'departure_datetime': {'$gt': min_departure_datetime},
-                'departure_datetime': {'$lt': max_departure_datetime}
-            })
-        elif bus_line_ids is not None and min_departure_datetime is not None and max_departure_datetime is not None:
-            travel_requests_cursor = self.travel_request_documents_collection.find({
-                'bus_line_id': {'$in': bus_line_ids},
-                'departure_datetime': {'$gt': min_departure_datetime},
-                'departure_datetime': {'$lt': max_departure_datetime}
-            })
-        elif client_ids is not None:
-            travel_requests_cursor = self.travel_request_documents_collection.find({
-                'client_id': {'$in': client_ids}
-            })
-        elif bus_line_ids is not None:
-            travel_requests_cursor = self.travel_request_documents_collection.find({
-                'bus_line_id': {'$in': bus_line_ids}
-            })
-        elif min_departure_datetime is not None and max_departure_datetime is not None:
-            travel_requests_cursor = self.travel_request_documents_collection.find({
-                'departure_datetime': {'$gt': min_departure_datetime},
-                'departure_datetime': {'$lt': max_departure_datetime}
-            })
-        else:
-            travel_requests_cursor = self.travel_request_documents_collection.find({})
+        travel_requests_cursor = self.get_travel_request_documents_cursor(
+            object_ids=object_ids,
+            client_ids=client_ids,
+            bus_line_ids=bus_line_ids,
+            min_departure_datetime=min_departure_datetime,
+            max_departure_datetime=max_departure_datetime,
+            projection=projection
+        )
 
         if in_dictionary:
             travel_requests = {}
@@ -1672,53 +1811,55 @@ class MongodbDatabaseConnection(object):
                 if client_id in travel_requests:
                     travel_requests[client_id].append(travel_request)
                 else:
-                    travel_requests[client_id] = list(travel_request)
+                    travel_requests[client_id] = [travel_request]
         else:
             travel_requests = list(travel_requests_cursor)
 
         return travel_requests
 
-    def find_way_document(self, object_id=None, osm_id=None):
+    def find_way_document(self, object_id=None, osm_id=None, projection=None):
         """
         Retrieve a way_document.
 
         :param object_id: ObjectId
         :param osm_id: int
+        :param projection: {field -> 0 or 1}
         :return: way_document
         """
         if object_id is not None:
             way_document = self.way_documents_collection.find_one({
                 '_id': ObjectId(object_id)
-            })
+            }, projection)
         elif osm_id is not None:
             way_document = self.way_documents_collection.find_one({
                 'osm_id': osm_id
-            })
+            }, projection)
         else:
             return None
 
         return way_document
 
-    def find_way_documents(self, object_ids=None, osm_ids=None, in_dictionary=False):
+    def find_way_documents(self, object_ids=None, osm_ids=None, in_dictionary=False, projection=None):
         """
         Retrieve multiple way_documents.
 
         :param object_ids: [ObjectId]
         :param osm_ids: [int]
         :param in_dictionary: bool
+        :param projection: {field -> 0 or 1}
         :return: way_documents: [way_document]
         """
         if object_ids is not None:
             processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
             way_documents_cursor = self.way_documents_collection.find({
                 '_id': {'$in': processed_object_ids}
-            })
+            }, projection)
         elif osm_ids is not None:
             way_documents_cursor = self.way_documents_collection.find({
                 'osm_id': {'$in': osm_ids}
-            })
+            }, projection)
         else:
-            way_documents_cursor = self.way_documents_collection.find({})
+            way_documents_cursor = self.way_documents_collection.find({}, projection)
 
         if in_dictionary:
             way_documents = {}
@@ -1731,15 +1872,29 @@ class MongodbDatabaseConnection(object):
 
         return way_documents
 
-    # def get_bus_line_documents_cursor(self):
-    #     """
-    #     Retrieve a cursor of all bus_line_documents.
-    #
-    #     :return: bus_line_documents_cursor
-    #     """
-    #     bus_line_documents_cursor = self.bus_line_documents_collection.find({})
-    #     return bus_line_documents_cursor
-    #
+    def get_bus_line_documents_cursor(self, object_ids=None, bus_line_ids=None, projection=None):
+        """
+        Retrieve a cursor of multiple bus_line_documents.
+
+        :param object_ids: [ObjectId]
+        :param bus_line_ids: [int]
+        :param projection: {field -> 0 or 1}
+        :return: bus_line_documents_cursor
+        """
+        if object_ids is not None:
+            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
+            bus_line_documents_cursor = self.bus_line_documents_collection.find({
+                '_id': {'$in': processed_object_ids}
+            }, projection)
+        elif bus_line_ids is not None:
+            bus_line_documents_cursor = self.bus_line_documents_collection.find({
+                'bus_line_id': {'$in': bus_line_ids}
+            }, projection)
+        else:
+            bus_line_documents_cursor = self.bus_line_documents_collection.find({}, projection)
+
+        return bus_line_documents_cursor
+
     # def get_bus_lines(self):
     #     """
     #     Retrieve a dictionary containing all the bus_line_documents.
@@ -1801,15 +1956,35 @@ class MongodbDatabaseConnection(object):
     #     bus_stop_documents_list = list(bus_stop_documents_cursor)
     #     return bus_stop_documents_list
 
-    # def get_edge_documents_cursor(self):
-    #     """
-    #     Retrieve a cursor of all the edge_documents.
-    #
-    #     :return: edge_documents_cursor
-    #     """
-    #     edge_documents_cursor = self.edge_documents_collection.find({})
-    #     return edge_documents_cursor
-    #
+    def get_edge_documents_cursor(self, object_ids=None, starting_node_osm_id=None, ending_node_osm_id=None,
+                                  projection=None):
+        """
+        Retrieve a cursor of multiple edge_documents.
+
+        :param object_ids: [ObjectId]
+        :param starting_node_osm_id: int
+        :param ending_node_osm_id: int
+        :param projection: {field -> 0 or 1}
+        :return: edge_documents_cursor
+        """
+        if object_ids is not None:
+            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
+            edge_documents_cursor = self.edge_documents_collection.find({
+                '_id': {'$in': processed_object_ids}
+            }, projection)
+        elif starting_node_osm_id is not None:
+            edge_documents_cursor = self.edge_documents_collection.find({
+                'starting_node.osm_id': starting_node_osm_id
+            }, projection)
+        elif ending_node_osm_id is not None:
+            edge_documents_cursor = self.edge_documents_collection.find({
+                'ending_node.osm_id': ending_node_osm_id
+            }, projection)
+        else:
+            edge_documents_cursor = self.edge_documents_collection.find({}, projection)
+
+        return edge_documents_cursor
+
     # def get_edges_dictionary(self):
     #     """
     #     Retrieve a dictionary containing all the edge_documents.
@@ -1886,24 +2061,7 @@ class MongodbDatabaseConnection(object):
         else:
             pass
 
-        bus_stops = bus_line.get('bus_stops')
-        number_of_bus_stops = len(bus_stops)
-
-        for i in range(0, number_of_bus_stops - 1):
-            starting_bus_stop = bus_stops[i]
-            ending_bus_stop = bus_stops[i + 1]
-
-            bus_stop_waypoints = self.find_bus_stop_waypoints_document(
-                starting_bus_stop=starting_bus_stop,
-                ending_bus_stop=ending_bus_stop
-            )
-            edge_object_ids_included_in_bus_stop_waypoints = self.get_edge_object_ids_included_in_bus_stop_waypoints(
-                bus_stop_waypoints=bus_stop_waypoints
-            )
-            for edge_object_id in edge_object_ids_included_in_bus_stop_waypoints:
-                if edge_object_id not in edge_object_ids:
-                    edge_object_ids.append(edge_object_id)
-
+        edge_object_ids = self.get_edge_object_ids_included_in_bus_stops(bus_stops=bus_line.get('bus_stops'))
         return edge_object_ids
 
     @staticmethod
@@ -1916,15 +2074,63 @@ class MongodbDatabaseConnection(object):
         :return: edge_object_ids: [edge_object_id]
         """
         edge_object_ids = []
+        added_edge_object_ids = set()
         lists_of_edge_object_ids = bus_stop_waypoints.get('waypoints')
 
         for list_of_edge_object_ids in lists_of_edge_object_ids:
             for edge_object_id in list_of_edge_object_ids:
-                if edge_object_id not in edge_object_ids:
+                if edge_object_id not in added_edge_object_ids:
+                    added_edge_object_ids.add(edge_object_id)
                     edge_object_ids.append(edge_object_id)
 
         return edge_object_ids
 
+    def get_edge_object_ids_included_in_bus_stops(self, bus_stops=None, bus_stop_names=None):
+        """
+        Get a list containing the object_ids of the edge_documents,
+        which are included in the waypoints between consecutive bus_stops.
+        Each edge_object_id is included once, and the list is sorted by edge_object_id.
+
+        :param bus_stops: [{'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}]
+        :param bus_stop_names: [string]
+        :return: edge_object_ids: [edge_object_id]
+        """
+        edge_object_ids = []
+
+        if bus_stops is not None:
+            bus_stop_pairs = [
+                {'starting_bus_stop._id': bus_stops[i].get('_id'),
+                 'ending_bus_stop._id': bus_stops[i + 1].get('_id')}
+                for i in range(0, len(bus_stops) - 1)
+            ]
+        elif bus_stop_names is not None:
+            bus_stop_pairs = [
+                {'starting_bus_stop.name': bus_stop_names[i],
+                 'ending_bus_stop.name': bus_stop_names[i + 1]}
+                for i in range(0, len(bus_stop_names) - 1)
+            ]
+        else:
+            return edge_object_ids
+
+        if len(bus_stop_pairs) == 0:
+            return edge_object_ids
+
+        # The bus_stop_waypoints_documents of all the consecutive pairs of bus_stops are matched
+        # in a single aggregation, where the lists of waypoints are unwound and the edge_object_ids
+        # are grouped, so as each one of them to be returned once. Since $group does not preserve
+        # the order of the documents, the edge_object_ids are sorted, so as the result to be deterministic.
+        pipeline = [
+            {'$match': {'$or': bus_stop_pairs}},
+            {'$project': {'_id': 0, 'waypoints': 1}},
+            {'$unwind': '$waypoints'},
+            {'$unwind': '$waypoints'},
+            {'$group': {'_id': '$waypoints'}},
+            {'$sort': {'_id': 1}}
+        ]
+        edge_object_ids_cursor = self.bus_stop_waypoints_documents_collection.aggregate(pipeline)
+        edge_object_ids = [document.get('_id') for document in edge_object_ids_cursor]
+        return edge_object_ids
+
     def get_ending_nodes_of_edges_dictionary(self):
         """
         Retrieve a dictionary containing all the ending_nodes which are included in the Edges collection.
@@ -1940,7 +2146,7 @@ class MongodbDatabaseConnection(object):
             if ending_node_osm_id in ending_nodes_dictionary:
                 ending_nodes_dictionary[ending_node_osm_id].append(edge_document)
             else:
-                ending_nodes_dictionary[ending_node_osm_id] = list(edge_document)
+                ending_nodes_dictionary[ending_node_osm_id] = [edge_document]
 
         return ending_nodes_dictionary
 
@@ -1986,15 +2192,29 @@ class MongodbDatabaseConnection(object):
         else:
             return 0
 
-    # def get_node_documents_cursor(self):
-    #     """
-    #     Retrieve a cursor of all node_documents.
-    #
-    #     :return: node_documents_cursor
-    #     """
-    #     node_documents_cursor = self.node_documents_collection.find({})
-    #     return node_documents_cursor
-    #
+    def get_node_documents_cursor(self, object_ids=None, osm_ids=None, projection=None):
+        """
+        Retrieve a cursor of multiple node_documents.
+
+        :param object_ids: [ObjectId]
+        :param osm_ids: [int]
+        :param projection: {field -> 0 or 1}
+        :return: node_documents_cursor
+        """
+        if object_ids is not None:
+            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
+            node_documents_cursor = self.node_documents_collection.find({
+                '_id': {'$in': processed_object_ids}
+            }, projection)
+        elif osm_ids is not None:
+            node_documents_cursor = self.node_documents_collection.find({
+                'osm_id': {'$in': osm_ids}
+            }, projection)
+        else:
+            node_documents_cursor = self.node_documents_collection.find({}, projection)
+
+        return node_documents_cursor
+
     # def get_node_documents_list(self):
     #     """
     #     Retrieve a list containing all the node_documents.
@@ -2004,16 +2224,39 @@ class MongodbDatabaseConnection(object):
     #     node_documents_cursor = self.node_documents_collection.find({})
     #     node_documents_list = list(node_documents_cursor)
     #     return node_documents_list
-    #
-    # def get_point_documents_cursor(self):
-    #     """
-    #     Retrieve a cursor of all point_documents.
-    #
-    #     :return: point_documents_cursor
-    #     """
-    #     point_documents_cursor = self.point_documents_collection.find({})
-    #     return point_documents_cursor
-    #
+
+    def get_number_of_edge_documents(self):
+        """
+        Retrieve the number of the stored edge_documents, based on the metadata of the collection.
+
+        :return: number_of_edge_documents: int
+        """
+        number_of_edge_documents = self.edge_documents_collection.estimated_document_count()
+        return number_of_edge_documents
+
+    def get_point_documents_cursor(self, object_ids=None, osm_ids=None, projection=None):
+        """
+        Retrieve a cursor of multiple point_documents.
+
+        :param object_ids: [ObjectId]
+        :param osm_ids: [int]
+        :param projection: {field -> 0 or 1}
+        :return: point_documents_cursor
+        """
+        if object_ids is not None:
+            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
+            point_documents_cursor = self.point_documents_collection.find({
+                '_id': {'$in': processed_object_ids}
+            }, projection)
+        elif osm_ids is not None:
+            point_documents_cursor = self.point_documents_collection.find({
+                'osm_id': {'$in': osm_ids}
+            }, projection)
+        else:
+            point_documents_cursor = self.point_documents_collection.find({}, projection)
+
+        return point_documents_cursor
+
     # def get_points(self):
     #     """
     #     Retrieve a dictionary containing all the point_documents.
@@ -2095,15 +2338,105 @@ class MongodbDatabaseConnection(object):
 
         return traffic_density_documents
 
-    # def get_travel_request_documents_cursor(self):
-    #     """
-    #     Retrieve a cursor of all travel_request_documents.
-    #
-    #     :return: travel_request_documents_cursor
-    #     """
-    #     travel_request_documents_cursor = self.travel_request_documents_collection.find({})
-    #     return travel_request_documents_cursor
-    #
+    def get_traffic_event_documents_change_stream(self, max_await_time_ms=None):
+        """
+        Open a change stream, which notifies about the traffic_event_documents that are inserted or updated.
+
+        Change streams are supported only by replica sets, so an OperationFailure is raised by
+        standalone database servers.
+
+        :param max_await_time_ms: int (The maximum time that try_next waits for a notification)
+        :return: traffic_event_documents_change_stream
+        """
+        pipeline = [
+            {'$match': {'operationType': {'$in': ['insert', 'update', 'replace']}}}
+        ]
+        traffic_event_documents_change_stream = self.traffic_event_documents_collection.watch(
+            pipeline=pipeline,
+            max_await_time_ms=max_await_time_ms
+        )
+        return traffic_event_documents_change_stream
+
+    def get_traffic_event_documents_cursor(self, object_ids=None, event_ids=None, min_modified_datetime=None,
+                                           projection=None):
+        """
+        Retrieve a cursor of multiple traffic_event_documents.
+
+        If min_modified_datetime is provided, then only the traffic_event_documents which have been
+        inserted or updated since then (inclusive) are retrieved, ordered by modified_datetime.
+
+        :param object_ids: [ObjectId]
+        :param event_ids: [string]
+        :param min_modified_datetime: datetime
+        :param projection: {field -> 0 or 1}
+        :return: traffic_event_documents_cursor
+        """
+        if object_ids is not None:
+            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
+            traffic_event_documents_cursor = self.traffic_event_documents_collection.find({
+                '_id': {'$in': processed_object_ids}
+            }, projection)
+        elif event_ids is not None:
+            traffic_event_documents_cursor = self.traffic_event_documents_collection.find({
+                'event_id': {'$in': event_ids}
+            }, projection)
+        elif min_modified_datetime is not None:
+            traffic_event_documents_cursor = self.traffic_event_documents_collection.find({
+                'modified_datetime': {'$gte': min_modified_datetime}
+            }, projection).sort('modified_datetime', ASCENDING)
+        else:
+            traffic_event_documents_cursor = self.traffic_event_documents_collection.find(
+                {}, projection
+            ).sort('modified_datetime', ASCENDING)
+
+        return traffic_event_documents_cursor
+
+    def get_travel_request_documents_cursor(self, object_ids=None, client_ids=None, bus_line_ids=None,
+                                            min_departure_datetime=None, max_departure_datetime=None,
+                                            projection=None):
+        """
+        Retrieve a cursor of multiple travel_request_documents.
+
+        :param object_ids: [ObjectId]
+        :param client_ids: [int]
+        :param bus_line_ids: [int]
+        :param min_departure_datetime: datetime
+        :param max_departure_datetime: datetime
+        :param projection: {field -> 0 or 1}
+        :return: travel_requests_cursor
+        """
+        if object_ids is not None:
+            processed_object_ids = [ObjectId(object_id) for object_id in object_ids]
+            travel_requests_cursor = self.travel_request_documents_collection.find({
+                '_id': {'$in': processed_object_ids}
+            }, projection)
+        elif client_ids is not None and min_departure_datetime is not None and max_departure_datetime is not None:
+            travel_requests_cursor = self.travel_request_documents_collection.find({
+                'client_id': {'$in': client_ids},
+                'departure_datetime': {'$gt': min_departure_datetime, '$lt': max_departure_datetime}
+            }, projection)
+        elif bus_line_ids is not None and min_departure_datetime is not None and max_departure_datetime is not None:
+            travel_requests_cursor = self.travel_request_documents_collection.find({
+                'bus_line_id': {'$in': bus_line_ids},
+                'departure_datetime': {'$gt': min_departure_datetime, '$lt': max_departure_datetime}
+            }, projection)
+        elif client_ids is not None:
+            travel_requests_cursor = self.travel_request_documents_collection.find({
+                'client_id': {'$in': client_ids}
+            }, projection)
+        elif bus_line_ids is not None:
+            travel_requests_cursor = self.travel_request_documents_collection.find({
+                'bus_line_id': {'$in': bus_line_ids}
+            }, projection)
+        elif min_departure_datetime is not None and max_departure_datetime is not None:
+            travel_requests_cursor = self.travel_request_documents_collection.find({
+                'departure_datetime': {'$gt': min_departure_datetime, '$lt': max_departure_datetime}
+            }, projection)
+        else:
+            travel_requests_cursor = self.travel_request_documents_collection.find({}, projection)
+
+        return travel_requests_cursor
+
     # def get_travel_request_documents_list(self):
     #     """
     #     Retrieve a list containing all the travel_request_documents.
@@ -2218,6 +2551,13 @@ class MongodbDatabaseConnection(object):
 
         result = self.bus_line_documents_collection.update_one(key, data, upsert=True)
         new_object_id = result.upserted_id
+
+        # The bus_line_id might have been provided explicitly, instead of being reserved,
+        # so the counter is raised up to it, in order not to be reserved again.
+        if bus_line_document is not None:
+            bus_line_id = bus_line_document.get('bus_line_id')
+
+        self.update_counter_document(collection='bus_line', identifier=bus_line_id)
         return new_object_id
 
     def insert_bus_line_documents(self, bus_line_documents):
@@ -2392,12 +2732,16 @@ class MongodbDatabaseConnection(object):
 
         result = self.edge_documents_collection.insert_one(edge_document)
         new_object_id = result.inserted_id
+        self.operation_area_documents_collection.delete_one({'_id': 'operation_area'})
         return new_object_id
 
     def insert_edge_documents(self, edge_documents):
         """
         Insert multiple edge_documents.
 
+        The existing operation_area_document is deleted, so that it can be rebuilt once,
+        with insert_operation_area_document, after the import of the edge_documents.
+
         :param edge_documents: [edge_document]
         :return: new_object_ids: [ObjectId]
         """
@@ -2406,6 +2750,7 @@ class MongodbDatabaseConnection(object):
         if edge_documents:
             result = self.edge_documents_collection.insert_many(edge_documents)
             new_object_ids = result.inserted_ids
+            self.operation_area_documents_collection.delete_one({'_id': 'operation_area'})
 
         return new_object_ids
 
@@ -2448,6 +2793,68 @@ class MongodbDatabaseConnection(object):
 
         return new_object_ids
 
+    def insert_operation_area_document(self):
+        """
+        Create the operation_area_document from all the stored edge_documents,
+        replacing the existing one (if any).
+
+        The borders and the convex_hull are calculated in memory, one batch of edge_documents
+        at a time, and the operation_area_document is written with a single operation.
+
+        :return: operation_area_document (None if there are no edge_documents)
+        """
+        operation_area_document = None
+        hull_points = []
+        number_of_new_points = 0
+
+        for edge_document in self.iter_edge_documents(projection={'starting_node.point': 1, 'ending_node.point': 1}):
+            points = [edge_document.get('starting_node').get('point'), edge_document.get('ending_node').get('point')]
+
+            for point in points:
+                longitude = point.get('longitude')
+                latitude = point.get('latitude')
+                hull_points.append(Point(longitude=longitude, latitude=latitude))
+                number_of_new_points += 1
+
+                if operation_area_document is None:
+                    operation_area_document = {
+                        '_id': 'operation_area',
+                        'minimum_longitude': longitude,
+                        'maximum_longitude': longitude,
+                        'minimum_latitude': latitude,
+                        'maximum_latitude': latitude
+                    }
+                else:
+                    operation_area_document['minimum_longitude'] = min(
+                        operation_area_document['minimum_longitude'], longitude
+                    )
+                    operation_area_document['maximum_longitude'] = max(
+                        operation_area_document['maximum_longitude'], longitude
+                    )
+                    operation_area_document['minimum_latitude'] = min(
+                        operation_area_document['minimum_latitude'], latitude
+                    )
+                    operation_area_document['maximum_latitude'] = max(
+                        operation_area_document['maximum_latitude'], latitude
+                    )
+
+            if number_of_new_points >= mongodb_cursor_batch_size:
+                hull_points = convex_hull(points=hull_points)
+                number_of_new_points = 0
+
+        if operation_area_document is None:
+            self.operation_area_documents_collection.delete_one({'_id': 'operation_area'})
+            return None
+
+        operation_area_document['convex_hull'] = [
+            {'longitude': point.longitude, 'latitude': point.latitude}
+            for point in convex_hull(points=hull_points)
+        ]
+        self.operation_area_documents_collection.replace_one(
+            {'_id': 'operation_area'}, operation_area_document, upsert=True
+        )
+        return operation_area_document
+
     def insert_point_document(self, point_document=None, osm_id=None, point=None):
         """
         Insert a point_document.
@@ -2497,6 +2904,7 @@ class MongodbDatabaseConnection(object):
         }
         data = {
             '$set': {
+                'timetable_id': timetable.get('timetable_id'),
                 'bus_line_id': timetable.get('bus_line_id'),
                 'timetable_entries': timetable.get('timetable_entries'),
                 'travel_requests': timetable.get('travel_requests')
@@ -2525,6 +2933,9 @@ class MongodbDatabaseConnection(object):
         """
         Insert a new traffic_event_document or update, if it already exists in the database.
 
+        The modified_datetime of the document is set by the database server, so as the traffic_event_documents
+        of multiple producers to be retrieved incrementally by the Traffic Data Parser.
+
         :param traffic_event_document
         :return: new_object_id: ObjectId
         """
@@ -2537,6 +2948,9 @@ class MongodbDatabaseConnection(object):
                 'event_level': traffic_event_document.get('event_level'),
                 'point': traffic_event_document.get('point'),
                 'datetime': traffic_event_document.get('datetime')
+            },
+            '$currentDate': {
+                'modified_datetime': True
             }
         }
         result = self.traffic_event_documents_collection.update_one(key, data, upsert=True)
@@ -2645,6 +3059,130 @@ class MongodbDatabaseConnection(object):
 
         return new_object_ids
 
+    def iter_bus_line_documents(self, object_ids=None, bus_line_ids=None, projection=None,
+                                batch_size=mongodb_cursor_batch_size):
+        """
+        Iterate over multiple bus_line_documents, which are retrieved from the database in batches.
+
+        :param object_ids: [ObjectId]
+        :param bus_line_ids: [int]
+        :param projection: {field -> 0 or 1}
+        :param batch_size: int
+        :return: bus_line_documents: generator(bus_line_document)
+        """
+        bus_line_documents_cursor = self.get_bus_line_documents_cursor(
+            object_ids=object_ids,
+            bus_line_ids=bus_line_ids,
+            projection=projection
+        )
+        for bus_line_document in bus_line_documents_cursor.batch_size(batch_size):
+            yield bus_line_document
+
+    def iter_edge_documents(self, object_ids=None, starting_node_osm_id=None, ending_node_osm_id=None, projection=None,
+                            batch_size=mongodb_cursor_batch_size):
+        """
+        Iterate over multiple edge_documents, which are retrieved from the database in batches.
+
+        :param object_ids: [ObjectId]
+        :param starting_node_osm_id: int
+        :param ending_node_osm_id: int
+        :param projection: {field -> 0 or 1}
+        :param batch_size: int
+        :return: edge_documents: generator(edge_document)
+        """
+        edge_documents_cursor = self.get_edge_documents_cursor(
+            object_ids=object_ids,
+            starting_node_osm_id=starting_node_osm_id,
+            ending_node_osm_id=ending_node_osm_id,
+            projection=projection
+        )
+        for edge_document in edge_documents_cursor.batch_size(batch_size):
+            yield edge_document
+
+    def iter_node_documents(self, object_ids=None, osm_ids=None, projection=None, batch_size=mongodb_cursor_batch_size):
+        """
+        Iterate over multiple node_documents, which are retrieved from the database in batches.
+
+        :param object_ids: [ObjectId]
+        :param osm_ids: [int]
+        :param projection: {field -> 0 or 1}
+        :param batch_size: int
+        :return: node_documents: generator(node_document)
+        """
+        node_documents_cursor = self.get_node_documents_cursor(
+            object_ids=object_ids,
+            osm_ids=osm_ids,
+            projection=projection
+        )
+        for node_document in node_documents_cursor.batch_size(batch_size):
+            yield node_document
+
+    def iter_point_documents(self, object_ids=None, osm_ids=None, projection=None,
+                             batch_size=mongodb_cursor_batch_size):
+        """
+        Iterate over multiple point_documents, which are retrieved from the database in batches.
+
+        :param object_ids: [ObjectId]
+        :param osm_ids: [int]
+        :param projection: {field -> 0 or 1}
+        :param batch_size: int
+        :return: point_documents: generator(point_document)
+        """
+        point_documents_cursor = self.get_point_documents_cursor(
+            object_ids=object_ids,
+            osm_ids=osm_ids,
+            projection=projection
+        )
+        for point_document in point_documents_cursor.batch_size(batch_size):
+            yield point_document
+
+    def iter_traffic_event_documents(self, object_ids=None, event_ids=None, min_modified_datetime=None,
+                                     projection=None, batch_size=mongodb_cursor_batch_size):
+        """
+        Iterate over multiple traffic_event_documents, which are retrieved from the database in batches.
+
+        :param object_ids: [ObjectId]
+        :param event_ids: [string]
+        :param min_modified_datetime: datetime
+        :param projection: {field -> 0 or 1}
+        :param batch_size: int
+        :return: traffic_event_documents: generator(traffic_event_document)
+        """
+        traffic_event_documents_cursor = self.get_traffic_event_documents_cursor(
+            object_ids=object_ids,
+            event_ids=event_ids,
+            min_modified_datetime=min_modified_datetime,
+            projection=projection
+        )
+        for traffic_event_document in traffic_event_documents_cursor.batch_size(batch_size):
+            yield traffic_event_document
+
+    def iter_travel_request_documents(self, object_ids=None, client_ids=None, bus_line_ids=None,
+                                      min_departure_datetime=None, max_departure_datetime=None, projection=None,
+                                      batch_size=mongodb_cursor_batch_size):
+        """
+        Iterate over multiple travel_request_documents, which are retrieved from the database in batches.
+
+        :param object_ids: [ObjectId]
+        :param client_ids: [int]
+        :param bus_line_ids: [int]
+        :param min_departure_datetime: datetime
+        :param max_departure_datetime: datetime
+        :param projection: {field -> 0 or 1}
+        :param batch_size: int
+        :return: travel_request_documents: generator(travel_request_document)
+        """
+        travel_requests_cursor = self.get_travel_request_documents_cursor(
+            object_ids=object_ids,
+            client_ids=client_ids,
+            bus_line_ids=bus_line_ids,
+            min_departure_datetime=min_departure_datetime,
+            max_departure_datetime=max_departure_datetime,
+            projection=projection
+        )
+        for travel_request_document in travel_requests_cursor.batch_size(batch_size):
+            yield travel_request_document
+
     def print_address_document(self, object_id=None, name=None, node_id=None, longitude=None, latitude=None):
         """
         Print an address_document.
@@ -3285,6 +3823,154 @@ class MongodbDatabaseConnection(object):
 
         print 'number_of_traffic_event_documents:', number_of_traffic_event_documents
 
+    def reserve_identifiers(self, collection, number_of_identifiers=1):
+        """
+        Reserve a range of consecutive identifiers, by atomically incrementing the corresponding counter_document.
+
+        The counter_document is initialized, at its first usage, with the maximum identifier which is already
+        stored in the collection. Concurrent producers receive disjoint ranges.
+
+        :param collection: ('bus_line' or 'bus_vehicle' or 'timetable' or 'travel_request')
+        :param number_of_identifiers: int
+        :return: first_identifier: int ('bus_line_id' or 'bus_vehicle_id' or 'timetable_id' or 'client_id')
+                 (The reserved range is [first_identifier, first_identifier + number_of_identifiers - 1])
+        """
+        key = {
+            '_id': collection
+        }
+        data = {
+            '$inc': {
+                'sequence_value': number_of_identifiers
+            }
+        }
+        counter_document = self.counter_documents_collection.find_one_and_update(
+            key, data, return_document=ReturnDocument.AFTER
+        )
+        if counter_document is None:
+            # $max keeps the initialization idempotent, in case another producer has already
+            # initialized or incremented the counter_document.
+            maximum_identifier = self.get_maximum_or_minimum(collection=collection)
+            self.counter_documents_collection.update_one(
+                key, {'$max': {'sequence_value': maximum_identifier}}, upsert=True
+            )
+            counter_document = self.counter_documents_collection.find_one_and_update(
+                key, data, return_document=ReturnDocument.AFTER
+            )
+
+        first_identifier = counter_document.get('sequence_value') - number_of_identifiers + 1
+        return first_identifier
+
+    def update_counter_document(self, collection, identifier):
+        """
+        Raise the counter_document of a collection up to an identifier, which has been stored without being
+        reserved, so as reserve_identifiers not to allocate it again. If the counter_document has not been
+        initialized yet, then it is initialized by reserve_identifiers with the maximum stored identifier.
+
+        :param collection: ('bus_line' or 'bus_vehicle' or 'timetable' or 'travel_request')
+        :param identifier: int
+        :return: True if the counter_document was raised, otherwise False.
+        """
+        if identifier is None:
+            return False
+
+        key = {
+            '_id': collection
+        }
+        data = {
+            '$max': {
+                'sequence_value': identifier
+            }
+        }
+        result = self.counter_documents_collection.update_one(key, data, upsert=False)
+        return result.modified_count == 1
+
+    def update_modified_datetime_of_traffic_event_documents(self):
+        """
+        Set the modified_datetime of the traffic_event_documents which do not have one
+        (e.g. documents stored by older producers) to the current datetime of the database server,
+        so as them to be retrieved incrementally, like the rest of the traffic_event_documents.
+
+        :return: number_of_modified_documents: int
+        """
+        key = {
+            'modified_datetime': {'$exists': False}
+        }
+        data = {
+            '$currentDate': {
+                'modified_datetime': True
+            }
+        }
+        result = self.traffic_event_documents_collection.update_many(key, data, upsert=False)
+        return result.modified_count
+
+    def update_operation_area_document(self, points):
+        """
+        Extend the operation_area_document, so as to include multiple points.
+
+        The borders are updated atomically with $min and $max, while the new convex_hull
+        is calculated from the points of the existing convex_hull and the new points.
+        The convex_hull is therefore read and written in two steps, so concurrent calls
+        should be avoided; bulk imports should use insert_operation_area_document instead.
+
+        :param points: [{'longitude', 'latitude'}]
+        :return: operation_area_document
+        """
+        operation_area_document = self.find_operation_area_document()
+
+        if not points:
+            return operation_area_document
+
+        hull_points = [Point(longitude=point.get('longitude'), latitude=point.get('latitude')) for point in points]
+
+        if operation_area_document is not None:
+            hull_points.extend([
+                Point(longitude=point.get('longitude'), latitude=point.get('latitude'))
+                for point in operation_area_document.get('convex_hull')
+            ])
+
+        key = {
+            '_id': 'operation_area'
+        }
+        data = {
+            '$min': {
+                'minimum_longitude': min(point.get('longitude') for point in points),
+                'minimum_latitude': min(point.get('latitude') for point in points)
+            },
+            '$max': {
+                'maximum_longitude': max(point.get('longitude') for point in points),
+                'maximum_latitude': max(point.get('latitude') for point in points)
+            },
+            '$set': {
+                'convex_hull': [
+                    {'longitude': point.longitude, 'latitude': point.latitude}
+                    for point in convex_hull(points=hull_points)
+                ]
+            }
+        }
+        operation_area_document = self.operation_area_documents_collection.find_one_and_update(
+            key, data, upsert=True, return_document=ReturnDocument.AFTER
+        )
+        return operation_area_document
+
+    def update_traffic_densities(self, traffic_densities):
+        """
+        Update the traffic_density values of multiple edge_documents, using a single unordered bulk operation.
+        Each edge_object_id is included once in the dictionary, so repeated updates of the same edge_document
+        are coalesced by the caller before they are sent to the database.
+
+        :param traffic_densities: {edge_object_id -> new_traffic_density_value}
+        :return: number_of_modified_documents: int
+        """
+        if len(traffic_densities) == 0:
+            return 0
+
+        requests = [
+            UpdateOne({'_id': ObjectId(edge_object_id)}, {'$set': {'traffic_density': new_traffic_density_value}})
+            for edge_object_id, new_traffic_density_value in traffic_densities.iteritems()
+        ]
+        result = self.edge_documents_collection.bulk_write(requests, ordered=False)
+        return result.modified_count
+
     def update_traffic_density(self, edge_object_id, new_traffic_density_value):
         """
         Update the traffic_density value of an edge_document.
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -175,6 +183,10 @@ class OsmParser(object):
         self.mongodb_database_connection = MongodbDatabaseConnection(host=mongodb_host, port=mongodb_port)
         log(module_name='osm_parser', log_type='DEBUG',
             log_message='mongodb_database_connection: established')
+        # The OsmParser populates the System Database, so it creates the indexes of its collections.
+        self.mongodb_database_connection.ensure_indexes()
+        log(module_name='osm_parser', log_type='DEBUG',
+            log_message='ensure_indexes (mongodb_database): ok')
 
     def add_address(self, name, node_id, point):
         """
@@ -553,6 +565,9 @@ class OsmParser(object):
         log(module_name='osm_parser_tester', log_type='DEBUG',
             log_message='populate_edge_documents_collection (mongodb_database) ok - '
                         'Number of new edge_documents: ' + str(number_of_edge_documents))
+        self.mongodb_database_connection.insert_operation_area_document()
+        log(module_name='osm_parser_tester', log_type='DEBUG',
+            log_message='insert_operation_area_document (mongodb_database) ok')
 
     def populate_node_documents_collection(self):
         node_documents = self.get_list_of_nodes()
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,7 +146,8 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
-from src.common.parameters import bus_road_types, standard_speed
+from datetime import datetime, timedelta
+from src.common.parameters import bus_road_types, standard_speed, traffic_data_parser_traffic_density_half_life
 from src.geospatial_data.point import distance, Point
 
 __author__ = 'Eleftherios Anagnostopoulos'
@@ -264,6 +273,35 @@ class OrderedSet(object):
         return node
 
 
+def estimate_expected_traffic_density(edge, traversal_datetime, current_datetime, traffic_profile_store):
+    """
+    Estimate the traffic_density of an edge at the datetime when it is expected to be traversed.
+
+    The current traffic_density of the edge is combined with the traffic_density of its time-of-day profile.
+    The weight of the current value is reduced to half every traffic_data_parser_traffic_density_half_life
+    seconds from current_datetime, like the contribution of the traffic_events which produced it.
+
+    :param edge: edge_document
+    :param traversal_datetime: datetime
+    :param current_datetime: datetime
+    :param traffic_profile_store: TrafficProfileStore
+    :return: expected_traffic_density: float value between 0 and 1.
+    """
+    current_traffic_density = edge.get('traffic_density') or 0.0
+    profile_traffic_density = traffic_profile_store.get_expected_traffic_density(
+        edge_object_id=edge.get('_id'),
+        datetime_=traversal_datetime
+    )
+    if profile_traffic_density is None:
+        return current_traffic_density
+
+    seconds_from_current_datetime = max((traversal_datetime - current_datetime).total_seconds(), 0.0)
+    current_weight = 0.5 ** (seconds_from_current_datetime / traffic_data_parser_traffic_density_half_life)
+    expected_traffic_density = current_weight * current_traffic_density + \
+                               (1 - current_weight) * profile_traffic_density
+    return expected_traffic_density
+
+
 def estimate_heuristic_cost(starting_point_document, ending_point_document):
     """
     Make a heuristic estimation regarding the cost of travelling from starting_point to ending_point.
@@ -370,15 +408,22 @@ def estimate_travelling_time(distance_to_be_covered, max_speed, road_type=None,
     return travelling_time
 
 
-def identify_path_with_lowest_cost(start, end, edges_dictionary):
+def identify_path_with_lowest_cost(start, end, edges_dictionary, departure_datetime=None,
+                                   traffic_profile_store=None):
     """
     This function is capable of identifying the path with the lowest cost value
     (less time-consuming in this case) connecting the starting with ending node,
     implementing a variation of the A* search algorithm.
 
+    If a departure_datetime and a traffic_profile_store are provided, then the path is identified in
+    time-dependent mode: the cost of each edge is estimated using the expected traffic_density at the
+    datetime when the edge is reached, instead of the current one.
+
     :param start: {'osm_id', 'point': {'longitude', 'latitude'}}
     :param end: {'osm_id', 'point': {'longitude', 'latitude'}}
     :param edges_dictionary: {starting_node_osm_id -> [edge_document]}
+    :param departure_datetime: datetime
+    :param traffic_profile_store: TrafficProfileStore
 
     :return: path_between_two_nodes: {
                  'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
@@ -388,6 +433,9 @@ def identify_path_with_lowest_cost(start, end, edges_dictionary):
 
             (None if there is no path between the provided nodes)
     """
+    time_dependent = departure_datetime is not None and traffic_profile_store is not None
+    current_datetime = datetime.now()
+
     # A dictionary ({node_osm_id -> node}) containing nodes that have
     # already been evaluated (cost values have been estimated).
     closed_set = {}
@@ -468,6 +516,14 @@ def identify_path_with_lowest_cost(start, end, edges_dictionary):
             road_type = edge.get('road_type')
             traffic_density = edge.get('traffic_density')
 
+            if time_dependent:
+                traffic_density = estimate_expected_traffic_density(
+                    edge=edge,
+                    traversal_datetime=departure_datetime + timedelta(seconds=current_node.real_travelling_time_cost),
+                    current_datetime=current_datetime,
+                    traffic_profile_store=traffic_profile_store
+                )
+
             # Check whether next_node has already been evaluated.
             if next_node_osm_id in closed_set:
                 next_node = closed_set.get(next_node_osm_id)
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -141,7 +149,8 @@ get_waypoints_between_multiple_bus_stops: [{
 import requests
 import json
 from bson import ObjectId
-from src.common.parameters import route_generator_host, route_generator_port, route_generator_request_timeout
+from src.common.parameters import route_generator_host, route_generator_port, route_generator_request_timeout, \
+    route_generator_datetime_format
 
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
@@ -159,15 +168,32 @@ class JSONResponseEncoder(json.JSONEncoder):
             return o.__dict__
 
 
+def format_departure_datetime(departure_datetime):
+    """
+    Convert the optional departure_datetime of a request to a string.
+
+    :param departure_datetime: datetime
+    :return: string (None if departure_datetime is None)
+    """
+    if departure_datetime is None:
+        return None
+
+    return departure_datetime.strftime(route_generator_datetime_format)
+
+
 def get_route_between_two_bus_stops(starting_bus_stop=None, ending_bus_stop=None,
-                                    starting_bus_stop_name=None, ending_bus_stop_name=None):
+                                    starting_bus_stop_name=None, ending_bus_stop_name=None, departure_datetime=None):
     """
     Identify the less time-consuming route between two bus_stops.
 
+    If a departure_datetime is provided, then the route is identified based on the expected
+    traffic_density of each edge, at the datetime when it is reached.
+
     :param starting_bus_stop: bus_stop_document
     :param ending_bus_stop: bus_stop_document
     :param starting_bus_stop_name: string
     :param ending_bus_stop_name: string
+    :param departure_datetime: datetime
     :return: response: get_route_between_two_bus_stops
     """
     url = 'http://' + route_generator_host + ':' + route_generator_port + '/get_route_between_two_bus_stops'
@@ -177,7 +203,8 @@ def get_route_between_two_bus_stops(starting_bus_stop=None, ending_bus_stop=None
         'starting_bus_stop': starting_bus_stop,
         'ending_bus_stop': ending_bus_stop,
         'starting_bus_stop_name': starting_bus_stop_name,
-        'ending_bus_stop_name': ending_bus_stop_name
+        'ending_bus_stop_name': ending_bus_stop_name,
+        'departure_datetime': format_departure_datetime(departure_datetime=departure_datetime)
     }
     json_data = json.dumps(data, cls=JSONResponseEncoder)
     request = requests.post(url, data=json_data, headers=headers, timeout=route_generator_request_timeout)
@@ -185,12 +212,16 @@ def get_route_between_two_bus_stops(starting_bus_stop=None, ending_bus_stop=None
     return response
 
 
-def get_route_between_multiple_bus_stops(bus_stops=None, bus_stop_names=None):
+def get_route_between_multiple_bus_stops(bus_stops=None, bus_stop_names=None, departure_datetime=None):
     """
     Identify the less time-consuming route between multiple bus_stops.
 
+    If a departure_datetime is provided, then the route between each pair of bus_stops is identified
+    in time-dependent mode, departing at the arrival datetime of the previous one.
+
     :param bus_stops: [bus_stop_document]
     :param bus_stop_names: [string]
+    :param departure_datetime: datetime
     :return: response: get_route_between_multiple_bus_stops
     """
     url = 'http://' + route_generator_host + ':' + route_generator_port + '/get_route_between_multiple_bus_stops'
@@ -198,7 +229,8 @@ def get_route_between_multiple_bus_stops(bus_stops=None, bus_stop_names=None):
     headers = {'content-type': 'application/json'}
     data = {
         'bus_stops': bus_stops,
-        'bus_stop_names': bus_stop_names
+        'bus_stop_names': bus_stop_names,
+        'departure_datetime': format_departure_datetime(departure_datetime=departure_datetime)
     }
     json_data = json.dumps(data, cls=JSONResponseEncoder)
     request = requests.post(url, data=json_data, headers=headers, timeout=route_generator_request_timeout)
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -141,6 +149,8 @@ get_waypoints_between_multiple_bus_stops: [{
 # import cgi
 import json
 from bson import ObjectId
+from datetime import datetime
+from src.common.parameters import route_generator_datetime_format
 from src.route_generator.router import Router
 
 __author__ = 'Eleftherios Anagnostopoulos'
@@ -162,6 +172,21 @@ class JSONResponseEncoder(json.JSONEncoder):
             return o.__dict__
 
 
+def get_departure_datetime(json_request_body):
+    """
+    Retrieve the optional departure_datetime of a request, which enables time-dependent routing.
+
+    :param json_request_body: dict
+    :return: departure_datetime: datetime (None if it is not included in the request)
+    """
+    departure_datetime = json_request_body.get('departure_datetime')
+
+    if departure_datetime is not None:
+        departure_datetime = datetime.strptime(departure_datetime, route_generator_datetime_format)
+
+    return departure_datetime
+
+
 def application(env, start_response):
     data_env = env.copy()
     method = data_env.get('REQUEST_METHOD')
@@ -187,12 +212,14 @@ def application(env, start_response):
             ending_bus_stop = json_request_body.get('ending_bus_stop')
             starting_bus_stop_name = json_request_body.get('starting_bus_stop_name')
             ending_bus_stop_name = json_request_body.get('ending_bus_stop_name')
+            departure_datetime = get_departure_datetime(json_request_body=json_request_body)
 
             result = router.get_route_between_two_bus_stops(
                 starting_bus_stop=starting_bus_stop,
                 ending_bus_stop=ending_bus_stop,
                 starting_bus_stop_name=starting_bus_stop_name,
-                ending_bus_stop_name=ending_bus_stop_name
+                ending_bus_stop_name=ending_bus_stop_name,
+                departure_datetime=departure_datetime
             )
             response_status = '200 OK'
             response_type = 'application/json'
@@ -209,10 +236,12 @@ def application(env, start_response):
 
             bus_stops = json_request_body.get('bus_stops')
             bus_stop_names = json_request_body.get('bus_stop_names')
+            departure_datetime = get_departure_datetime(json_request_body=json_request_body)
 
             result = router.get_route_between_multiple_bus_stops(
                 bus_stops=bus_stops,
-                bus_stop_names=bus_stop_names
+                bus_stop_names=bus_stop_names,
+                departure_datetime=departure_datetime
             )
             response_status = '200 OK'
             response_type = 'application/json'
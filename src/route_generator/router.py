@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,12 +146,15 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
+import os
+from datetime import timedelta
 from src.route_generator.path_finder import identify_path_with_lowest_cost
 from src.route_generator.multiple_paths_finder import identify_all_paths
 from src.common.logger import log
-from src.common.parameters import mongodb_host, mongodb_port
+from src.common.parameters import mongodb_host, mongodb_port, traffic_data_parser_traffic_profiles_filename
 from src.geospatial_data.point import distance, Point
-from src.mongodb_database.mongodb_database_connection import MongodbDatabaseConnection
+from src.mongodb_database.mongodb_database_connection import MongodbDatabaseConnection, routing_edge_projection
+from src.traffic_data_parser.traffic_profile_store import TrafficProfileStore
 
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
@@ -157,6 +168,8 @@ class Router(object):
     def __init__(self):
         self.mongodb_database_connection = MongodbDatabaseConnection(host=mongodb_host, port=mongodb_port)
         log(module_name='Router', log_type='DEBUG', log_message='mongodb_database_connection: established')
+        self.traffic_profile_store = None
+        self.traffic_profile_store_modification_time = None
 
     def get_bus_stop(self, name=None, provided_point=None, longitude=None, latitude=None):
         """
@@ -267,13 +280,17 @@ class Router(object):
 
     def get_edges_dictionary(self):
         """
-        Retrieve a dictionary containing all the documents of the Edges collection.
+        Retrieve a dictionary containing all the documents of the Edges collection,
+        including only the fields which are required for routing.
 
         :return: {starting_node_osm_id -> [{'_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
                                             'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
-                                            'max_speed', 'road_type', 'way_id', 'traffic_density'}]}
+                                            'max_speed', 'road_type', 'traffic_density'}]}
         """
-        edges_dictionary = self.mongodb_database_connection.find_edge_documents(in_dictionary=True)
+        edges_dictionary = self.mongodb_database_connection.find_edge_documents(
+            in_dictionary=True,
+            projection=routing_edge_projection
+        )
         return edges_dictionary
 
     def get_edges_list(self):
@@ -298,15 +315,19 @@ class Router(object):
 
     def get_route_between_two_bus_stops(self, starting_bus_stop=None, ending_bus_stop=None,
                                         starting_bus_stop_name=None, ending_bus_stop_name=None,
-                                        edges_dictionary=None):
+                                        edges_dictionary=None, departure_datetime=None):
         """
         Identify the less time-consuming route between two bus_stops.
 
+        If a departure_datetime is provided, then the route is identified based on the expected
+        traffic_density of each edge, at the datetime when it is reached.
+
         :param starting_bus_stop: bus_stop_document
         :param ending_bus_stop: bus_stop_document
         :param starting_bus_stop_name: string
         :param ending_bus_stop_name: string
         :param edges_dictionary: {starting_node_osm_id -> [edge_document]}
+        :param departure_datetime: datetime
         :return response: get_route_between_two_bus_stops
         """
         if starting_bus_stop is None and starting_bus_stop_name is not None:
@@ -318,10 +339,17 @@ class Router(object):
         if edges_dictionary is None:
             edges_dictionary = self.get_edges_dictionary()
 
+        traffic_profile_store = None
+
+        if departure_datetime is not None:
+            traffic_profile_store = self.get_traffic_profile_store()
+
         route = identify_path_with_lowest_cost(
             start=starting_bus_stop,
             end=ending_bus_stop,
-            edges_dictionary=edges_dictionary
+            edges_dictionary=edges_dictionary,
+            departure_datetime=departure_datetime,
+            traffic_profile_store=traffic_profile_store
         )
         response = {
             'starting_bus_stop': starting_bus_stop,
@@ -330,12 +358,16 @@ class Router(object):
         }
         return response
 
-    def get_route_between_multiple_bus_stops(self, bus_stops=None, bus_stop_names=None):
+    def get_route_between_multiple_bus_stops(self, bus_stops=None, bus_stop_names=None, departure_datetime=None):
         """
         Identify the less time-consuming route between multiple bus_stops.
 
+        If a departure_datetime is provided, then the route between each pair of bus_stops is identified
+        in time-dependent mode, departing at the arrival datetime of the previous one.
+
         :param bus_stops: [bus_stop_document]
         :param bus_stop_names: string
+        :param departure_datetime: datetime
         :return response: get_route_between_multiple_bus_stops
         """
         response = []
@@ -351,12 +383,46 @@ class Router(object):
             intermediate_route = self.get_route_between_two_bus_stops(
                 starting_bus_stop=starting_bus_stop,
                 ending_bus_stop=ending_bus_stop,
-                edges_dictionary=edges_dictionary
+                edges_dictionary=edges_dictionary,
+                departure_datetime=departure_datetime
             )
             response.append(intermediate_route)
 
+            if departure_datetime is not None and intermediate_route.get('route') is not None:
+                departure_datetime += timedelta(seconds=intermediate_route.get('route').get('total_time'))
+
         return response
 
+    def get_traffic_profile_store(self):
+        """
+        Retrieve the traffic_density profiles, which are stored by the Traffic Data Parser.
+        The profiles are loaded again, each time that the Traffic Data Parser saves them.
+
+        :return: traffic_profile_store: TrafficProfileStore (None if the profiles have not been stored)
+        """
+        if not os.path.exists(traffic_data_parser_traffic_profiles_filename):
+            # The warning is logged once, until the profiles are stored, so as not to be repeated
+            # for every segment of a time-dependent route.
+            if self.traffic_profile_store_modification_time != 0:
+                log(module_name='Router', log_type='WARNING',
+                    log_message='traffic_profile_store: ' + traffic_data_parser_traffic_profiles_filename +
+                                ' was not found - the current traffic_density is used for time-dependent routing')
+
+            self.traffic_profile_store = None
+            self.traffic_profile_store_modification_time = 0
+            return None
+
+        modification_time = os.path.getmtime(traffic_data_parser_traffic_profiles_filename)
+
+        if modification_time != self.traffic_profile_store_modification_time:
+            self.traffic_profile_store = TrafficProfileStore.load(
+                filename=traffic_data_parser_traffic_profiles_filename
+            )
+            self.traffic_profile_store_modification_time = modification_time
+            log(module_name='Router', log_type='DEBUG', log_message='traffic_profile_store: loaded')
+
+        return self.traffic_profile_store
+
     def get_waypoints_between_two_bus_stops(self, starting_bus_stop=None, ending_bus_stop=None,
                                             starting_bus_stop_name=None, ending_bus_stop_name=None):
         """
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -138,10 +146,19 @@ get_waypoints_between_multiple_bus_stops: [{
     }]]
 }]
 """
-from src.common.parameters import mongodb_host, mongodb_port
-from src.mongodb_database.mongodb_database_connection import MongodbDatabaseConnection
+import time
+from datetime import datetime
+from pymongo.errors import PyMongoError
+from src.common.parameters import mongodb_host, mongodb_port, traffic_data_parser_event_timeout, \
+    traffic_data_parser_max_operation_timeout, traffic_data_parser_traffic_profiles_bucket_duration, \
+    traffic_data_parser_traffic_profiles_filename
+from src.mongodb_database.mongodb_database_connection import MongodbDatabaseConnection, \
+    traffic_matching_edge_projection
 from src.common.logger import log
-from src.geospatial_data.point import Point, distance
+from src.geospatial_data.point import Point, distance, included_in_convex_polygon
+from src.geospatial_data.edge_index import EdgeIndex
+from src.traffic_data_parser.traffic_density_model import TrafficDensityModel
+from src.traffic_data_parser.traffic_profile_store import TrafficProfileStore
 
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
@@ -155,11 +172,22 @@ class TrafficDataParser(object):
     def __init__(self):
         self.mongodb_database_connection = MongodbDatabaseConnection(host=mongodb_host, port=mongodb_port)
         self.edge_documents = []
+        self.edge_index = EdgeIndex(edge_documents=[])
+        self.traffic_density_model = TrafficDensityModel(edge_documents=[])
+        self.traffic_profile_store = TrafficProfileStore(edge_object_ids=[])
+        # The bucket of the traffic_profile_store which was being recorded, when the store was last saved.
+        self.traffic_profiles_bucket_index = None
         self.traffic_event_documents = []
         self.minimum_latitude = float('inf')
         self.maximum_latitude = float('-inf')
         self.minimum_longitude = float('inf')
         self.maximum_longitude = float('-inf')
+        self.convex_hull = []
+        # The high-water mark of the processed traffic_event_documents: The traffic_event_documents with
+        # greater modified_datetime have not been processed, while the event_ids of the ones with equal
+        # modified_datetime are stored, because they are retrieved again by the next inclusive query.
+        self.last_modified_datetime = None
+        self.last_modified_event_ids = set()
         log(module_name='traffic_data_parser', log_type='DEBUG',
             log_message='mongodb_database_connection: established')
 
@@ -180,6 +208,13 @@ class TrafficDataParser(object):
                     traffic_event_latitude < self.minimum_latitude or traffic_event_latitude > self.maximum_latitude):
             included_in_borders = False
 
+        # The convex_hull is examined only for the traffic_events which are included in the borders.
+        elif len(self.convex_hull) > 2:
+            included_in_borders = included_in_convex_polygon(
+                point=Point(longitude=traffic_event_longitude, latitude=traffic_event_latitude),
+                polygon=self.convex_hull
+            )
+
         return included_in_borders
 
     @staticmethod
@@ -209,9 +244,6 @@ class TrafficDataParser(object):
 
         :return: borders: {'minimum_latitude', 'maximum_latitude', 'minimum_longitude', 'maximum_longitude'}
         """
-        if len(self.edge_documents) == 0:
-            self.retrieve_edge_documents()
-
         self.set_borders_of_operation_area()
 
         borders = {
@@ -222,6 +254,31 @@ class TrafficDataParser(object):
         }
         return borders
 
+    @staticmethod
+    def get_datetime_of_traffic_event_document(traffic_event_document):
+        """
+        Get the datetime (in UTC) when a traffic_event was observed, which is either stored as a datetime,
+        or as an xsd:dateTime string by the CityPulse integration (e.g. '2016-10-11T11:13:21.000Z').
+
+        :param traffic_event_document: traffic_event_document
+        :return: event_datetime: datetime (None if it is not provided or cannot be parsed)
+        """
+        event_datetime = traffic_event_document.get('datetime')
+
+        if isinstance(event_datetime, datetime):
+            return event_datetime.replace(tzinfo=None)
+
+        if not isinstance(event_datetime, basestring):
+            return None
+
+        for datetime_format in ['%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%dT%H:%M:%SZ', '%Y-%m-%d %H:%M:%S']:
+            try:
+                return datetime.strptime(event_datetime, datetime_format)
+            except ValueError:
+                continue
+
+        return None
+
     @staticmethod
     def get_edge_document_with_minimum_distance(traffic_event_document, edge_documents):
         """
@@ -271,75 +328,232 @@ class TrafficDataParser(object):
 
         return edge_document_with_minimum_distance
 
+    def handle_traffic_events(self, edge_object_ids_queue=None,
+                              max_operation_timeout=traffic_data_parser_max_operation_timeout):
+        """
+        Update the traffic_density values of the edge_documents, as soon as new traffic_events are stored,
+        and publish the object_ids of the updated edges to edge_object_ids_queue.
+
+        The Parser is notified about the inserted or updated traffic_event_documents by a change stream.
+        If change streams are not supported by the database server, then the traffic_event_documents
+        are retrieved every traffic_data_parser_event_timeout seconds.
+
+        :param edge_object_ids_queue: multiprocessing.Queue
+        :param max_operation_timeout: int (seconds)
+        :return: None
+        """
+        try:
+            change_stream = self.mongodb_database_connection.get_traffic_event_documents_change_stream(
+                max_await_time_ms=traffic_data_parser_event_timeout * 1000
+            )
+            log(module_name='traffic_data_parser', log_type='DEBUG',
+                log_message='handle_traffic_events: change_stream')
+        except PyMongoError:
+            change_stream = None
+            log(module_name='traffic_data_parser', log_type='DEBUG',
+                log_message='handle_traffic_events: polling')
+
+        initial_time = time.time()
+
+        while time.time() - initial_time < max_operation_timeout:
+            edge_object_ids = self.update_traffic_data()
+
+            if edge_object_ids and edge_object_ids_queue is not None:
+                edge_object_ids_queue.put(edge_object_ids)
+
+            # The Parser waits until a traffic_event_document is stored, or until the timeout expires,
+            # so as the decayed traffic_density values to be stored as well. The rest of the notifications
+            # of a burst are drained, so as all its traffic_event_documents to be handled by a single update.
+            if change_stream is not None:
+                if change_stream.try_next() is not None:
+                    while change_stream.try_next() is not None:
+                        pass
+            else:
+                time.sleep(traffic_data_parser_event_timeout)
+
+        if change_stream is not None:
+            change_stream.close()
+
     def retrieve_edge_documents(self):
-        self.edge_documents = self.mongodb_database_connection.find_edge_documents()
+        """
+        Retrieve the edge_documents and rebuild the EdgeIndex, the TrafficDensityModel and the TrafficProfileStore,
+        keeping the state of the TrafficDensityModel and the profiles of the edges which are still included.
 
-    def retrieve_traffic_event_documents(self):
-        self.traffic_event_documents = self.mongodb_database_connection.find_traffic_event_documents()
+        :return: None
+        """
+        self.edge_documents = self.mongodb_database_connection.find_edge_documents(
+            projection=traffic_matching_edge_projection
+        )
+        self.edge_index = EdgeIndex(edge_documents=self.edge_documents)
+        self.traffic_density_model = self.traffic_density_model.reindex(edge_documents=self.edge_documents)
+        self.retrieve_traffic_profile_store()
+        log(module_name='traffic_data_parser', log_type='DEBUG',
+            log_message='retrieve_edge_documents: ok - number_of_edge_documents: ' + str(len(self.edge_documents)))
 
-    def set_borders_of_operation_area(self):
+    def retrieve_traffic_profile_store(self):
         """
-        Set the minimum and maximum values for longitude and latitude of the operation area.
+        Load the traffic_density profiles, keeping the ones of the edges which are still included
+        in the edge_documents. The profiles are retrieved from memory, if they have already been loaded,
+        otherwise from the stored file. If no profiles have been stored, or if they use a different
+        bucket_duration, then new profiles are created.
 
         :return: None
         """
-        for edge_document in self.edge_documents:
-            starting_node = edge_document.get('starting_node')
-            starting_node_point_document = starting_node.get('point')
-            starting_node_longitude = starting_node_point_document.get('longitude')
-            starting_node_latitude = starting_node_point_document.get('latitude')
+        edge_object_ids = self.traffic_density_model.edge_object_ids
 
-            if starting_node_longitude < self.minimum_longitude:
-                self.minimum_longitude = starting_node_longitude
+        if len(self.traffic_profile_store.edge_object_ids) > 0:
+            traffic_profile_store = self.traffic_profile_store
+        else:
+            traffic_profile_store = TrafficProfileStore.load(filename=traffic_data_parser_traffic_profiles_filename)
 
-            if starting_node_longitude > self.maximum_longitude:
-                self.maximum_longitude = starting_node_longitude
+        if (traffic_profile_store is None or
+                traffic_profile_store.bucket_duration != traffic_data_parser_traffic_profiles_bucket_duration):
+            self.traffic_profile_store = TrafficProfileStore(edge_object_ids=edge_object_ids)
+        else:
+            self.traffic_profile_store = traffic_profile_store.reindex(edge_object_ids=edge_object_ids)
 
-            if starting_node_latitude < self.minimum_latitude:
-                self.minimum_latitude = starting_node_latitude
+    def retrieve_traffic_event_documents(self):
+        self.traffic_event_documents = self.mongodb_database_connection.find_traffic_event_documents()
 
-            if starting_node_latitude > self.maximum_latitude:
-                self.maximum_latitude = starting_node_latitude
+    def set_borders_of_operation_area(self):
+        """
+        Set the minimum and maximum values for longitude and latitude, and the convex_hull of the operation area.
 
-            ending_node = edge_document.get('ending_node')
-            ending_node_point_document = ending_node.get('point')
-            ending_node_longitude = ending_node_point_document.get('longitude')
-            ending_node_latitude = ending_node_point_document.get('latitude')
+        The values are retrieved from the stored operation_area_document, which is created after the import
+        of the edge_documents, so the edge_documents are scanned only if it has not been created.
 
-            if ending_node_longitude < self.minimum_longitude:
-                self.minimum_longitude = ending_node_longitude
+        :return: operation_area_changed: bool (True if the operation area differs from the previous one)
+        """
+        operation_area_document = self.mongodb_database_connection.find_operation_area_document()
 
-            if ending_node_longitude > self.maximum_longitude:
-                self.maximum_longitude = ending_node_longitude
+        if operation_area_document is None:
+            operation_area_document = self.mongodb_database_connection.insert_operation_area_document()
 
-            if ending_node_latitude < self.minimum_latitude:
-                self.minimum_latitude = ending_node_latitude
+        previous_borders = (self.minimum_latitude, self.maximum_latitude, self.minimum_longitude,
+                            self.maximum_longitude, [point.coordinates() for point in self.convex_hull])
 
-            if ending_node_latitude > self.maximum_latitude:
-                self.maximum_latitude = ending_node_latitude
+        if operation_area_document is None:
+            self.minimum_latitude = float('inf')
+            self.maximum_latitude = float('-inf')
+            self.minimum_longitude = float('inf')
+            self.maximum_longitude = float('-inf')
+            self.convex_hull = []
+        else:
+            self.minimum_latitude = operation_area_document.get('minimum_latitude')
+            self.maximum_latitude = operation_area_document.get('maximum_latitude')
+            self.minimum_longitude = operation_area_document.get('minimum_longitude')
+            self.maximum_longitude = operation_area_document.get('maximum_longitude')
+            self.convex_hull = [
+                Point(longitude=point.get('longitude'), latitude=point.get('latitude'))
+                for point in operation_area_document.get('convex_hull')
+            ]
+
+        borders = (self.minimum_latitude, self.maximum_latitude, self.minimum_longitude,
+                   self.maximum_longitude, [point.coordinates() for point in self.convex_hull])
+        operation_area_changed = borders != previous_borders
+        return operation_area_changed
 
     def update_traffic_data(self):
         """
+        Update the traffic_density values of the edge_documents, based on the traffic_event_documents
+        which have been inserted or updated since the previous call.
 
-        :return: None
+        Each traffic_event is matched to the edge whose segment is closest to its point, using the grid index
+        of the edge_documents, and it is added to the TrafficDensityModel, replacing the contribution of its
+        previous report (if any) and decaying from the datetime of the event. The traffic_density values which
+        have changed significantly, either because of new traffic_events or because of decay,
+        are stored with a single bulk operation.
+
+        :return: edge_object_ids: [ObjectId] (The edges whose traffic_density value was updated)
         """
-        self.retrieve_edge_documents()
-        self.retrieve_traffic_event_documents()
-        self.set_borders_of_operation_area()
+        # The edge_documents, and the structures which are based on them, are retrieved again if edge_documents
+        # have been inserted or deleted since the previous call, which also changes the operation area.
+        operation_area_changed = self.set_borders_of_operation_area()
+
+        if operation_area_changed or \
+                self.mongodb_database_connection.get_number_of_edge_documents() != len(self.edge_documents):
+            self.retrieve_edge_documents()
+
+        # traffic_event_documents without modified_datetime are stamped once by the database server,
+        # so as they are processed in this or the next call, instead of being treated as new in every call.
+        self.mongodb_database_connection.update_modified_datetime_of_traffic_event_documents()
 
-        for traffic_event_document in self.traffic_event_documents:
+        # The traffic_event_documents are processed while they are retrieved from the database in batches,
+        # without being stored in memory.
+        traffic_event_documents = self.mongodb_database_connection.iter_traffic_event_documents(
+            min_modified_datetime=self.last_modified_datetime
+        )
+
+        for traffic_event_document in traffic_event_documents:
+            event_id = traffic_event_document.get('event_id')
+            modified_datetime = traffic_event_document.get('modified_datetime')
+
+            if modified_datetime is None:
+                # traffic_event_documents inserted after update_modified_datetime_of_traffic_event_documents
+                # are stamped and processed in the next call.
+                continue
+
+            elif modified_datetime == self.last_modified_datetime:
+                if event_id in self.last_modified_event_ids:
+                    continue
+
+                self.last_modified_event_ids.add(event_id)
+
+            else:
+                self.last_modified_datetime = modified_datetime
+                self.last_modified_event_ids = {event_id}
 
             if self.check_borders_of_traffic_event_document(traffic_event_document=traffic_event_document):
-                edge_document_with_minimum_distance = self.get_edge_document_with_minimum_distance(
-                    traffic_event_document=traffic_event_document,
-                    edge_documents=self.edge_documents
+                edge_document_with_minimum_distance, _ = self.edge_index.get_nearest_edge_document(
+                    longitude=traffic_event_document.get('point').get('longitude'),
+                    latitude=traffic_event_document.get('point').get('latitude')
                 )
                 traffic_density_value = self.estimate_traffic_density_value(
                     event_level=traffic_event_document.get('event_level')
                 )
-                self.mongodb_database_connection.update_traffic_density(
+                # modified_datetime changes every time that a traffic_event is reported again,
+                # so it is used only if the datetime of the traffic_event is not available.
+                event_datetime = self.get_datetime_of_traffic_event_document(
+                    traffic_event_document=traffic_event_document
+                )
+                self.traffic_density_model.add_traffic_event(
                     edge_object_id=edge_document_with_minimum_distance.get('_id'),
-                    new_traffic_density_value=traffic_density_value
+                    traffic_density_value=traffic_density_value,
+                    event_datetime=event_datetime if event_datetime is not None else modified_datetime,
+                    event_id=event_id
                 )
             else:
+                self.traffic_density_model.remove_traffic_event(event_id=event_id)
                 print 'traffic_event_document: out_of_borders -', traffic_event_document
+
+        self.traffic_density_model.update(current_datetime=datetime.utcnow())
+        traffic_densities = self.traffic_density_model.get_changed_traffic_densities()
+        self.mongodb_database_connection.update_traffic_densities(traffic_densities=traffic_densities)
+        self.update_traffic_profiles()
+        edge_object_ids = traffic_densities.keys()
+        return edge_object_ids
+
+    def update_traffic_profiles(self):
+        """
+        Record the current traffic_density values of the edges to the time-of-day profiles.
+        The profiles are saved each time that a bucket is completed, so as the Route Generator
+        to use them for time-dependent routing.
+
+        :return: None
+        """
+        # The buckets correspond to the local time of day, like the departure datetimes of timetables.
+        current_datetime = datetime.now()
+        self.traffic_profile_store.record(
+            traffic_densities=self.traffic_density_model.get_traffic_densities(),
+            current_datetime=current_datetime
+        )
+        bucket_index = self.traffic_profile_store.get_bucket_index(datetime_=current_datetime)
+
+        if self.traffic_profiles_bucket_index is None:
+            self.traffic_profiles_bucket_index = bucket_index
+
+        elif bucket_index != self.traffic_profiles_bucket_index:
+            self.traffic_profile_store.save(filename=traffic_data_parser_traffic_profiles_filename)
+            self.traffic_profiles_bucket_index = bucket_index
+            log(module_name='traffic_data_parser', log_type='DEBUG',
+                log_message='traffic_profile_store: saved')
@@ -0,0 +1,420 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+"""
+- LICENCE
+
+The MIT License (MIT)
+
+Copyright (c) 2016 Eleftherios Anagnostopoulos for Ericsson AB (EU FP7 CityPulse Project)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+
+- DESCRIPTION OF DOCUMENTS
+
+-- MongoDB Database Documents:
+
+address_document: {
+    '_id', 'name', 'node_id', 'point': {'longitude', 'latitude'}
+}
+bus_line_document: {
+    '_id', 'bus_line_id', 'bus_stops': [{'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}]
+}
+bus_stop_document: {
+    '_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}
+}
+bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_object_id]]
+}
+bus_vehicle_document: {
+    '_id', 'bus_vehicle_id', 'maximum_capacity',
+    'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
+}
+counter_document: {
+    '_id', 'sequence_value'
+}
+detailed_bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_document]]
+}
+edge_document: {
+    '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'max_speed', 'road_type', 'way_id', 'traffic_density'
+}
+node_document: {
+    '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
+}
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
+point_document: {
+    '_id', 'osm_id', 'point': {'longitude', 'latitude'}
+}
+timetable_document: {
+    '_id', 'timetable_id', 'bus_line_id', 'bus_vehicle_id',
+    'timetable_entries': [{
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime', 'number_of_onboarding_passengers',
+        'number_of_deboarding_passengers', 'number_of_current_passengers',
+        'route': {
+            'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+            'distances_from_starting_node', 'times_from_starting_node',
+            'distances_from_previous_node', 'times_from_previous_node'
+        }
+    }],
+    'travel_requests': [{
+        '_id', 'client_id', 'bus_line_id',
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime',
+        'starting_timetable_entry_index', 'ending_timetable_entry_index'
+    }]
+}
+traffic_event_document: {
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
+}
+travel_request_document: {
+    '_id', 'client_id', 'bus_line_id',
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'departure_datetime', 'arrival_datetime',
+    'starting_timetable_entry_index', 'ending_timetable_entry_index'
+}
+way_document: {
+    '_id', 'osm_id', 'tags', 'references'
+}
+
+-- Route Generator Responses:
+
+get_route_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}
+get_route_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}]
+get_waypoints_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}
+get_waypoints_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}]
+"""
+import math
+import numpy as np
+
+from src.common.parameters import traffic_data_parser_traffic_density_half_life, \
+    traffic_data_parser_traffic_density_neighbour_spread, traffic_data_parser_traffic_density_persistence_threshold
+
+__author__ = 'Eleftherios Anagnostopoulos'
+__email__ = 'eanagnostopoulos@hotmail.com'
+__credits__ = [
+    'Azadeh Bararsani (Senior Researcher at Ericsson AB) - email: azadeh.bararsani@ericsson.com'
+    'Aneta Vulgarakis Feljan (Senior Researcher at Ericsson AB) - email: aneta.vulgarakis@ericsson.com'
+]
+
+
+class TrafficDensityModel(object):
+    """
+    The traffic_density state of the edges, which combines multiple traffic_events, decays over time,
+    and spreads to the neighbouring edges.
+
+    The state of each edge is a non-negative load, stored in an array which is indexed by the dense index
+    of the edge. Each traffic_event adds to the load of its edge (and partially to the loads of the edges
+    which share a node with it) the value -log(1 - traffic_density_value), so as the traffic_density of
+    an edge, which is equal to 1 - exp(-load), to be equal to the traffic_density_value of a single event,
+    and to approach 1 as more events are combined. The loads decay exponentially, based on a half life.
+
+    Only the loads which are produced by the model itself are decayed. The traffic_density values, which are
+    stored by other producers (e.g. the Traffic Data Simulator), are not loaded into the model, and an edge is
+    only written when its modelled traffic_density differs from the value that the model has last written.
+    The Traffic Data Simulator and the Traffic Data Parser both write the traffic_density field, so they
+    should not operate on the same edges at the same time.
+    """
+
+    def __init__(self, edge_documents, half_life=traffic_data_parser_traffic_density_half_life,
+                 neighbour_spread=traffic_data_parser_traffic_density_neighbour_spread,
+                 persistence_threshold=traffic_data_parser_traffic_density_persistence_threshold):
+        """
+        Initialize the TrafficDensityModel, with zero loads for all the edge_documents.
+
+        :param edge_documents: [edge_document]
+        :param half_life: float (seconds)
+        :param neighbour_spread: float (The fraction of the load of a traffic_event added to the neighbouring edges)
+        :param persistence_threshold: float (The minimum change of a traffic_density, in order to be stored)
+        :return: None
+        """
+        self.half_life = float(half_life)
+        self.neighbour_spread = float(neighbour_spread)
+        self.persistence_threshold = float(persistence_threshold)
+
+        self.edge_object_ids = [edge_document.get('_id') for edge_document in edge_documents]
+        self.edge_indexes = dict((edge_object_id, i) for i, edge_object_id in enumerate(self.edge_object_ids))
+
+        # The traffic_density values which have been last written to the database by the model.
+        self.persisted_traffic_densities = np.zeros(len(self.edge_object_ids), dtype=float)
+        self.loads = np.zeros(len(self.edge_object_ids), dtype=float)
+        self.last_update_datetime = None
+
+        # The traffic_events which have not been applied yet: [edge_index], [load], [datetime]
+        self.pending_edge_indexes = []
+        self.pending_loads = []
+        self.pending_datetimes = []
+
+        # The contribution of each traffic_event, which has been added with an event_id, so as to be replaced
+        # when the same traffic_event is reported again: {event_id -> (edge_index, load, event_datetime)}
+        self.traffic_events = {}
+
+        self.neighbour_offsets = np.zeros(1, dtype=int)
+        self.neighbour_indexes = np.zeros(0, dtype=int)
+        self.build_neighbours(edge_documents=edge_documents)
+
+    def add_traffic_event(self, edge_object_id, traffic_density_value, event_datetime, event_id=None):
+        """
+        Add a traffic_event, which is applied to the loads of the edges during the next update.
+
+        If an event_id is provided, then the contribution of a previous report of the same traffic_event
+        is replaced, instead of being combined with the new one.
+
+        :param edge_object_id: ObjectId
+        :param traffic_density_value: float [0, 1)
+        :param event_datetime: datetime
+        :param event_id: string
+        :return: True if the edge is included in the model, otherwise False.
+        """
+        if event_id is not None:
+            self.remove_traffic_event(event_id=event_id)
+
+        edge_index = self.edge_indexes.get(edge_object_id)
+
+        if edge_index is None:
+            return False
+
+        load = -math.log(1.0 - min(traffic_density_value, 0.99))
+        self.pending_edge_indexes.append(edge_index)
+        self.pending_loads.append(load)
+        self.pending_datetimes.append(event_datetime)
+
+        if event_id is not None:
+            self.traffic_events[event_id] = (edge_index, load, event_datetime)
+
+        return True
+
+    def build_neighbours(self, edge_documents):
+        """
+        Identify the neighbouring edges of each edge, which are the edges that share a node with it,
+        and store them in compressed sparse row format.
+
+        :param edge_documents: [edge_document]
+        :return: None (Updates neighbour_offsets and neighbour_indexes)
+        """
+        edge_indexes_of_nodes = {}
+
+        for edge_index, edge_document in enumerate(edge_documents):
+            for node in [edge_document.get('starting_node'), edge_document.get('ending_node')]:
+                edge_indexes_of_nodes.setdefault(node.get('osm_id'), []).append(edge_index)
+
+        neighbours = [set() for _ in range(0, len(edge_documents))]
+
+        for edge_indexes in edge_indexes_of_nodes.itervalues():
+            for edge_index in edge_indexes:
+                neighbours[edge_index].update(edge_indexes)
+
+        for edge_index in range(0, len(edge_documents)):
+            neighbours[edge_index].discard(edge_index)
+
+        self.neighbour_offsets = np.cumsum([0] + [len(edge_neighbours) for edge_neighbours in neighbours])
+        self.neighbour_indexes = np.array(
+            [neighbour for edge_neighbours in neighbours for neighbour in sorted(edge_neighbours)], dtype=int
+        )
+
+    def decay_factor(self, seconds):
+        """
+        Calculate the factor by which a load decays during a time interval.
+
+        :param seconds: float or np.ndarray
+        :return: float or np.ndarray
+        """
+        return np.exp(-np.log(2.0) * np.maximum(seconds, 0.0) / self.half_life)
+
+    def get_changed_traffic_densities(self):
+        """
+        Get the traffic_density values which differ more than the persistence_threshold from the ones
+        that the model has last written, and mark them as written.
+
+        :return: traffic_densities: {edge_object_id -> new_traffic_density_value}
+        """
+        traffic_densities = self.get_traffic_densities()
+        traffic_densities[traffic_densities < self.persistence_threshold] = 0.0
+        changed_edge_indexes = np.flatnonzero(
+            np.abs(traffic_densities - self.persisted_traffic_densities) > self.persistence_threshold
+        )
+        self.persisted_traffic_densities[changed_edge_indexes] = traffic_densities[changed_edge_indexes]
+
+        changed_traffic_densities = dict(
+            (self.edge_object_ids[edge_index], round(float(traffic_densities[edge_index]), 3))
+            for edge_index in changed_edge_indexes
+        )
+        return changed_traffic_densities
+
+    def get_traffic_densities(self):
+        """
+        Get the current traffic_density values of all the edges.
+
+        :return: traffic_densities: np.ndarray
+        """
+        return -np.expm1(-self.loads)
+
+    def reindex(self, edge_documents):
+        """
+        Create a TrafficDensityModel for a new list of edge_documents, keeping the loads, the pending
+        traffic_events and the contributions of the traffic_events of the existing edges.
+
+        :param edge_documents: [edge_document]
+        :return: traffic_density_model: TrafficDensityModel
+        """
+        traffic_density_model = TrafficDensityModel(
+            edge_documents=edge_documents,
+            half_life=self.half_life,
+            neighbour_spread=self.neighbour_spread,
+            persistence_threshold=self.persistence_threshold
+        )
+        new_edge_indexes = dict(
+            (old_edge_index, traffic_density_model.edge_indexes.get(edge_object_id))
+            for old_edge_index, edge_object_id in enumerate(self.edge_object_ids)
+            if edge_object_id in traffic_density_model.edge_indexes
+        )
+        old_edge_indexes = new_edge_indexes.keys()
+        traffic_density_model.loads[new_edge_indexes.values()] = self.loads[old_edge_indexes]
+        traffic_density_model.persisted_traffic_densities[new_edge_indexes.values()] = \
+            self.persisted_traffic_densities[old_edge_indexes]
+        traffic_density_model.last_update_datetime = self.last_update_datetime
+
+        for edge_index, load, event_datetime in zip(self.pending_edge_indexes, self.pending_loads,
+                                                    self.pending_datetimes):
+            if edge_index in new_edge_indexes:
+                traffic_density_model.pending_edge_indexes.append(new_edge_indexes.get(edge_index))
+                traffic_density_model.pending_loads.append(load)
+                traffic_density_model.pending_datetimes.append(event_datetime)
+
+        for event_id, (edge_index, load, event_datetime) in self.traffic_events.iteritems():
+            if edge_index in new_edge_indexes:
+                traffic_density_model.traffic_events[event_id] = (
+                    new_edge_indexes.get(edge_index), load, event_datetime
+                )
+
+        return traffic_density_model
+
+    def remove_traffic_event(self, event_id):
+        """
+        Remove the contribution of a traffic_event, which has been added with an event_id,
+        during the next update. Since all the loads decay at the same rate, the contribution is cancelled
+        by a negative load with the same event_datetime.
+
+        :param event_id: string
+        :return: True if the traffic_event was included in the model, otherwise False.
+        """
+        traffic_event = self.traffic_events.pop(event_id, None)
+
+        if traffic_event is None:
+            return False
+
+        edge_index, load, event_datetime = traffic_event
+        self.pending_edge_indexes.append(edge_index)
+        self.pending_loads.append(-load)
+        self.pending_datetimes.append(event_datetime)
+        return True
+
+    def update(self, current_datetime):
+        """
+        Decay the loads of the edges until current_datetime, and apply the pending traffic_events.
+
+        :param current_datetime: datetime
+        :return: None (Updates loads)
+        """
+        if self.last_update_datetime is not None:
+            self.loads *= self.decay_factor(seconds=(current_datetime - self.last_update_datetime).total_seconds())
+
+        self.last_update_datetime = current_datetime
+
+        if len(self.pending_edge_indexes) == 0:
+            return
+
+        edge_indexes = np.array(self.pending_edge_indexes, dtype=int)
+        loads = np.array(self.pending_loads, dtype=float) * self.decay_factor(
+            seconds=np.array([(current_datetime - event_datetime).total_seconds()
+                              for event_datetime in self.pending_datetimes])
+        )
+        np.add.at(self.loads, edge_indexes, loads)
+
+        # The load of each traffic_event is partially added to the neighbouring edges of its edge.
+        if self.neighbour_spread > 0 and len(self.neighbour_indexes) > 0:
+            numbers_of_neighbours = self.neighbour_offsets[edge_indexes + 1] - self.neighbour_offsets[edge_indexes]
+            neighbour_positions = np.concatenate([
+                np.arange(self.neighbour_offsets[edge_index], self.neighbour_offsets[edge_index + 1])
+                for edge_index in edge_indexes
+            ])
+            np.add.at(
+                self.loads,
+                self.neighbour_indexes[neighbour_positions],
+                np.repeat(loads * self.neighbour_spread, numbers_of_neighbours)
+            )
+
+        # The removed contributions are cancelled up to rounding errors.
+        np.maximum(self.loads, 0.0, out=self.loads)
+
+        self.pending_edge_indexes = []
+        self.pending_loads = []
+        self.pending_datetimes = []
+
+        # The contributions which have decayed below the persistence_threshold are no longer replaced.
+        for event_id, (_, load, event_datetime) in self.traffic_events.items():
+            if load * self.decay_factor(seconds=(current_datetime - event_datetime).total_seconds()) < \
+                    self.persistence_threshold:
+                del self.traffic_events[event_id]
@@ -0,0 +1,323 @@
+#!/usr/local/bin/python
+# -*- coding: utf-8 -*-
+"""
+- LICENCE
+
+The MIT License (MIT)
+
+Copyright (c) 2016 Eleftherios Anagnostopoulos for Ericsson AB (EU FP7 CityPulse Project)
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+
+
+- DESCRIPTION OF DOCUMENTS
+
+-- MongoDB Database Documents:
+
+address_document: {
+    '_id', 'name', 'node_id', 'point': {'longitude', 'latitude'}
+}
+bus_line_document: {
+    '_id', 'bus_line_id', 'bus_stops': [{'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}}]
+}
+bus_stop_document: {
+    '_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}
+}
+bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_object_id]]
+}
+bus_vehicle_document: {
+    '_id', 'bus_vehicle_id', 'maximum_capacity',
+    'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
+}
+counter_document: {
+    '_id', 'sequence_value'
+}
+detailed_bus_stop_waypoints_document: {
+    '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[edge_document]]
+}
+edge_document: {
+    '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+    'max_speed', 'road_type', 'way_id', 'traffic_density'
+}
+node_document: {
+    '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
+}
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
+point_document: {
+    '_id', 'osm_id', 'point': {'longitude', 'latitude'}
+}
+timetable_document: {
+    '_id', 'timetable_id', 'bus_line_id', 'bus_vehicle_id',
+    'timetable_entries': [{
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime', 'number_of_onboarding_passengers',
+        'number_of_deboarding_passengers', 'number_of_current_passengers',
+        'route': {
+            'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+            'distances_from_starting_node', 'times_from_starting_node',
+            'distances_from_previous_node', 'times_from_previous_node'
+        }
+    }],
+    'travel_requests': [{
+        '_id', 'client_id', 'bus_line_id',
+        'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+        'departure_datetime', 'arrival_datetime',
+        'starting_timetable_entry_index', 'ending_timetable_entry_index'
+    }]
+}
+traffic_event_document: {
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
+}
+travel_request_document: {
+    '_id', 'client_id', 'bus_line_id',
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'departure_datetime', 'arrival_datetime',
+    'starting_timetable_entry_index', 'ending_timetable_entry_index'
+}
+way_document: {
+    '_id', 'osm_id', 'tags', 'references'
+}
+
+-- Route Generator Responses:
+
+get_route_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}
+get_route_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'route': {
+        'total_distance', 'total_time', 'node_osm_ids', 'points', 'edges',
+        'distances_from_starting_node', 'times_from_starting_node',
+        'distances_from_previous_node', 'times_from_previous_node'
+    }
+}]
+get_waypoints_between_two_bus_stops: {
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}
+get_waypoints_between_multiple_bus_stops: [{
+    'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
+    'waypoints': [[{
+        '_id', 'starting_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'ending_node': {'osm_id', 'point': {'longitude', 'latitude'}},
+        'max_speed', 'road_type', 'way_id', 'traffic_density'
+    }]]
+}]
+"""
+import math
+import os
+import numpy as np
+from bson import ObjectId
+
+from src.common.parameters import traffic_data_parser_traffic_profiles_bucket_duration, \
+    traffic_data_parser_traffic_profiles_history
+
+__author__ = 'Eleftherios Anagnostopoulos'
+__email__ = 'eanagnostopoulos@hotmail.com'
+__credits__ = [
+    'Azadeh Bararsani (Senior Researcher at Ericsson AB) - email: azadeh.bararsani@ericsson.com'
+    'Aneta Vulgarakis Feljan (Senior Researcher at Ericsson AB) - email: aneta.vulgarakis@ericsson.com'
+]
+
+
+class TrafficProfileStore(object):
+    """
+    The historical traffic_density profiles of the edges, in time-of-day buckets.
+
+    The profiles are stored in two arrays, with one row per bucket and one column per edge: the time-weighted
+    average of the observed traffic_density values, and the observed duration (in seconds). The observed
+    duration is limited to a number of days (history), so as the profiles to follow gradual changes of traffic.
+    """
+
+    def __init__(self, edge_object_ids, bucket_duration=traffic_data_parser_traffic_profiles_bucket_duration,
+                 history=traffic_data_parser_traffic_profiles_history, traffic_densities=None, durations=None):
+        """
+        Initialize the TrafficProfileStore.
+
+        :param edge_object_ids: [ObjectId]
+        :param bucket_duration: int (seconds)
+        :param history: int (days)
+        :param traffic_densities: np.ndarray (number_of_buckets x number_of_edges)
+        :param durations: np.ndarray (number_of_buckets x number_of_edges)
+        :return: None
+        """
+        self.bucket_duration = int(bucket_duration)
+        self.number_of_buckets = int(math.ceil(86400.0 / self.bucket_duration))
+        self.maximum_duration = float(history * self.bucket_duration)
+
+        self.edge_object_ids = list(edge_object_ids)
+        self.edge_indexes = dict((edge_object_id, i) for i, edge_object_id in enumerate(self.edge_object_ids))
+
+        shape = (self.number_of_buckets, len(self.edge_object_ids))
+        self.traffic_densities = np.zeros(shape, dtype=np.float32) if traffic_densities is None else traffic_densities
+        self.durations = np.zeros(shape, dtype=np.float32) if durations is None else durations
+        self.last_record_datetime = None
+
+    def get_bucket_index(self, datetime_):
+        """
+        Get the index of the time-of-day bucket which includes a datetime.
+
+        :param datetime_: datetime
+        :return: bucket_index: int
+        """
+        seconds_of_day = datetime_.hour * 3600 + datetime_.minute * 60 + datetime_.second
+        bucket_index = seconds_of_day // self.bucket_duration
+        return bucket_index
+
+    def get_expected_traffic_density(self, edge_object_id, datetime_):
+        """
+        Get the expected traffic_density of an edge, at the time-of-day of a datetime.
+
+        :param edge_object_id: ObjectId
+        :param datetime_: datetime
+        :return: expected_traffic_density: float (None if there are no observations)
+        """
+        edge_index = self.edge_indexes.get(edge_object_id)
+
+        if edge_index is None:
+            return None
+
+        bucket_index = self.get_bucket_index(datetime_=datetime_)
+
+        if self.durations[bucket_index, edge_index] <= 0:
+            return None
+
+        expected_traffic_density = float(self.traffic_densities[bucket_index, edge_index])
+        return expected_traffic_density
+
+    @staticmethod
+    def load(filename):
+        """
+        Load a TrafficProfileStore from a file.
+
+        :param filename: string
+        :return: traffic_profile_store: TrafficProfileStore (None if the file does not exist)
+        """
+        if not os.path.exists(filename):
+            return None
+
+        data = np.load(filename)
+        traffic_profile_store = TrafficProfileStore(
+            edge_object_ids=[ObjectId(edge_object_id) for edge_object_id in data['edge_object_ids']],
+            bucket_duration=int(data['bucket_duration']),
+            traffic_densities=data['traffic_densities'],
+            durations=data['durations']
+        )
+        data.close()
+        return traffic_profile_store
+
+    def record(self, traffic_densities, current_datetime):
+        """
+        Record the traffic_density values of all the edges, which are considered to have been observed
+        from the previous record until current_datetime.
+
+        :param traffic_densities: np.ndarray (Indexed like edge_object_ids)
+        :param current_datetime: datetime
+        :return: None (Updates traffic_densities and durations)
+        """
+        previous_record_datetime = self.last_record_datetime
+        self.last_record_datetime = current_datetime
+
+        if previous_record_datetime is None or len(self.edge_object_ids) == 0:
+            return
+
+        # Intervals without records (e.g. while the process was stopped) are not attributed to the current bucket.
+        seconds = min((current_datetime - previous_record_datetime).total_seconds(), self.bucket_duration)
+
+        if seconds <= 0:
+            return
+
+        bucket_index = self.get_bucket_index(datetime_=current_datetime)
+        durations = self.durations[bucket_index] + seconds
+        self.traffic_densities[bucket_index] += (
+            (traffic_densities - self.traffic_densities[bucket_index]) * (seconds / durations)
+        ).astype(np.float32)
+        self.durations[bucket_index] = np.minimum(durations, self.maximum_duration)
+
+    def reindex(self, edge_object_ids):
+        """
+        Create a TrafficProfileStore for a new list of edges, keeping the profiles of the existing ones.
+
+        :param edge_object_ids: [ObjectId]
+        :return: traffic_profile_store: TrafficProfileStore
+        """
+        traffic_profile_store = TrafficProfileStore(
+            edge_object_ids=edge_object_ids,
+            bucket_duration=self.bucket_duration
+        )
+        new_edge_indexes = []
+        old_edge_indexes = []
+
+        for new_edge_index, edge_object_id in enumerate(traffic_profile_store.edge_object_ids):
+            old_edge_index = self.edge_indexes.get(edge_object_id)
+
+            if old_edge_index is not None:
+                new_edge_indexes.append(new_edge_index)
+                old_edge_indexes.append(old_edge_index)
+
+        traffic_profile_store.traffic_densities[:, new_edge_indexes] = self.traffic_densities[:, old_edge_indexes]
+        traffic_profile_store.durations[:, new_edge_indexes] = self.durations[:, old_edge_indexes]
+        return traffic_profile_store
+
+    def save(self, filename):
+        """
+        Save the TrafficProfileStore to a file. The file is replaced atomically,
+        so as concurrent readers (e.g. the Route Generator) not to load a partially written one.
+
+        :param filename: string
+        :return: None
+        """
+        temporary_filename = filename + '.tmp'
+
+        with open(temporary_filename, 'wb') as temporary_file:
+            np.savez_compressed(
+                temporary_file,
+                edge_object_ids=np.array([str(edge_object_id) for edge_object_id in self.edge_object_ids]),
+                bucket_duration=self.bucket_duration,
+                traffic_densities=self.traffic_densities,
+                durations=self.durations
+            )
+
+        os.rename(temporary_filename, filename)
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_bus_line_id',
@@ -139,7 +147,7 @@ get_waypoints_between_multiple_bus_stops: [{
 }]
 """
 import time
-from multiprocessing import Process
+from multiprocessing import Process, Queue
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
@@ -150,6 +158,7 @@ from src.common.logger import log
 from tests.look_ahead_test import LookAheadHandlerTester
 from tests.mongodb_database_connection_test import MongodbDatabaseConnectionTester
 from tests.osm_parser_test import OsmParserTester
+from tests.traffic_data_parser_test import TrafficDataParserTester
 from tests.traffic_data_simulator_test import TrafficDataSimulatorTester
 from tests.travel_requests_simulator_test import TravelRequestsSimulatorTester
 from tests.route_generator_test import test_get_route_between_two_bus_stops, test_get_route_between_multiple_bus_stops,\
@@ -174,6 +183,7 @@ class ApplicationTester(object):
         self.osm_parser_tester = self.initialize_osm_parser_tester()
         self.travel_requests_simulator_tester = self.initialize_travel_requests_simulator_tester()
         self.traffic_data_simulator_tester = self.initialize_traffic_data_simulator_tester()
+        self.traffic_data_parser_tester = self.initialize_traffic_data_parser_tester()
         self.look_ahead_handler_tester = self.initialize_look_ahead_handler_tester()
 
         self.elapsed_time = time.time() - self.start_time
@@ -198,6 +208,11 @@ class ApplicationTester(object):
         )
         return osm_parser_tester
 
+    @staticmethod
+    def initialize_traffic_data_parser_tester():
+        traffic_data_parser_tester = TrafficDataParserTester()
+        return traffic_data_parser_tester
+
     @staticmethod
     def initialize_traffic_data_simulator_tester():
         traffic_data_simulator_tester = TrafficDataSimulatorTester()
@@ -222,6 +237,8 @@ if __name__ == '__main__':
     timetables_updater_process = None
     travel_requests_generator_process = None
     traffic_data_generator_process = None
+    traffic_data_parser_event_driven_process = None
+    timetables_updater_event_driven_process = None
 
     while True:
         time.sleep(0.01)
@@ -253,6 +270,8 @@ if __name__ == '__main__':
             '\n24. (travel_requests_simulator) - terminate_travel_requests_generator_process'
             '\n25. (traffic_data_simulator) ---- start_traffic_data_generator_process'
             '\n26. (traffic_data_simulator) ---- terminate_traffic_data_generator_process'
+            '\n27. (traffic_data_parser) ------- start_event_driven_traffic_pipeline'
+            '\n28. (traffic_data_parser) ------- terminate_event_driven_traffic_pipeline'
             '\nSelection: '
         )
         # 0. exit
@@ -615,5 +634,35 @@ if __name__ == '__main__':
             else:
                 print '\ntraffic_data_simulator: traffic_data_generator_process: None'
 
+        # 27. (traffic_data_parser) - start_event_driven_traffic_pipeline
+        elif selection == '27':
+            # The object_ids of the edges, whose traffic_density is updated by the traffic_data_parser,
+            # are published to the timetables_updater, which updates only the affected bus_lines.
+            edge_object_ids_queue = Queue()
+            traffic_data_parser_event_driven_process = Process(
+                target=application_tester.traffic_data_parser_tester.handle_traffic_data_updater_event_driven_process,
+                args=(edge_object_ids_queue,)
+            )
+            timetables_updater_event_driven_process = Process(
+                target=application_tester.look_ahead_handler_tester.test_timetables_updater_event_driven_process,
+                args=(edge_object_ids_queue,)
+            )
+            traffic_data_parser_event_driven_process.start()
+            timetables_updater_event_driven_process.start()
+            print '\ntraffic_data_parser: event_driven_traffic_pipeline: starting'
+
+        # 28. (traffic_data_parser) - terminate_event_driven_traffic_pipeline
+        elif selection == '28':
+            if traffic_data_parser_event_driven_process is not None:
+                traffic_data_parser_event_driven_process.terminate()
+                traffic_data_parser_event_driven_process.join()
+                traffic_data_parser_event_driven_process = None
+                timetables_updater_event_driven_process.terminate()
+                timetables_updater_event_driven_process.join()
+                timetables_updater_event_driven_process = None
+                print '\ntraffic_data_parser: event_driven_traffic_pipeline: terminated'
+            else:
+                print '\ntraffic_data_parser: event_driven_traffic_pipeline: None'
+
         else:
             pass
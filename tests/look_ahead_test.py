@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -139,7 +147,9 @@ get_waypoints_between_multiple_bus_stops: [{
 }]
 """
 import time
+from datetime import timedelta
 from multiprocessing import Process
+import numpy as np
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
@@ -148,8 +158,11 @@ from src.common.parameters import testing_timetables_starting_datetime, testing_
     testing_travel_requests_min_departure_datetime, testing_travel_requests_max_departure_datetime, \
     look_ahead_timetables_generator_timeout, look_ahead_timetables_generator_max_operation_timeout, \
     look_ahead_timetables_updater_timeout, look_ahead_timetables_updater_max_operation_timeout, testing_bus_line_id, \
-    testing_bus_stop_names
-from src.look_ahead.look_ahead_handler import LookAheadHandler
+    testing_bus_stop_names, look_ahead_number_of_workers
+from src.look_ahead.look_ahead_handler import LookAheadHandler, generate_timetable_arrays_iteratively
+from src.look_ahead.timetable_arrays import TimetableArrays
+from src.look_ahead.timetable_clustering import generate_timetable_arrays_with_optimal_clustering
+from src.look_ahead.timetable_generator import calculate_mean_departure_datetime, partition_travel_requests_list
 
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
@@ -245,8 +258,9 @@ class LookAheadHandlerTester(object):
                            + str(self.elapsed_time) + ' sec'
         log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
 
-    def test_generate_timetables_for_bus_lines(self):
-        self.log_message = 'generate_timetables_for_bus_lines: starting'
+    def test_generate_timetables_for_bus_lines(self, number_of_workers=look_ahead_number_of_workers):
+        self.log_message = 'generate_timetables_for_bus_lines: starting - number_of_workers = ' + \
+                           str(number_of_workers)
         log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
 
         self.start_time = time.time()
@@ -255,6 +269,7 @@ class LookAheadHandlerTester(object):
             timetables_ending_datetime=testing_timetables_ending_datetime,
             requests_min_departure_datetime=testing_travel_requests_min_departure_datetime,
             requests_max_departure_datetime=testing_travel_requests_max_departure_datetime,
+            number_of_workers=number_of_workers
         )
         self.elapsed_time = time.time() - self.start_time
 
@@ -262,6 +277,31 @@ class LookAheadHandlerTester(object):
                            + str(self.elapsed_time) + ' sec'
         log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
 
+    def test_process_bus_lines_in_pool(self, number_of_workers=2, number_of_operations=4):
+        """
+        Smoke run of the worker pool of process_bus_lines, which does not require a System Database.
+        Each operation is called without a bus_line, so it returns immediately, while the pool, the LookAheadHandler
+        of each worker process and the measurement of the elapsed_time are exercised.
+        """
+        self.log_message = 'test_process_bus_lines_in_pool: starting - number_of_workers = ' + str(number_of_workers)
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
+        self.start_time = time.time()
+        elapsed_times_of_bus_lines = self.look_ahead_handler.process_bus_lines(
+            operation='update_timetables_of_bus_line',
+            list_of_keyword_arguments=[{'bus_line': None, 'bus_line_id': None}] * number_of_operations,
+            number_of_workers=number_of_workers
+        )
+        self.elapsed_time = time.time() - self.start_time
+
+        if elapsed_times_of_bus_lines.keys() != [None]:
+            raise AssertionError('test_process_bus_lines_in_pool: unexpected result - ' +
+                                 str(elapsed_times_of_bus_lines))
+
+        self.log_message = 'test_process_bus_lines_in_pool: finished - elapsed_time = ' \
+                           + str(self.elapsed_time) + ' sec'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
     def test_timetables_generator_process(self):
         time_difference = 0
         initial_time = time.time()
@@ -271,6 +311,15 @@ class LookAheadHandlerTester(object):
             time.sleep(look_ahead_timetables_generator_timeout)
             time_difference = time.time() - initial_time
 
+    def test_timetables_updater_event_driven_process(self, edge_object_ids_queue):
+        self.log_message = 'test_timetables_updater_event_driven_process: starting'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
+        self.look_ahead_handler.handle_updated_edges(edge_object_ids_queue=edge_object_ids_queue)
+
+        self.log_message = 'test_timetables_updater_event_driven_process: finished'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
     def test_timetables_updater_process(self):
         time_difference = 0
         initial_time = time.time()
@@ -305,12 +354,236 @@ class LookAheadHandlerTester(object):
         log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
 
 
+def benchmark_partition_travel_requests_list(numbers_of_travel_requests, seed=0):
+    """
+    Compare partition_travel_requests_list with the previous running-mean heuristic, in terms of
+    runtime and average waiting time, for peak-hour travel_requests departing from the same bus_stop.
+
+    :param numbers_of_travel_requests: [int]
+    :param seed: int
+    :return: None
+    """
+    random_state = np.random.RandomState(seed)
+
+    for number_of_travel_requests in numbers_of_travel_requests:
+        travel_requests = generate_peak_hour_travel_requests(
+            number_of_travel_requests=number_of_travel_requests,
+            random_state=random_state
+        )
+        start_time = time.time()
+        travel_requests_lists = partition_travel_requests_list_with_running_means(travel_requests=travel_requests)
+        running_means_elapsed_time = time.time() - start_time
+        running_means_average_waiting_time = calculate_average_waiting_time_of_travel_requests_lists(
+            travel_requests_lists=travel_requests_lists
+        )
+        start_time = time.time()
+        travel_requests_lists = partition_travel_requests_list(travel_requests=travel_requests)
+        two_means_elapsed_time = time.time() - start_time
+        two_means_average_waiting_time = calculate_average_waiting_time_of_travel_requests_lists(
+            travel_requests_lists=travel_requests_lists
+        )
+        log(module_name='look_ahead_handler_tester', log_type='INFO',
+            log_message='benchmark_partition_travel_requests_list: number_of_travel_requests = ' +
+                        str(number_of_travel_requests) +
+                        ' - running_means: elapsed_time = ' + str(running_means_elapsed_time) +
+                        ' sec, average_waiting_time = ' + str(running_means_average_waiting_time) +
+                        ' sec - two_means: elapsed_time = ' + str(two_means_elapsed_time) +
+                        ' sec, average_waiting_time = ' + str(two_means_average_waiting_time) + ' sec')
+
+
+def benchmark_timetables_generation_engines(numbers_of_travel_requests, number_of_bus_stops=20, seed=0):
+    """
+    Compare the 'iterative' and the 'optimal' timetable generation engines, in terms of runtime,
+    number of generated timetables, and resulting waiting time, for a synthetic bus_line.
+
+    :param numbers_of_travel_requests: [int]
+    :param number_of_bus_stops: int
+    :param seed: int
+    :return: None
+    """
+    random_state = np.random.RandomState(seed)
+
+    for number_of_travel_requests in numbers_of_travel_requests:
+        initial_timetable_arrays = TimetableArrays(
+            timetables=generate_synthetic_timetables(number_of_bus_stops=number_of_bus_stops),
+            travel_requests=generate_synthetic_travel_requests(
+                number_of_travel_requests=number_of_travel_requests,
+                number_of_bus_stops=number_of_bus_stops,
+                random_state=random_state
+            )
+        )
+        start_time = time.time()
+        iterative_timetable_arrays = generate_timetable_arrays_iteratively(
+            initial_timetable_arrays=initial_timetable_arrays
+        )
+        iterative_elapsed_time = time.time() - start_time
+
+        start_time = time.time()
+        optimal_timetable_arrays, objective = generate_timetable_arrays_with_optimal_clustering(
+            initial_timetable_arrays=initial_timetable_arrays
+        )
+        optimal_elapsed_time = time.time() - start_time
+
+        results = [
+            ('iterative', iterative_timetable_arrays, iterative_elapsed_time),
+            ('optimal', optimal_timetable_arrays, optimal_elapsed_time)
+        ]
+        for engine, timetable_arrays, elapsed_time in results:
+            log(module_name='look_ahead_handler_tester', log_type='INFO',
+                log_message='benchmark_timetables_generation_engines: number_of_travel_requests = ' +
+                            str(number_of_travel_requests) + ' - ' + engine +
+                            ': elapsed_time = ' + str(elapsed_time) +
+                            ' sec, number_of_timetables = ' + str(len(timetable_arrays.departure_seconds)) +
+                            ', mean_waiting_time = ' + str(np.mean(timetable_arrays.calculate_waiting_times())) +
+                            ' sec, average_waiting_time = ' + str(timetable_arrays.calculate_average_waiting_time()) +
+                            ' sec')
+
+        log(module_name='look_ahead_handler_tester', log_type='INFO',
+            log_message='benchmark_timetables_generation_engines: optimal objective = ' + str(objective))
+
+
+def calculate_average_waiting_time_of_travel_requests_lists(travel_requests_lists):
+    """
+    Calculate the average difference between the departure_datetime of each travel_request
+    and the mean departure_datetime of its list.
+
+    :param travel_requests_lists: {'first_list': [travel_request_document], 'second_list': [travel_request_document]}
+    :return: average_waiting_time: float (in seconds)
+    """
+    waiting_times = []
+
+    for travel_requests in travel_requests_lists.itervalues():
+        departure_seconds = np.array([
+            (travel_request.get('departure_datetime') - testing_travel_requests_min_departure_datetime).total_seconds()
+            for travel_request in travel_requests
+        ])
+        waiting_times.extend(np.abs(departure_seconds - departure_seconds.mean()))
+
+    average_waiting_time = float(np.mean(waiting_times))
+    return average_waiting_time
+
+
+def generate_peak_hour_travel_requests(number_of_travel_requests, random_state):
+    """
+    Generate travel_requests from the same bus_stop, whose departure_datetimes follow
+    two overlapping peaks, at 07:45 and 08:30.
+
+    :param number_of_travel_requests: int
+    :param random_state: np.random.RandomState
+    :return: travel_requests: [{'departure_datetime'}]
+    """
+    peak_seconds = random_state.choice([27900, 30600], size=number_of_travel_requests, p=[0.6, 0.4])
+    departure_seconds = np.rint(peak_seconds + random_state.normal(0, 900, size=number_of_travel_requests))
+    travel_requests = [
+        {'departure_datetime': testing_travel_requests_min_departure_datetime + timedelta(seconds=int(seconds))}
+        for seconds in np.sort(departure_seconds)
+    ]
+    return travel_requests
+
+
+def generate_synthetic_timetables(number_of_bus_stops, interval=600, travelling_time=120):
+    """
+    Generate initial timetables for a synthetic bus_line, departing every interval seconds
+    throughout the testing period, with the same travelling_time between consecutive bus_stops.
+
+    :param number_of_bus_stops: int
+    :param interval: int (in seconds)
+    :param travelling_time: int (in seconds)
+    :return: timetables: [timetable_document]
+    """
+    timetables = []
+    timetable_starting_datetime = testing_timetables_starting_datetime
+
+    while timetable_starting_datetime < testing_timetables_ending_datetime:
+        timetable_entries = []
+
+        for i in range(0, number_of_bus_stops - 1):
+            departure_datetime = timetable_starting_datetime + timedelta(seconds=i * travelling_time)
+            timetable_entries.append({
+                'starting_bus_stop': {'name': str(i)},
+                'ending_bus_stop': {'name': str(i + 1)},
+                'departure_datetime': departure_datetime,
+                'arrival_datetime': departure_datetime + timedelta(seconds=travelling_time),
+                'route': {'total_time': travelling_time}
+            })
+
+        timetables.append({'bus_line_id': testing_bus_line_id, 'timetable_entries': timetable_entries})
+        timetable_starting_datetime += timedelta(seconds=interval)
+
+    return timetables
+
+
+def generate_synthetic_travel_requests(number_of_travel_requests, number_of_bus_stops, random_state):
+    """
+    Generate travel_requests for a synthetic bus_line, with random starting and ending bus_stops,
+    whose departure_datetimes follow a morning and an afternoon peak.
+
+    :param number_of_travel_requests: int
+    :param number_of_bus_stops: int
+    :param random_state: np.random.RandomState
+    :return: travel_requests: [travel_request_document]
+    """
+    starting_timetable_entry_indexes = random_state.randint(0, number_of_bus_stops - 1, size=number_of_travel_requests)
+    ending_timetable_entry_indexes = [
+        random_state.randint(starting_timetable_entry_index, number_of_bus_stops - 1)
+        for starting_timetable_entry_index in starting_timetable_entry_indexes
+    ]
+    peak_seconds = random_state.choice([28800, 61200], size=number_of_travel_requests)
+    departure_seconds = np.clip(peak_seconds + random_state.normal(0, 3600, size=number_of_travel_requests), 0, 86399)
+
+    travel_requests = [
+        {'starting_timetable_entry_index': int(starting_timetable_entry_index),
+         'ending_timetable_entry_index': int(ending_timetable_entry_index),
+         'departure_datetime': testing_travel_requests_min_departure_datetime + timedelta(seconds=int(seconds))}
+        for starting_timetable_entry_index, ending_timetable_entry_index, seconds in zip(
+            starting_timetable_entry_indexes, ending_timetable_entry_indexes, departure_seconds)
+    ]
+    return travel_requests
+
+
+def partition_travel_requests_list_with_running_means(travel_requests):
+    """
+    The previous implementation of partition_travel_requests_list, which assigns each travel_request
+    to the list with the closest mean departure_datetime, recalculating both means in every iteration.
+
+    :param travel_requests: [{'departure_datetime'}] (at least two)
+    :return: travel_requests_lists: {'first_list': [travel_request_document], 'second_list': [travel_request_document]}
+    """
+    first_list_of_travel_requests = [travel_requests[0]]
+    second_list_of_travel_requests = [travel_requests[-1]]
+
+    for travel_request in travel_requests[1:-1]:
+        departure_datetime = travel_request.get('departure_datetime')
+        mean_of_first_list = calculate_mean_departure_datetime(
+            departure_datetimes=[first_travel_request.get('departure_datetime') for first_travel_request in
+                                 first_list_of_travel_requests]
+        )
+        mean_of_second_list = calculate_mean_departure_datetime(
+            departure_datetimes=[second_travel_request.get('departure_datetime') for second_travel_request in
+                                 second_list_of_travel_requests]
+        )
+        if abs(departure_datetime - mean_of_first_list) < abs(departure_datetime - mean_of_second_list):
+            first_list_of_travel_requests.append(travel_request)
+        else:
+            second_list_of_travel_requests.append(travel_request)
+
+    travel_requests_lists = {
+        'first_list': first_list_of_travel_requests,
+        'second_list': second_list_of_travel_requests
+    }
+    return travel_requests_lists
+
+
 if __name__ == '__main__':
     look_ahead_handler_tester = LookAheadHandlerTester()
 
+    # A selection can also be provided as a command line argument, so as to be run non-interactively
+    # (e.g. python look_ahead_test.py 11).
+    selections = sys.argv[1:] + ['0'] if len(sys.argv) > 1 else None
+
     while True:
         time.sleep(0.01)
-        selection = raw_input(
+        selection = selections.pop(0) if selections is not None else raw_input(
             '\n0.  exit'
             '\n1.  test_generate_bus_line'
             '\n2.  test_generate_timetables_for_bus_line'
@@ -319,6 +592,10 @@ if __name__ == '__main__':
             '\n5.  terminate_timetables_generator_process'
             '\n6.  start_timetables_updater_process'
             '\n7.  terminate_timetables_updater_process'
+            '\n8.  benchmark_partition_travel_requests_list'
+            '\n9.  benchmark_timetables_generation_engines'
+            '\n10. test_generate_timetables_for_bus_lines (one worker per CPU core)'
+            '\n11. test_process_bus_lines_in_pool'
             '\nSelection: '
         )
         # 0. exit
@@ -360,5 +637,21 @@ if __name__ == '__main__':
         elif selection == '7':
             look_ahead_handler_tester.terminate_timetables_updater_process()
 
+        # 8. benchmark_partition_travel_requests_list
+        elif selection == '8':
+            benchmark_partition_travel_requests_list(numbers_of_travel_requests=[500, 1000, 2000, 4000])
+
+        # 9. benchmark_timetables_generation_engines
+        elif selection == '9':
+            benchmark_timetables_generation_engines(numbers_of_travel_requests=[1000, 10000, 50000])
+
+        # 10. test_generate_timetables_for_bus_lines (one worker per CPU core)
+        elif selection == '10':
+            look_ahead_handler_tester.test_generate_timetables_for_bus_lines(number_of_workers=None)
+
+        # 11. test_process_bus_lines_in_pool
+        elif selection == '11':
+            look_ahead_handler_tester.test_process_bus_lines_in_pool()
+
         else:
             pass
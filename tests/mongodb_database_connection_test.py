@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -295,6 +303,71 @@ class MongodbDatabaseConnectionTester(object):
             log_message='clear_way_documents_collection: finished - elapsed_time = ' +
                         str(self.elapsed_time) + ' sec')
 
+    def benchmark_indexes(self, number_of_repetitions=10):
+        """
+        Measure the latency of the main query patterns without and with the indexes of the indexes_specification.
+
+        :param number_of_repetitions: int
+        :return: None
+        """
+        log(module_name='mongodb_database_connection_test', log_type='INFO',
+            log_message='benchmark_indexes: starting')
+        self.mongodb_database_connection.drop_indexes()
+        elapsed_time_without_indexes = self.measure_query_patterns(number_of_repetitions=number_of_repetitions)
+        log(module_name='mongodb_database_connection_test', log_type='INFO',
+            log_message='benchmark_indexes: without_indexes - elapsed_time = ' +
+                        str(elapsed_time_without_indexes) + ' sec')
+
+        self.start_time = time.time()
+        self.mongodb_database_connection.ensure_indexes()
+        self.elapsed_time = time.time() - self.start_time
+        log(module_name='mongodb_database_connection_test', log_type='INFO',
+            log_message='benchmark_indexes: ensure_indexes - elapsed_time = ' +
+                        str(self.elapsed_time) + ' sec')
+
+        elapsed_time_with_indexes = self.measure_query_patterns(number_of_repetitions=number_of_repetitions)
+        log(module_name='mongodb_database_connection_test', log_type='INFO',
+            log_message='benchmark_indexes: with_indexes - elapsed_time = ' +
+                        str(elapsed_time_with_indexes) + ' sec')
+        log(module_name='mongodb_database_connection_test', log_type='INFO',
+            log_message='benchmark_indexes: finished')
+
+    def measure_query_patterns(self, number_of_repetitions):
+        """
+        Measure the total time which is required for executing the main query patterns.
+
+        :param number_of_repetitions: int
+        :return: elapsed_time: float
+        """
+        bus_line_document = self.mongodb_database_connection.find_bus_line_document(bus_line_id=1)
+        edge_document = self.mongodb_database_connection.edge_documents_collection.find_one({})
+
+        start_time = time.time()
+
+        for i in range(0, number_of_repetitions):
+            for collection in ['bus_line', 'bus_vehicle', 'timetable', 'travel_request']:
+                self.mongodb_database_connection.get_maximum_or_minimum(collection=collection)
+
+            if bus_line_document is not None:
+                bus_stops = bus_line_document.get('bus_stops')
+                self.mongodb_database_connection.find_bus_stop_waypoints_documents(bus_stops=bus_stops)
+                self.mongodb_database_connection.find_bus_stop_documents(
+                    names=[bus_stop.get('name') for bus_stop in bus_stops]
+                )
+                self.mongodb_database_connection.find_travel_request_documents(bus_line_ids=[1])
+                self.mongodb_database_connection.find_timetable_documents(bus_line_ids=[1])
+
+            if edge_document is not None:
+                self.mongodb_database_connection.find_edge_documents(
+                    starting_node_osm_id=edge_document.get('starting_node').get('osm_id')
+                )
+                self.mongodb_database_connection.has_edges(
+                    node_osm_id=edge_document.get('ending_node').get('osm_id')
+                )
+
+        elapsed_time = time.time() - start_time
+        return elapsed_time
+
     def print_address_documents(self, object_ids=None, names=None, node_ids=None, counter=None):
         """
         Print multiple address_documents.
@@ -544,6 +617,7 @@ if __name__ == '__main__':
             '\n11. print_traffic_density_documents'
             '\n12. print_travel_request_documents'
             '\n13. print_way_documents'
+            '\n14. benchmark_indexes'
             '\nSelection: '
         )
         # 0. exit
@@ -672,3 +746,7 @@ if __name__ == '__main__':
         # 13. print_way_documents
         elif selection == '13':
             mongodb_database_connection_tester.print_way_documents()
+
+        # 14. benchmark_indexes
+        elif selection == '14':
+            mongodb_database_connection_tester.benchmark_indexes()
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -141,6 +149,7 @@ get_waypoints_between_multiple_bus_stops: [{
 import time
 import os
 import sys
+from datetime import datetime, timedelta
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
 from src.common.logger import log
 from src.common.parameters import testing_bus_stop_names
@@ -223,10 +232,11 @@ def test_get_route_between_two_bus_stops(starting_bus_stop=None, ending_bus_stop
                     str(elapsed_time) + ' sec')
 
 
-def test_get_route_between_multiple_bus_stops(bus_stops=None, bus_stop_names=None):
+def test_get_route_between_multiple_bus_stops(bus_stops=None, bus_stop_names=None, departure_datetime=None):
     """
     :param bus_stops: [bus_stop_document]
     :param bus_stop_names: [string]
+    :param departure_datetime: datetime (Enables time-dependent routing)
     """
     log(module_name='route_generator_test', log_type='INFO',
         log_message='get_route_between_multiple_bus_stops: starting')
@@ -246,7 +256,8 @@ def test_get_route_between_multiple_bus_stops(bus_stops=None, bus_stop_names=Non
     # }]
     response = get_route_between_multiple_bus_stops(
         bus_stops=bus_stops,
-        bus_stop_names=bus_stop_names
+        bus_stop_names=bus_stop_names,
+        departure_datetime=departure_datetime
     )
     for intermediate_response in response:
         starting_bus_stop = intermediate_response.get('starting_bus_stop')
@@ -393,6 +404,7 @@ if __name__ == '__main__':
             '\n2.  test_get_route_between_multiple_bus_stops'
             '\n3.  test_get_waypoints_between_two_bus_stops'
             '\n4.  test_get_waypoints_between_multiple_bus_stops'
+            '\n5.  test_get_route_between_multiple_bus_stops (time-dependent, departing in 12 hours)'
             '\nSelection: '
         )
 
@@ -421,5 +433,11 @@ if __name__ == '__main__':
                 bus_stop_names=testing_bus_stop_names
             )
 
+        elif selection == '5':
+            test_get_route_between_multiple_bus_stops(
+                bus_stop_names=testing_bus_stop_names,
+                departure_datetime=datetime.now() + timedelta(hours=12)
+            )
+
         else:
             print 'Invalid input'
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -139,13 +147,16 @@ get_waypoints_between_multiple_bus_stops: [{
 }]
 """
 import time
+from datetime import datetime, timedelta
 from multiprocessing import Process
+import numpy as np
 import os
 import sys
 sys.path.append(os.path.join(os.path.dirname(__file__), '../'))
 from src.common.logger import log
 from src.common.parameters import traffic_data_parser_timeout, traffic_data_parser_max_operation_timeout
 from src.traffic_data_parser.traffic_data_parser import TrafficDataParser
+from src.traffic_data_parser.traffic_density_model import TrafficDensityModel
 
 __author__ = 'Eleftherios Anagnostopoulos'
 __email__ = 'eanagnostopoulos@hotmail.com'
@@ -180,6 +191,15 @@ class TrafficDataParserTester(object):
             time.sleep(traffic_data_parser_timeout)
             time_difference = time.time() - initial_time
 
+    def handle_traffic_data_updater_event_driven_process(self, edge_object_ids_queue=None):
+        self.log_message = 'handle_traffic_data_updater_event_driven_process: starting'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
+        self.traffic_data_parser.handle_traffic_events(edge_object_ids_queue=edge_object_ids_queue)
+
+        self.log_message = 'handle_traffic_data_updater_event_driven_process: finished'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
     def start_traffic_data_parser_process(self):
         if self.traffic_data_parser_process is None:
             self.traffic_data_parser_process = Process(
@@ -234,18 +254,123 @@ class TrafficDataParserTester(object):
                            + str(self.elapsed_time) + ' sec'
         log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
 
+    def benchmark_edge_matching(self):
+        """
+        Compare the brute force matching of traffic_events to edges with the matching of the grid index.
+
+        :return: None
+        """
+        self.log_message = 'benchmark_edge_matching: starting'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
+        self.traffic_data_parser.retrieve_edge_documents()
+        self.traffic_data_parser.retrieve_traffic_event_documents()
+        edge_documents = self.traffic_data_parser.edge_documents
+        traffic_event_documents = self.traffic_data_parser.traffic_event_documents
+
+        self.start_time = time.time()
+        brute_force_edge_ids = [
+            self.traffic_data_parser.get_edge_document_with_minimum_distance(
+                traffic_event_document=traffic_event_document,
+                edge_documents=edge_documents
+            ).get('_id')
+            for traffic_event_document in traffic_event_documents
+        ]
+        brute_force_elapsed_time = time.time() - self.start_time
+
+        self.start_time = time.time()
+        edge_index_edge_ids = [
+            self.traffic_data_parser.edge_index.get_nearest_edge_document(
+                longitude=traffic_event_document.get('point').get('longitude'),
+                latitude=traffic_event_document.get('point').get('latitude')
+            )[0].get('_id')
+            for traffic_event_document in traffic_event_documents
+        ]
+        edge_index_elapsed_time = time.time() - self.start_time
+
+        # The brute force approach minimizes the sum of the distances from the nodes of each edge,
+        # so the matched edges are expected to differ when a traffic_event is located near a long edge.
+        number_of_matching_edge_ids = sum(
+            1 for brute_force_edge_id, edge_index_edge_id in zip(brute_force_edge_ids, edge_index_edge_ids)
+            if brute_force_edge_id == edge_index_edge_id
+        )
+
+        self.log_message = 'benchmark_edge_matching: number_of_edge_documents: ' + str(len(edge_documents)) + \
+                           ' - number_of_traffic_event_documents: ' + str(len(traffic_event_documents)) + \
+                           ' - number_of_matching_edge_ids: ' + str(number_of_matching_edge_ids)
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
+        self.log_message = 'benchmark_edge_matching: finished - brute_force_elapsed_time = ' \
+                           + str(brute_force_elapsed_time) + ' sec - edge_index_elapsed_time = ' \
+                           + str(edge_index_elapsed_time) + ' sec'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
+
+def test_traffic_density_model_repeated_traffic_event():
+    """
+    Check that a traffic_event, which is reported again with the same event_id, replaces its previous
+    contribution to the TrafficDensityModel, instead of being combined with it.
+
+    :return: None
+    """
+    log(module_name='traffic_data_parser_tester', log_type='INFO',
+        log_message='test_traffic_density_model_repeated_traffic_event: starting')
+
+    edge_documents = [
+        {'_id': edge_object_id,
+         'starting_node': {'osm_id': edge_object_id, 'point': {'longitude': 0.0, 'latitude': 0.0}},
+         'ending_node': {'osm_id': edge_object_id + 1, 'point': {'longitude': 0.0, 'latitude': 0.0}}}
+        for edge_object_id in range(0, 3)
+    ]
+    traffic_density_model = TrafficDensityModel(edge_documents=edge_documents)
+    event_datetime = datetime(2016, 10, 11, 11, 0, 0)
+    current_datetime = event_datetime + timedelta(minutes=5)
+
+    traffic_density_model.add_traffic_event(
+        edge_object_id=1, traffic_density_value=0.5, event_datetime=event_datetime, event_id='event'
+    )
+    traffic_density_model.update(current_datetime=current_datetime)
+    traffic_densities_after_first_report = traffic_density_model.get_traffic_densities()
+
+    traffic_density_model.add_traffic_event(
+        edge_object_id=1, traffic_density_value=0.5, event_datetime=event_datetime, event_id='event'
+    )
+    traffic_density_model.update(current_datetime=current_datetime)
+    traffic_densities_after_second_report = traffic_density_model.get_traffic_densities()
+
+    if not np.allclose(traffic_densities_after_first_report, traffic_densities_after_second_report):
+        raise AssertionError('test_traffic_density_model_repeated_traffic_event: traffic_densities changed - ' +
+                             str(traffic_densities_after_first_report) + ' != ' +
+                             str(traffic_densities_after_second_report))
+
+    traffic_density_model.remove_traffic_event(event_id='event')
+    traffic_density_model.update(current_datetime=current_datetime)
+
+    if not np.allclose(traffic_density_model.get_traffic_densities(), 0.0):
+        raise AssertionError('test_traffic_density_model_repeated_traffic_event: traffic_densities not removed - ' +
+                             str(traffic_density_model.get_traffic_densities()))
+
+    log(module_name='traffic_data_parser_tester', log_type='INFO',
+        log_message='test_traffic_density_model_repeated_traffic_event: finished - traffic_densities = ' +
+                    str(traffic_densities_after_second_report))
+
 
 if __name__ == '__main__':
     traffic_data_parser_tester = TrafficDataParserTester()
+    # A selection can also be provided as a command line argument, so as to be run non-interactively
+    # (e.g. python traffic_data_parser_test.py 6).
+    selections = sys.argv[1:] + ['0'] if len(sys.argv) > 1 else None
 
     while True:
         time.sleep(0.01)
-        selection = raw_input(
+        selection = selections.pop(0) if selections is not None else raw_input(
             '\n0.  exit'
             '\n1.  get_borders_of_operation_area'
             '\n2.  update_traffic_data'
             '\n3.  start_traffic_data_parser_process'
             '\n4.  terminate_traffic_data_parser_process'
+            '\n5.  benchmark_edge_matching'
+            '\n6.  test_traffic_density_model_repeated_traffic_event'
             '\nSelection: '
         )
 
@@ -269,5 +394,13 @@ if __name__ == '__main__':
         elif selection == '4':
             traffic_data_parser_tester.terminate_traffic_data_parser_process()
 
+        # 5. benchmark_edge_matching
+        elif selection == '5':
+            traffic_data_parser_tester.benchmark_edge_matching()
+
+        # 6. test_traffic_density_model_repeated_traffic_event
+        elif selection == '6':
+            test_traffic_density_model_repeated_traffic_event()
+
         else:
             pass
@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -257,6 +265,27 @@ class TrafficDataSimulatorTester(object):
                            + str(self.elapsed_time) + ' sec'
         log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
 
+    def test_generate_traffic_data_for_all_edges(self, number_of_repetitions=1):
+        """
+        Generate random traffic density values for all the stored edge_documents.
+
+        :param number_of_repetitions: int
+        :return: None
+        """
+        self.log_message = 'test_generate_traffic_data_for_all_edges: starting'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
+        self.start_time = time.time()
+
+        for _ in range(0, number_of_repetitions):
+            self.traffic_data_simulator.generate_traffic_data_for_all_edges()
+
+        self.elapsed_time = time.time() - self.start_time
+
+        self.log_message = 'test_generate_traffic_data_for_all_edges: finished - number_of_repetitions = ' \
+                           + str(number_of_repetitions) + ' - elapsed_time = ' + str(self.elapsed_time) + ' sec'
+        log(module_name=self.module_name, log_type=self.log_type, log_message=self.log_message)
+
     def test_generate_traffic_data_for_bus_line(self, bus_line=None, bus_line_id=None):
         """
         Generate random traffic density values for the edge_documents which are included in a bus_line_document.
@@ -339,6 +368,7 @@ if __name__ == '__main__':
             '\n1.  test_generate_traffic_data_between_multiple_bus_stops'
             '\n2.  start_traffic_data_generator_process'
             '\n3.  terminate_traffic_data_generator_process'
+            '\n4.  test_generate_traffic_data_for_all_edges'
             '\nSelection: '
         )
 
@@ -360,6 +390,10 @@ if __name__ == '__main__':
         elif selection == '3':
             traffic_data_simulator_tester.terminate_traffic_data_generator_process()
 
+        # 4. test_generate_traffic_data_for_all_edges
+        elif selection == '4':
+            traffic_data_simulator_tester.test_generate_traffic_data_for_all_edges(number_of_repetitions=10)
+
         else:
             pass
 
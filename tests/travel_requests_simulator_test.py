@@ -48,6 +48,9 @@ bus_vehicle_document: {
     '_id', 'bus_vehicle_id', 'maximum_capacity',
     'routes': [{'starting_datetime', 'ending_datetime', 'timetable_id'}]
 }
+counter_document: {
+    '_id', 'sequence_value'
+}
 detailed_bus_stop_waypoints_document: {
     '_id', 'starting_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
     'ending_bus_stop': {'_id', 'osm_id', 'name', 'point': {'longitude', 'latitude'}},
@@ -61,6 +64,10 @@ edge_document: {
 node_document: {
     '_id', 'osm_id', 'tags', 'point': {'longitude', 'latitude'}
 }
+operation_area_document: {
+    '_id', 'minimum_longitude', 'maximum_longitude', 'minimum_latitude', 'maximum_latitude',
+    'convex_hull': [{'longitude', 'latitude'}]
+}
 point_document: {
     '_id', 'osm_id', 'point': {'longitude', 'latitude'}
 }
@@ -86,7 +93,8 @@ timetable_document: {
     }]
 }
 traffic_event_document: {
-    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime'
+    '_id', 'event_id', 'event_type', 'event_level', 'point': {'longitude', 'latitude'}, 'datetime',
+    'modified_datetime'
 }
 travel_request_document: {
     '_id', 'client_id', 'bus_line_id',
@@ -325,6 +333,7 @@ class TravelRequestsSimulatorTester(object):
 if __name__ == '__main__':
     travel_requests_simulator_tester = TravelRequestsSimulatorTester()
     number_of_travel_requests_documents = 1000
+    number_of_stress_test_travel_requests_documents = 1000000
 
     while True:
         time.sleep(0.01)
@@ -333,6 +342,7 @@ if __name__ == '__main__':
             '\n1.  test_generate_travel_request_documents'
             '\n2.  start_travel_requests_generator_process'
             '\n3.  terminate_travel_requests_generator_process'
+            '\n4.  test_generate_travel_request_documents (stress test)'
             '\nSelection: '
         )
 
@@ -360,5 +370,13 @@ if __name__ == '__main__':
         elif selection == '3':
             travel_requests_simulator_tester.terminate_travel_requests_generator_process()
 
+        # 4. test_generate_travel_request_documents (stress test)
+        elif selection == '4':
+            travel_requests_simulator_tester.test_generate_travel_request_documents(
+                bus_line_id=testing_bus_line_id,
+                initial_datetime=testing_travel_requests_min_departure_datetime,
+                number_of_travel_request_documents=number_of_stress_test_travel_requests_documents
+            )
+
         else:
             pass